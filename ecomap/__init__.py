@@ -0,0 +1 @@
+"""Shared helpers for the school eco-map app (streamlit_app.py) and scripts/."""
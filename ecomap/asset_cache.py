@@ -0,0 +1,270 @@
+"""Content-addressed cache for derived assets (resized/re-encoded images).
+
+Two tiers:
+  * an in-process LRU (bounded by entry count and bytes), shared by every
+    session of the Streamlit server;
+  * an on-disk tier that survives restarts, bounded by total bytes and
+    evicted oldest-first.
+
+Keys are built from the source file identity (path, mtime, size) plus the
+processing parameters and the encoder version, so editing a photo, changing
+max_width/quality or changing what `encode_image` writes produces a new
+entry instead of serving stale bytes.
+
+`get_or_create` is single-flight: while one thread is creating an entry,
+other threads asking for the same key wait for that result instead of
+doing the same work again (see `SingleFlight`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from .imaging import ENCODER_VERSION
+
+Entry = tuple[bytes, str]  # (encoded bytes, mime type)
+T = TypeVar("T")
+
+
+def asset_key(path: Path, stat: os.stat_result | None = None, encoder: int = ENCODER_VERSION, **params) -> str:
+    """Return a stable cache key for `path` processed with `params` by encoder version `encoder`.
+
+    Pass `stat` (with an already resolved `path`) to skip the filesystem calls.
+    """
+    info = stat or path.stat()
+    ident = {
+        "path": (path if stat else path.resolve()).as_posix(),
+        "mtime": info.st_mtime_ns,
+        "size": info.st_size,
+        "encoder": encoder,
+        "params": params,
+    }
+    raw = json.dumps(ident, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class SingleFlight:
+    """At most one call in flight per key; concurrent callers share its result.
+
+    A caller that arrives while `fn` is running for the same key blocks until
+    it finishes and gets the same return value (or exception). Nothing is
+    remembered afterwards, so callers keep their own cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+        self.shared = 0  # calls answered by another caller's work
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not owner:
+            return call.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AssetCache:
+    def __init__(
+        self,
+        disk_dir: Path | None = None,
+        memory_items: int = 128,
+        memory_bytes: int = 64 * 1024 * 1024,
+        disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._mem: OrderedDict[str, Entry] = OrderedDict()
+        self._mem_size = 0
+        self._disk_size: int | None = None  # computed lazily on first write
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    # -- public API -------------------------------------------------------
+
+    def get(self, key: str) -> Entry | None:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry
+        entry = self._disk_get(key)
+        if entry is not None:
+            with self._lock:
+                self.counters["disk_hits"] += 1
+            self._mem_put(key, entry)
+            return entry
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, data: bytes, mime: str) -> None:
+        entry = (data, mime)
+        self._mem_put(key, entry)
+        self._disk_put(key, entry)
+
+    def get_or_create(self, key: str, create: Callable[[], Entry]) -> Entry:
+        entry = self.get(key)
+        if entry is None:
+            entry = self._flight.do(key, lambda: self._create(key, create))
+        return entry
+
+    def _create(self, key: str, create: Callable[[], Entry]) -> Entry:
+        # another thread may have finished the same key since our lookup
+        with self._lock:
+            entry = self._mem.get(key)
+        if entry is None:
+            entry = create()
+            self.put(key, *entry)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.counters)
+            out["memory_entries"] = len(self._mem)
+            out["memory_bytes"] = self._mem_size
+        out["shared_creates"] = self._flight.shared
+        out["disk_bytes"] = self._disk_size
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = (out["memory_hits"] + out["disk_hits"]) / lookups if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_size = 0
+        if self.disk_dir and self.disk_dir.exists():
+            for f in self.disk_dir.glob("*/*"):
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+        self._disk_size = 0
+
+    # -- memory tier ------------------------------------------------------
+
+    def _mem_put(self, key: str, entry: Entry) -> None:
+        size = len(entry[0])
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_size -= len(old[0])
+            self._mem[key] = entry
+            self._mem_size += size
+            while self._mem and (len(self._mem) > self.memory_items or self._mem_size > self.memory_bytes):
+                _, (data, _) = self._mem.popitem(last=False)
+                self._mem_size -= len(data)
+                self.counters["memory_evictions"] += 1
+
+    # -- disk tier --------------------------------------------------------
+    # file layout: <disk_dir>/<key[:2]>/<key>, content = mime + b"\n" + data
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / key
+
+    def _disk_get(self, key: str) -> Entry | None:
+        if not self.disk_dir:
+            return None
+        p = self._disk_path(key)
+        try:
+            raw = p.read_bytes()
+        except OSError:
+            return None
+        mime, sep, data = raw.partition(b"\n")
+        if not sep:
+            return None
+        try:
+            os.utime(p)  # bump mtime so eviction is least-recently-used
+        except OSError:
+            pass
+        return data, mime.decode("ascii")
+
+    def _disk_put(self, key: str, entry: Entry) -> None:
+        if not self.disk_dir:
+            return
+        data, mime = entry
+        p = self._disk_path(key)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(mime.encode("ascii") + b"\n" + data)
+            os.replace(tmp, p)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk_size()
+            else:
+                self._disk_size += len(data) + len(mime) + 1
+            over = self._disk_size > self.disk_bytes
+        if over:
+            self._disk_evict()
+
+    def _scan_disk_size(self) -> int:
+        total = 0
+        for f in self.disk_dir.glob("*/*"):
+            try:
+                total += f.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _disk_evict(self) -> None:
+        files = []
+        for f in self.disk_dir.glob("*/*"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        # evict down to 90% of the cap so we don't rescan on every write
+        target = int(self.disk_bytes * 0.9)
+        for _, size, f in files:
+            if total <= target:
+                break
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.counters["disk_evictions"] += 1
+        with self._lock:
+            self._disk_size = total
@@ -0,0 +1,260 @@
+"""Content-addressed asset store and a small HTTP server for it.
+
+Processed images are written once under a name derived from their bytes
+(``<sha256[:20]>.<ext>``), so a URL never changes meaning and can be served
+with ``Cache-Control: immutable``. The viewer then only receives URLs
+instead of base64 blobs, and browsers reuse the files across reruns,
+sessions and visits.
+
+A store for a long-running server can be given a size cap (`max_bytes`):
+every re-encoded photo and every payload JSON gets a new name, so without
+one the directory only grows. Least recently published or served files are
+deleted first, but never ones used within `min_age` seconds, which pages
+that are still open may ask for.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import unquote, urlsplit
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# redirects from stable names (/p/<plant id>) to hashed files may change when
+# a photo is replaced, so they are only cached briefly
+REDIRECT_CACHE = "public, max-age=300"
+
+# not known to every Python's mimetypes table
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def extension_for(mime: str) -> str:
+    ext = mimetypes.guess_extension(mime) or ".bin"
+    return ".jpg" if ext in (".jpe", ".jpeg") else ext
+
+
+class AssetStore:
+    def __init__(self, root: Path, max_bytes: int | None = None, min_age: float = 3600.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes  # None: keep everything (e.g. a site build)
+        self.min_age = min_age
+        self.evictions = 0
+        self._names: dict[str, str] = {}  # cache key -> published name
+        self._used: dict[str, float] = {}  # name -> when its mtime was last bumped
+        self._size: int | None = None  # computed lazily on first write
+        self._lock = threading.Lock()
+        # on-demand routes: GET /<prefix>/<arg> calls lazy[prefix](arg), which
+        # publishes the asset and returns its name (or None -> 404)
+        self.lazy: dict[str, Callable[[str], str | None]] = {}
+        # static directories: GET /<prefix>/<rel path> serves mounts[prefix]/<rel path>;
+        # only mount trees whose paths are versioned (e.g. tiles/<map>/<hash>/...)
+        self.mounts: dict[str, Path] = {}
+        # readiness for health checks: GET /ready answers 200 when health()
+        # reports {"state": "ready", ...} (or no check is set), else 503
+        self.health: Callable[[], dict] | None = None
+
+    def publish(self, data: bytes, mime: str, key: str | None = None) -> str:
+        """Write `data` under its content hash and return the file name.
+
+        `key` (e.g. an AssetCache key) lets repeated calls skip hashing and
+        the existence check entirely.
+        """
+        if key is not None:
+            with self._lock:
+                name = self._names.get(key)
+            if name is not None:
+                self._use(name)
+                return name
+        name = hashlib.sha256(data).hexdigest()[:20] + extension_for(mime)
+        dst = self.root / name
+        if dst.exists():
+            self._use(name)
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, dst)
+            self._grow(len(data))
+        if key is not None:
+            with self._lock:
+                self._names[key] = name
+        return name
+
+    def path_for(self, name: str) -> Path | None:
+        # only plain file names published by this store are served
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            return None
+        p = self.root / name
+        if not p.is_file():
+            return None
+        self._use(name)
+        return p
+
+    # -- size cap ---------------------------------------------------------
+
+    def _use(self, name: str) -> None:
+        """Bump the file's mtime (at most once a minute) so eviction is least-recently-used."""
+        if self.max_bytes is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._used.get(name, -60.0) < 60.0:
+                return
+            self._used[name] = now
+        try:
+            os.utime(self.root / name)
+        except OSError:
+            pass
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        files = []
+        for f in self.root.iterdir():
+            if f.name.startswith("."):
+                continue
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+        return files
+
+    def _grow(self, n: int) -> None:
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            scan = self._size is None
+        size = sum(size for _, size, _ in self._files()) if scan else None
+        with self._lock:
+            self._size = size if scan else self._size + n
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        # down to 90% of the cap so we don't rescan on every write
+        target = int(self.max_bytes * 0.9)
+        cutoff = time.time() - self.min_age
+        gone = set()
+        for mtime, size, f in files:
+            if total <= target or mtime > cutoff:
+                break
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            total -= size
+            gone.add(f.name)
+        with self._lock:
+            self._size = total
+            self.evictions += len(gone)
+            if gone:
+                # republished (rewritten) the next time they are asked for
+                self._names = {k: v for k, v in self._names.items() if v not in gone}
+                for name in gone:
+                    self._used.pop(name, None)
+
+    def mounted_path(self, prefix: str, rel: str) -> Path | None:
+        base = self.mounts[prefix].resolve()
+        p = (base / rel).resolve()
+        if not p.is_relative_to(base) or not p.is_file():
+            return None
+        return p
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    store: AssetStore  # set on the per-server subclass
+
+    def log_message(self, format, *args):  # keep the Streamlit console quiet
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head: bool):
+        path = unquote(urlsplit(self.path).path)
+        prefix, _, name = path.lstrip("/").partition("/")
+        if path == "/ready":
+            self._ready(head)
+            return
+        if prefix in self.store.lazy:
+            self._redirect(prefix, name)
+            return
+        if prefix in self.store.mounts:
+            p = self.store.mounted_path(prefix, name)
+        elif prefix == "a":
+            p = self.store.path_for(name)
+        else:
+            p = None
+        if p is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        # hashed names / versioned paths never change content, so the path
+        # doubles as a strong ETag
+        etag = '"' + path.strip("/").replace('"', "") + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", IMMUTABLE)
+            self.end_headers()
+            return
+        data = p.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", mimetypes.guess_type(p.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", IMMUTABLE)
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+    def _ready(self, head: bool):
+        status = self.store.health() if self.store.health else {"state": "ready"}
+        data = json.dumps(status).encode("utf-8")
+        self.send_response(HTTPStatus.OK if status.get("state") == "ready" else HTTPStatus.SERVICE_UNAVAILABLE)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+    def _redirect(self, prefix: str, arg: str):
+        try:
+            name = self.store.lazy[prefix](arg)
+        except Exception:
+            name = None
+        if not name:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_response(HTTPStatus.FOUND)
+        # relative, so it also works when the server sits under a proxy path
+        self.send_header("Location", "../a/" + name)
+        self.send_header("Cache-Control", REDIRECT_CACHE)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def start_asset_server(store: AssetStore, host: str = "0.0.0.0", port: int = 8502) -> ThreadingHTTPServer:
+    """Serve `store` at /a/<name> (plus its lazy routes, mounts and /ready) from a daemon thread."""
+    handler = type("BoundAssetRequestHandler", (AssetRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ecomap-asset-server", daemon=True).start()
+    return server
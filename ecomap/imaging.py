@@ -0,0 +1,158 @@
+"""Decoding, resizing and re-encoding images for the viewer and the scripts.
+
+Every image that is only needed smaller than it is goes through
+`load_image()`, which keeps peak memory close to the size of the result
+instead of the full phone photo:
+
+- JPEGs are decoded at 1/2, 1/4 or 1/8 scale when that is still at least
+  the target size (draft mode, "reduce on decode");
+- the remaining reduction is a reducing resize (box-reduce, then Lanczos);
+- EXIF orientation is applied, and EXIF/XMP metadata (camera, GPS) dropped;
+- images over `MAX_PIXELS` are refused without being decoded, and decodes
+  across threads share a budget of `DECODE_BUDGET` bytes, so several
+  sessions rerunning at once wait for each other instead of all holding a
+  full-size photo at the same time.
+
+Both limits can be set with ECOMAP_MAX_PIXELS and ECOMAP_DECODE_BUDGET_MB.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator
+
+from PIL import Image, ImageOps
+
+# part of every asset cache key (ecomap.asset_cache.asset_key) and of the
+# pipeline manifest's input hashes: bump it whenever encode_image() or
+# load_image() produce different bytes for the same input, so entries the
+# on-disk cache kept across restarts, and build/compressed/ or static_photos/
+# outputs, are not treated as current any more.
+#   2: resized JPEGs are saved as JPEG (were PNG bytes labelled image/jpeg)
+#   3: EXIF orientation applied, metadata other than the colour profile dropped
+ENCODER_VERSION = 3
+
+MAX_PIXELS = int(os.environ.get("ECOMAP_MAX_PIXELS", 64_000_000))
+DECODE_BUDGET = int(os.environ.get("ECOMAP_DECODE_BUDGET_MB", 512)) * 2**20
+
+# EXIF orientations that swap width and height
+_TRANSPOSED = {5, 6, 7, 8}
+# image info worth keeping on re-encode (colour, palette transparency)
+_KEEP_INFO = ("icc_profile", "transparency")
+
+
+class ImageTooLarge(ValueError):
+    """The image is over the pixel limit, or would not fit the decode budget."""
+
+
+class DecodeBudget:
+    """Bytes of decoded pixels allowed in memory at once, shared by threads."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        if nbytes > self.limit:
+            raise ImageTooLarge(f"decoding needs {nbytes >> 20}MB, budget is {self.limit >> 20}MB")
+        with self._cond:
+            while self.used + nbytes > self.limit:
+                self._cond.wait()
+            self.used += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.used -= nbytes
+                self._cond.notify_all()
+
+
+budget = DecodeBudget(DECODE_BUDGET)
+
+
+def fit(size: tuple[int, int], max_w: int | None, max_h: int | None) -> tuple[int, int]:
+    """`size` scaled down (never up) to fit max_w x max_h; None means unbounded."""
+    w, h = size
+    scale = min(1.0, (max_w or w) / w, (max_h or h) / h)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def image_size(path: Path) -> tuple[int, int]:
+    """Upright (width, height) of `path`, read from the header only."""
+    with Image.open(path) as im:
+        w, h = im.size
+        return (h, w) if im.getexif().get(0x0112) in _TRANSPOSED else (w, h)
+
+
+def load_image(path: Path, max_w: int | None = None, max_h: int | None = None) -> tuple[Image.Image, str | None]:
+    """Decode `path` upright and no larger than max_w x max_h -> (image, source format).
+
+    The image is fully loaded and the file closed; metadata other than the
+    colour profile is gone. Raises ImageTooLarge (see module docstring).
+    """
+    with Image.open(path) as im:
+        src_format = im.format
+        w, h = im.size
+        if w * h > MAX_PIXELS:
+            raise ImageTooLarge(f"{path}: {w}x{h} is over {MAX_PIXELS} pixels")
+        orientation = im.getexif().get(0x0112)
+        # target in stored (not yet rotated) orientation
+        if orientation in _TRANSPOSED:
+            tw, th = fit((w, h), max_h, max_w)
+        else:
+            tw, th = fit((w, h), max_w, max_h)
+        if src_format == "JPEG" and (tw, th) != (w, h):
+            im.draft(im.mode, (tw, th))
+        dw, dh = im.size
+        bands = len(im.getbands())
+        # decoded pixels, the rotated copy, the result
+        need = dw * dh * bands * (2 if orientation not in (None, 1) else 1) + tw * th * max(bands, 4)
+        animated = getattr(im, "is_animated", False)
+        with budget.reserve(need):
+            if animated:
+                im.seek(0)
+            im.load()
+            out = ImageOps.exif_transpose(im)
+            if animated:
+                # first frame only
+                out = out.convert("RGBA")
+            if out.size != fit(out.size, max_w, max_h):
+                out = out.resize(fit(out.size, max_w, max_h), Image.LANCZOS, reducing_gap=3.0)
+            elif out is im:
+                out = im.copy()
+    out.info = {k: out.info[k] for k in _KEEP_INFO if k in out.info}
+    return out, src_format
+
+
+def encode_image(path: Path, max_width: int = 1600, quality: int = 80, fmt: str | None = None) -> tuple[bytes, str]:
+    """Decode `path`, shrink it to `max_width` and re-encode it -> (bytes, mime)."""
+    img, src_format = load_image(path, max_width)
+    with img:
+        target = (fmt or src_format or "PNG").upper()
+        buf = BytesIO()
+        save_kwargs = {}
+        if target in ("JPEG", "JPG"):
+            save_kwargs["quality"] = quality
+            save_fmt = "JPEG"
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+        elif target == "WEBP":
+            save_kwargs["quality"] = quality
+            save_fmt = "WEBP"
+        else:
+            # keep PNG for transparency
+            save_fmt = "PNG"
+        if "icc_profile" in img.info:
+            save_kwargs["icc_profile"] = img.info["icc_profile"]
+        img.save(buf, format=save_fmt, **save_kwargs)
+        b = buf.getvalue()
+    mime = None if fmt else mimetypes.guess_type(path.as_posix())[0]
+    if not mime or (save_fmt == "PNG") != (mime == "image/png"):
+        mime = "image/png" if save_fmt == "PNG" else f"image/{save_fmt.lower()}"
+    return b, mime
@@ -0,0 +1,180 @@
+"""Finding (and repairing) damaged image files before they reach the app.
+
+`check_file()` looks at one image in two passes:
+
+- a cheap pass that parses the header and runs Pillow's `verify()`, and for
+  JPEG/WebP checks that the file is not cut short (end-of-image marker,
+  RIFF length); PNG's `verify()` already walks every chunk and its CRC;
+- a full decode (through `imaging.load_image`, at reduced size) only for
+  files the cheap pass finds suspect.
+
+Files that fail the decode are "broken". `repair()` re-saves the part of a
+truncated image Pillow can still read; a file Pillow cannot identify at all
+cannot be repaired. Results are plain dicts, written as a JSON report by
+scripts/check_and_fix_image.py, and read back with `load_report()` (e.g. by
+scripts/save_plants.py --image-report to refuse broken photos).
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageFile, UnidentifiedImageError
+
+from .imaging import MAX_PIXELS, ImageTooLarge, load_image
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+# statuses that keep an image out of the app
+BAD = ("broken", "too_large", "missing")
+
+# decode suspects at this size at most: enough to read every byte of the
+# file (a JPEG draft still walks all scans) without holding the full photo
+_DECODE_SIZE = 1024
+# cameras may append data (previews, maker notes) after the end marker
+_JPEG_TAIL = 64 * 1024
+
+
+def _truncated(path: Path, fmt: str | None, size: int) -> bool:
+    with open(path, "rb") as f:
+        if fmt in ("JPEG", "MPO"):
+            f.seek(max(0, size - _JPEG_TAIL))
+            return b"\xff\xd9" not in f.read()
+        if fmt == "WEBP":
+            head = f.read(12)
+            return len(head) < 12 or int.from_bytes(head[4:8], "little") + 8 > size
+    return False
+
+
+def check_file(path: Path) -> dict:
+    """Check one image -> {"path", "size", "mtime_ns", "status", "check", "format",
+    "width", "height", "error"}; status is "ok", "broken", "too_large" or "missing"."""
+    path = Path(path)
+    out = {"path": str(path), "status": "ok", "check": "header", "format": None,
+           "width": None, "height": None, "error": None}
+    try:
+        st = path.stat()
+    except OSError as e:
+        return {**out, "status": "missing", "error": str(e)}
+    out.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    suspect = None
+    try:
+        with Image.open(path) as im:
+            out.update(format=im.format, width=im.width, height=im.height)
+            if im.width * im.height > MAX_PIXELS:
+                return {**out, "status": "too_large", "error": f"{im.width}x{im.height} is over {MAX_PIXELS} pixels"}
+            im.verify()
+        if _truncated(path, out["format"], st.st_size):
+            suspect = "no end-of-image marker"
+    except Image.DecompressionBombError as e:
+        return {**out, "status": "too_large", "error": str(e)}
+    except UnidentifiedImageError as e:
+        return {**out, "status": "broken", "error": str(e)}
+    except Exception as e:
+        suspect = str(e) or type(e).__name__
+    if suspect is None:
+        return out
+    out["check"] = "decode"
+    try:
+        img, _ = load_image(path, _DECODE_SIZE, _DECODE_SIZE)
+        img.close()
+    except ImageTooLarge as e:
+        return {**out, "status": "too_large", "error": str(e)}
+    except Exception as e:
+        return {**out, "status": "broken", "error": str(e) or suspect}
+    return out
+
+
+def repair(path: Path, dst: Path) -> None:
+    """Re-save what Pillow can read of a damaged `path` to `dst` (same format).
+
+    Missing rows of a truncated image come out grey. EXIF (orientation) and
+    the colour profile are kept. Raises if nothing can be recovered.
+    """
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+    try:
+        with Image.open(path) as im:
+            im.load()
+            fmt = "JPEG" if im.format in ("JPEG", "MPO") else im.format or "PNG"
+            kwargs = {k: im.info[k] for k in ("exif", "icc_profile") if im.info.get(k)}
+            if fmt in ("JPEG", "WEBP"):
+                kwargs["quality"] = 95
+            if fmt == "JPEG" and im.mode not in ("RGB", "L"):
+                im = im.convert("RGB")
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=".tmp-", suffix=dst.suffix)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    im.save(f, format=fmt, **kwargs)
+                os.replace(tmp, dst)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+    finally:
+        ImageFile.LOAD_TRUNCATED_IMAGES = False
+
+
+def check_and_repair(path: Path, fix: Path | None = None) -> dict:
+    """`check_file(path)`; if it is broken and `fix` is given, repair into `fix`
+    and check that. A repaired entry gets "repaired": <fix> (status of the copy)."""
+    result = check_file(path)
+    if fix is None or result["status"] != "broken":
+        return result
+    try:
+        repair(path, fix)
+    except Exception as e:
+        return {**result, "repair_error": str(e) or type(e).__name__}
+    fixed = check_file(fix)
+    if fixed["status"] != "ok":
+        return {**result, "repair_error": fixed["error"]}
+    return {**result, "repaired": str(fix)}
+
+
+def write_report(path: Path, results: list[dict], root: Path) -> dict:
+    """Write the JSON report (paths relative to `root`) and return it."""
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    counts["repaired"] = sum("repaired" in r for r in results)
+
+    def rel(p: str) -> str:
+        try:
+            return Path(p).resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            return p
+
+    files = [{**r, "path": rel(r["path"]), **({"repaired": rel(r["repaired"])} if "repaired" in r else {})}
+             for r in sorted(results, key=lambda r: r["path"])]
+    report = {"counts": counts, "files": files}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return report
+
+
+def load_report(path: Path, root: Path) -> dict[Path, dict]:
+    """Resolved file path -> report entry, for a report written by `write_report`."""
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {(root / f["path"]).resolve(): f for f in report["files"]}
+
+
+def problem(report: dict[Path, dict], path: Path) -> str | None:
+    """Why `path` must not be used (None if it is fine).
+
+    The report entry is trusted while the file's size and mtime match it;
+    files that are new or changed since the report are checked now.
+    """
+    path = Path(path).resolve()
+    entry = report.get(path)
+    try:
+        st = path.stat()
+        fresh = entry is not None and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+    except OSError:
+        fresh = False
+    if not fresh:
+        entry = check_file(path)
+    if entry["status"] in BAD:
+        return f"{entry['status']}: {entry['error']}"
+    return None
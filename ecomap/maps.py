@@ -0,0 +1,80 @@
+"""Map registry: which maps a deployment shows and which plants are on each.
+
+map/maps.json lists the maps (campuses, building floors), first one shown
+by default:
+
+    [{"id": "main", "title": "본관", "image": "school-map.jpg"},
+     {"id": "annex-2f", "title": "별관 2층", "image": "annex-2f.png"}]
+
+A plant belongs to the map named by its "map" field, or to the first map if
+it has none; its x/y are percentages of that map's image. Without maps.json
+the registry is the single largest image in map/, as before.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+log = logging.getLogger("ecomap.maps")
+
+REGISTRY = "maps.json"
+MAP_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".svg"}
+
+
+@dataclass(frozen=True)
+class MapDef:
+    id: str
+    title: str
+    image: Path
+
+
+def choose_map_file(map_dir: Path) -> Path:
+    """The largest image in `map_dir` (or the default school-map.jpg path)."""
+    if map_dir.exists():
+        imgs = [p for p in map_dir.iterdir() if p.suffix.lower() in MAP_EXTS and p.is_file()]
+        if imgs:
+            return sorted(imgs, key=lambda p: p.stat().st_size, reverse=True)[0]
+    return map_dir / "school-map.jpg"
+
+
+def load_maps(map_dir: Path) -> list[MapDef]:
+    """The maps in map/maps.json; a broken registry is logged and ignored."""
+    map_dir = Path(map_dir)
+    reg = map_dir / REGISTRY
+    if reg.exists():
+        try:
+            return _parse(json.loads(reg.read_text(encoding="utf-8")), map_dir)
+        except ValueError as e:
+            log.error("%s is not valid, showing only the default map: %s", reg, e)
+    image = choose_map_file(map_dir)
+    return [MapDef(image.stem, image.stem, image)]
+
+
+def _parse(entries, map_dir: Path) -> list[MapDef]:
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("top level must be a non-empty list")
+    maps, seen = [], set()
+    for n, e in enumerate(entries, 1):
+        if not isinstance(e, dict) or not isinstance(e.get("id"), str) or not isinstance(e.get("image"), str):
+            raise ValueError(f"item {n}: needs string \"id\" and \"image\"")
+        if e["id"] in seen:
+            raise ValueError(f"duplicate map id: {e['id']}")
+        seen.add(e["id"])
+        image = (map_dir / e["image"]).resolve()
+        if not image.is_relative_to(map_dir.resolve()):
+            raise ValueError(f"item {n}: image must be inside {map_dir}")
+        maps.append(MapDef(e["id"], str(e.get("title") or e["id"]), image))
+    return maps
+
+
+def split_plants(plants: list[dict], maps: list[MapDef]) -> dict[str, list[dict]]:
+    """map id -> its plants, in catalogue order. Plants naming an unknown map are left out."""
+    out = {m.id: [] for m in maps}
+    default = maps[0].id
+    for p in plants:
+        bucket = out.get(p.get("map") or default)
+        if bucket is not None:
+            bucket.append(p)
+    return out
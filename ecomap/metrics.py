@@ -0,0 +1,104 @@
+"""Per-run timing and payload metrics for the Streamlit render path.
+
+One `RenderMetrics` is filled during a script run: named stage spans,
+per-asset encode records and errors. At the end of the run it is written as
+a single JSON log line (logger "ecomap.render") and, optionally, to a
+Prometheus-style text file, and can be shown in the app's debug panel.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+log = logging.getLogger("ecomap.render")
+
+
+@dataclass
+class AssetRecord:
+    path: str
+    seconds: float
+    bytes: int
+    cached: bool
+
+
+@dataclass
+class RenderMetrics:
+    spans: dict[str, float] = field(default_factory=dict)
+    assets: list[AssetRecord] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    values: dict[str, float] = field(default_factory=dict)  # e.g. html_bytes, plants
+    started: float = field(default_factory=time.perf_counter)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a stage; repeated spans with the same name add up."""
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - t
+
+    def asset(self, path: Path, seconds: float, nbytes: int, cached: bool) -> None:
+        self.assets.append(AssetRecord(Path(path).as_posix(), seconds, nbytes, cached))
+
+    def error(self, msg: str) -> None:
+        self.errors.append(msg)
+
+    def summary(self, cache_stats: dict | None = None) -> dict:
+        encoded = [a for a in self.assets if not a.cached]
+        out = {
+            "total_s": round(time.perf_counter() - self.started, 4),
+            "spans_s": {k: round(v, 4) for k, v in self.spans.items()},
+            "assets": len(self.assets),
+            "assets_encoded": len(encoded),
+            "asset_bytes": sum(a.bytes for a in self.assets),
+            "encode_s": round(sum(a.seconds for a in encoded), 4),
+            "errors": len(self.errors),
+            **self.values,
+        }
+        if cache_stats:
+            out["cache"] = cache_stats
+        return out
+
+    def slowest(self, n: int = 10) -> list[dict]:
+        return [asdict(a) for a in sorted(self.assets, key=lambda a: a.seconds, reverse=True)[:n]]
+
+    def log(self, cache_stats: dict | None = None) -> dict:
+        summary = self.summary(cache_stats)
+        log.info(json.dumps(summary, ensure_ascii=False, sort_keys=True))
+        return summary
+
+    def write_text(self, path: Path, cache_stats: dict | None = None) -> None:
+        """Write the run's summary as Prometheus text exposition (replacing the file)."""
+        s = self.summary(cache_stats)
+        lines = [
+            "# TYPE ecomap_render_seconds gauge",
+            f"ecomap_render_seconds {s['total_s']}",
+            "# TYPE ecomap_stage_seconds gauge",
+        ]
+        lines += [f'ecomap_stage_seconds{{stage="{k}"}} {v}' for k, v in s["spans_s"].items()]
+        lines += [
+            "# TYPE ecomap_assets gauge",
+            f'ecomap_assets{{state="cached"}} {s["assets"] - s["assets_encoded"]}',
+            f'ecomap_assets{{state="encoded"}} {s["assets_encoded"]}',
+            f"ecomap_asset_bytes {s['asset_bytes']}",
+            f"ecomap_encode_seconds {s['encode_s']}",
+            f"ecomap_render_errors {s['errors']}",
+        ]
+        lines += [f"ecomap_{k} {v}" for k, v in self.values.items()]
+        for k, v in (cache_stats or {}).items():
+            if isinstance(v, (int, float)):
+                lines.append(f'ecomap_asset_cache{{stat="{k}"}} {v}')
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
@@ -0,0 +1,130 @@
+"""Offline support for the static site (scripts/build_site.py).
+
+`service_worker()` writes sw.js for one build. On install it precaches
+index.html, every map's payload JSON and one file per map image and plant
+photo; everything is then served cache-first, so repeat visits load without
+the network. Asset names are content hashes, so a new build's worker copies
+files it already has from the previous cache and downloads only new names.
+Tiles and other variants are cached as they are fetched. When offline, a
+missing variant is answered with any cached size/format of the same image.
+
+`REGISTER` is the page side: it registers the worker and, when a new build
+has been installed in the background, offers a reload to switch to it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+
+CACHE_PREFIX = "ecomap-"
+
+
+def image_group(value) -> tuple[list[str], str | None]:
+    """(all asset paths, the one to precache) for a viewer image value.
+
+    `value` is a URL ("assets/<name>") or a variants entry {"w": widths,
+    "t": {mime: names}}; the precached file is the middle-width JPEG, which
+    is also what the viewer falls back to.
+    """
+    if isinstance(value, str):
+        return ([value], value) if value.startswith("assets/") else ([], None)
+    names = [n for mime_names in value["t"].values() for n in mime_names]
+    jpeg = value["t"].get("image/jpeg") or next(iter(value["t"].values()))
+    return ["assets/" + n for n in names], "assets/" + jpeg[len(jpeg) // 2]
+
+
+def service_worker(index_html: str, precache: list[str], groups: list[list[str]]) -> str:
+    """sw.js for a build: `precache` paths relative to the site root, `groups`
+    of paths that are interchangeable versions of one image."""
+    precache = sorted(set(precache))
+    version = hashlib.sha256(
+        json.dumps([index_html, precache, groups], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    return (
+        SERVICE_WORKER.replace("{{CACHE}}", json.dumps(CACHE_PREFIX + version))
+        .replace("{{PREFIX}}", json.dumps(CACHE_PREFIX))
+        .replace("{{PRECACHE}}", json.dumps(precache, separators=(",", ":")))
+        .replace("{{GROUPS}}", json.dumps(groups, separators=(",", ":")))
+    )
+
+
+SERVICE_WORKER = """// generated by scripts/build_site.py
+const CACHE = {{CACHE}}, PREFIX = {{PREFIX}}, RUNTIME = PREFIX + 'runtime';
+const PRECACHE = {{PRECACHE}};
+const GROUPS = {{GROUPS}};
+const scope = self.registration.scope;
+const abs = p => new URL(p, scope).href;
+const INDEX = abs('index.html');
+// content-addressed paths: a name never changes meaning, so cache-first is safe
+const versioned = url => url.startsWith(abs('assets/')) || url.startsWith(abs('t/'));
+const groupOf = new Map();
+GROUPS.forEach(g => g.forEach(p => groupOf.set(abs(p), g)));
+
+async function precache(){
+  const cache = await caches.open(CACHE);
+  const todo = PRECACHE.map(abs);
+  // a few requests at a time; files an earlier build already has are copied
+  async function worker(){
+    for(let url; (url = todo.pop());){
+      if(await cache.match(url)) continue;
+      const old = url !== INDEX && await caches.match(url);
+      const res = old || await fetch(url, {cache: url === INDEX ? 'no-cache' : 'default'});
+      if(!res.ok) throw new Error(url + ': ' + res.status);
+      await cache.put(url, res);
+    }
+  }
+  await Promise.all(Array.from({length: 6}, worker));
+}
+
+self.addEventListener('install', e => e.waitUntil(precache()));
+
+self.addEventListener('activate', e => e.waitUntil((async () => {
+  const keep = new Set([CACHE, RUNTIME]);
+  for(const name of await caches.keys()) if(name.startsWith(PREFIX) && !keep.has(name)) await caches.delete(name);
+  await self.clients.claim();
+})()));
+
+self.addEventListener('message', e => { if(e.data === 'skipWaiting') self.skipWaiting(); });
+
+async function respond(req){
+  const url = req.url.split(/[?#]/)[0];
+  const hit = await caches.match(req.mode === 'navigate' || url === abs('') ? INDEX : url);
+  if(hit) return hit;
+  try {
+    const res = await fetch(req);
+    if(res.ok && versioned(url)) (await caches.open(RUNTIME)).put(url, res.clone());
+    return res;
+  } catch(err) {
+    // offline: any cached size/format of the same image will do
+    for(const p of groupOf.get(url) || []){ const r = await caches.match(abs(p)); if(r) return r; }
+    throw err;
+  }
+}
+
+self.addEventListener('fetch', e => {
+  if(e.request.method !== 'GET' || !e.request.url.startsWith(scope)) return;
+  e.respondWith(respond(e.request));
+});
+"""
+
+REGISTER = """<div id="updateBar" hidden style="position:fixed;left:50%;bottom:16px;transform:translateX(-50%);background:#234;color:#fff;padding:8px 12px;border-radius:6px;font-size:14px;box-shadow:0 4px 14px rgba(0,0,0,.25);z-index:10">새 버전이 준비되었습니다 <button type="button" class="btn">새로고침</button></div>
+<script>
+// offline cache (sw.js); a new build installs in the background and is
+// switched to when the visitor agrees, never in the middle of a visit
+if('serviceWorker' in navigator && location.protocol !== 'file:'){
+  const hadController = !!navigator.serviceWorker.controller;
+  const bar = document.getElementById('updateBar');
+  const offer = w => { bar.hidden = false; bar.querySelector('button').onclick = () => w.postMessage('skipWaiting'); };
+  navigator.serviceWorker.register('sw.js').then(reg => {
+    if(reg.waiting && hadController) offer(reg.waiting);
+    reg.addEventListener('updatefound', () => {
+      const w = reg.installing;
+      w.addEventListener('statechange', () => { if(w.state === 'installed' && hadController) offer(w); });
+    });
+  }).catch(() => {});
+  let reloading = false;
+  navigator.serviceWorker.addEventListener('controllerchange', () => {
+    if(hadController && !reloading){ reloading = true; location.reload(); }
+  });
+}
+</script>"""
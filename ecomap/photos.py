@@ -0,0 +1,190 @@
+"""Locating plant photos and the map images on disk."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .maps import REGISTRY, MapDef, choose_map_file, load_maps  # noqa: F401
+
+
+def resolve_photo(root: Path, photo: str) -> Path | None:
+    """Find a plant's photo: as written, under photo/, or under static_photos/."""
+    src = root / photo
+    if not src.exists():
+        alt = root / "photo" / Path(photo).name
+        if alt.exists():
+            src = alt
+    if not src.exists():
+        alt2 = root / "static_photos" / Path(photo).name
+        if alt2.exists():
+            src = alt2
+    return src if src.exists() else None
+
+
+@dataclass(frozen=True)
+class ResolvedFile:
+    path: Path  # fully resolved
+    stat: os.stat_result
+
+
+class AssetIndex:
+    """Plant photos and the map registry, resolved once and reused across reruns.
+
+    Resolving probes up to three paths per plant and reads map/, which is
+    slow on network storage. The result is kept until something changes: the
+    files and directories involved are re-stat'ed at most every
+    `check_interval` seconds. With watchdog installed, any filesystem event
+    under photo/, static_photos/, map/ (or a resolved photo's directory) also
+    marks the index stale right away. The polling stays on as a backstop,
+    because inotify does not see changes made from other hosts on a network
+    mount.
+    """
+
+    def __init__(self, root: Path, map_dir: Path, check_interval: float = 5.0, watch: bool = True):
+        self.root = Path(root)
+        self.map_dir = Path(map_dir)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._photos: dict[str, tuple[str, ResolvedFile | None]] = {}  # id -> (photo field, file)
+        self._maps: list[MapDef] | None = None
+        self._map_files: dict[str, ResolvedFile | None] = {}
+        self._dirty = False
+        self._sig: dict[Path, int] = {}  # path -> mtime_ns, for polling
+        self._checked = time.monotonic()
+        self._observer = None
+        self._watched: set[Path] = set()
+        if watch:
+            self._start_watch()
+
+    # -- public API -------------------------------------------------------
+
+    def maps(self) -> list[MapDef]:
+        """The registered maps (see ecomap.maps); never empty."""
+        with self._lock:
+            self._refresh()
+            return self._load_maps()
+
+    def map_file(self, map_id: str | None = None) -> ResolvedFile | None:
+        """The image of map `map_id` (default: the first map), if it exists."""
+        with self._lock:
+            self._refresh()
+            maps = self._load_maps()
+            m = next((m for m in maps if m.id == map_id), maps[0])
+            if m.id not in self._map_files:
+                self._map_files[m.id] = self._stat(m.image)
+                self._track(m.image)
+            return self._map_files[m.id]
+
+    def photos(self, plants: list[dict]) -> dict[str, ResolvedFile]:
+        """id -> photo file for every plant whose photo exists locally."""
+        with self._lock:
+            self._refresh()
+            out = {}
+            for p in plants:
+                pid = p.get("id")
+                photo = (p.get("photo") or "").strip()
+                if not pid or not photo or photo.startswith(("http://", "https://", "data:")):
+                    continue
+                cached = self._photos.get(pid)
+                if cached is None or cached[0] != photo:
+                    cached = (photo, self._resolve(photo))
+                    self._photos[pid] = cached
+                if cached[1] is not None:
+                    out[pid] = cached[1]
+            return out
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    # -- internals --------------------------------------------------------
+
+    def _load_maps(self) -> list[MapDef]:
+        if self._maps is None:
+            self._maps = load_maps(self.map_dir)
+            self._track(self.map_dir)
+            self._track(self.map_dir / REGISTRY)
+        return self._maps
+
+    def _stat(self, path: Path) -> ResolvedFile | None:
+        try:
+            path = path.resolve()
+            return ResolvedFile(path, path.stat())
+        except OSError:
+            return None
+
+    def _resolve(self, photo: str) -> ResolvedFile | None:
+        src = resolve_photo(self.root, photo)
+        found = self._stat(src) if src else None
+        # a new file would appear in one of these
+        for d in {(self.root / photo).parent, self.root / "photo", self.root / "static_photos"}:
+            self._track(d)
+        if found:
+            self._track(found.path)
+            self._track(found.path.parent)
+        return found
+
+    def _track(self, path: Path) -> None:
+        try:
+            self._sig.setdefault(path, path.stat().st_mtime_ns)
+        except OSError:
+            self._sig.setdefault(path, -1)
+        if self._observer is not None:
+            self._watch_dir(path if path.is_dir() else path.parent)
+
+    def _refresh(self) -> None:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+            for path, mtime in self._sig.items():
+                try:
+                    now = path.stat().st_mtime_ns
+                except OSError:
+                    now = -1
+                if now != mtime:
+                    self._dirty = True
+                    break
+        if self._dirty:
+            self._dirty = False
+            self._photos.clear()
+            self._maps = None
+            self._map_files.clear()
+            self._sig.clear()
+
+    def _start_watch(self) -> None:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+        index = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type not in ("opened", "closed_no_write"):
+                    index.invalidate()
+
+        self._handler = Handler()
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.start()
+        except Exception:
+            return
+        self._observer = observer
+        # the root itself, so photo/ or static_photos/ appearing later is noticed
+        for d in (self.root, self.root / "photo", self.root / "static_photos", self.map_dir):
+            self._watch_dir(d)
+
+    def _watch_dir(self, d: Path) -> None:
+        # nearest existing directory; the root is watched flat, the rest recursively
+        while not d.is_dir() and d != d.parent:
+            d = d.parent
+        if d in self._watched or any(w in d.parents for w in self._watched if w != self.root):
+            return
+        try:
+            self._observer.schedule(self._handler, str(d), recursive=d != self.root)
+        except Exception:
+            return
+        self._watched.add(d)
@@ -0,0 +1,185 @@
+"""Parallel, incremental batch processing for the image scripts.
+
+A job turns one source image into one output file. The runner remembers,
+in a manifest next to the outputs, the hash of each job's input (source
+bytes + processing parameters); a job whose input hash is unchanged and
+whose output still exists is skipped. The remaining jobs run in a process
+pool across all cores. Outputs are written to a temporary file and moved
+into place, so an interrupted run never leaves a half-written image, and
+sources are only ever read.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .imaging import ENCODER_VERSION, load_image
+
+MANIFEST_NAME = ".pipeline.json"
+
+
+@dataclass
+class Job:
+    src: Path
+    dst: Path
+    params: dict = field(default_factory=dict)
+
+
+@dataclass
+class Result:
+    job: Job
+    status: str  # "done", "skipped" or "failed"
+    error: str | None = None
+
+
+# -- workers (top-level so they can be pickled into the process pool) -----
+
+def resize_image(src: Path, dst: Path, max_dim: int = 1600, fmt: str = "JPEG", quality: int = 80) -> None:
+    """Shrink `src` to fit `max_dim` (upright, without metadata) and save it to `dst` as `fmt`."""
+    im, _ = load_image(src, max_dim, max_dim)
+    with im:
+        icc = {"icc_profile": im.info["icc_profile"]} if "icc_profile" in im.info else {}
+        if fmt == "PNG":
+            im.convert("RGBA").save(dst, "PNG", optimize=True, **icc)
+        else:
+            im.convert("RGB").save(dst, fmt, quality=quality, optimize=True, **icc)
+
+
+def _run_job(worker: Callable[..., None], src: Path, dst: Path, params: dict) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=".tmp-", suffix=dst.suffix)
+    os.close(fd)
+    try:
+        worker(src, Path(tmp), **params)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# -- manifest -------------------------------------------------------------
+
+def file_hash(p: Path) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Input hashes of completed jobs, keyed by output path relative to `root`."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+        try:
+            self.entries: dict[str, dict] = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            self.entries = {}
+
+    def _rel(self, dst: Path) -> str:
+        try:
+            return dst.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return dst.resolve().as_posix()
+
+    def input_hash(self, job: Job, worker_name: str) -> tuple[str, str, os.stat_result]:
+        """Hash of the source bytes and parameters; cheap when the source is untouched."""
+        st = job.src.stat()
+        old = self.entries.get(self._rel(job.dst), {})
+        if old.get("src_size") == st.st_size and old.get("src_mtime") == st.st_mtime_ns:
+            content = old.get("src_hash")
+        else:
+            content = None
+        content = content or file_hash(job.src)
+        # the encoder version too, so outputs made before an imaging change (e.g. EXIF
+        # orientation and stripping) are redone rather than kept as current
+        ident = json.dumps([worker_name, content, job.params, ENCODER_VERSION], sort_keys=True, default=str)
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest(), content, st
+
+    def is_current(self, job: Job, key: str) -> bool:
+        old = self.entries.get(self._rel(job.dst))
+        return bool(old) and old.get("input") == key and job.dst.exists()
+
+    def record(self, job: Job, key: str, content: str, st: os.stat_result) -> None:
+        self.entries[self._rel(job.dst)] = {
+            "input": key,
+            "src_hash": content,
+            "src_size": st.st_size,
+            "src_mtime": st.st_mtime_ns,
+        }
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# -- runner ---------------------------------------------------------------
+
+def run(
+    jobs: list[Job],
+    worker: Callable[..., None],
+    out_root: Path,
+    workers: int | None = None,
+    force: bool = False,
+    on_result: Callable[[Result], None] | None = None,
+) -> list[Result]:
+    """Run `worker(src, tmp_dst, **params)` for every job whose input changed.
+
+    `out_root` holds the manifest; every job's `dst` should live under it.
+    """
+    manifest = Manifest(out_root)
+    worker_name = f"{worker.__module__}.{worker.__qualname__}"
+    results: list[Result] = []
+
+    def report(r: Result) -> None:
+        results.append(r)
+        if on_result:
+            on_result(r)
+
+    pending = []
+    for job in jobs:
+        if job.src.resolve() == job.dst.resolve():
+            report(Result(job, "failed", "output would overwrite the source"))
+            continue
+        try:
+            key, content, st = manifest.input_hash(job, worker_name)
+        except OSError as e:
+            report(Result(job, "failed", str(e)))
+            continue
+        if not force and manifest.is_current(job, key):
+            report(Result(job, "skipped"))
+        else:
+            pending.append((job, key, content, st))
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                futures = {pool.submit(_run_job, worker, job.src, job.dst, job.params): (job, key, content, st)
+                           for job, key, content, st in pending}
+                for fut in as_completed(futures):
+                    job, key, content, st = futures[fut]
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        report(Result(job, "failed", str(e) or type(e).__name__))
+                        continue
+                    manifest.record(job, key, content, st)
+                    report(Result(job, "done"))
+        finally:
+            # keep what finished, so an interrupted run resumes where it stopped
+            manifest.save()
+    return results
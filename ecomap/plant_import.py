@@ -0,0 +1,138 @@
+"""Reading plant records from survey exports: CSV, JSON Lines, GeoJSON, JSON.
+
+`read_records()` yields `(where, record)` pairs one at a time so a large
+export is never held as a whole; `where` ("line 12", "feature 3") is used in
+error messages. CSV, JSON Lines and GeoJSONSeq (one feature per line) are
+read line by line. A GeoJSON FeatureCollection or a JSON array is a single
+document and is parsed in one go.
+
+GeoJSON points carry longitude/latitude; with `bounds` (west, south, east,
+north of the map image) they are converted to the x/y percentages the map
+uses. `x`/`y` properties, if present, win. A Point that would need
+converting without `bounds`, or whose coordinates are not numbers, is an
+error for the whole input (ValueError), since every feature of such an
+export would lose its position.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Iterator
+
+FORMATS = ("csv", "jsonl", "geojson", "geojsonseq", "json")
+
+EXTS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".geojson": "geojson",
+    ".geojsons": "geojsonseq",
+    ".geojsonl": "geojsonseq",
+    ".json": "json",
+}
+
+NUMERIC = ("x", "y")
+
+Bounds = tuple[float, float, float, float]
+
+
+def guess_format(path: Path) -> str | None:
+    return EXTS.get(Path(path).suffix.lower())
+
+
+def read_records(path: Path | str, fmt: str | None = None, bounds: Bounds | None = None) -> Iterator[tuple[str, dict]]:
+    """Yield (location, record) from `path` ("-" for stdin).
+
+    Raises ValueError for input that cannot be read at all (unknown format,
+    broken JSON on a line); per-record problems are left to validation.
+    """
+    fmt = fmt or guess_format(Path(path))
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown input format for {path} (use one of: {', '.join(FORMATS)})")
+    if str(path) == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+    else:
+        f = open(path, encoding="utf-8-sig", newline="")
+    with f:
+        if fmt == "csv":
+            yield from _read_csv(f)
+        elif fmt in ("jsonl", "geojsonseq"):
+            for where, obj in _read_lines(f):
+                yield where, _from_feature(obj, bounds, where) if fmt == "geojsonseq" else obj
+        elif fmt == "geojson":
+            doc = _load(f)
+            features = doc.get("features") if isinstance(doc, dict) else None
+            if not isinstance(features, list):
+                raise ValueError(f"{path}: not a GeoJSON FeatureCollection")
+            for n, feat in enumerate(features, 1):
+                yield f"feature {n}", _from_feature(feat, bounds, f"feature {n}")
+        else:
+            doc = _load(f)
+            if not isinstance(doc, list):
+                raise ValueError(f"{path}: top level must be a list")
+            for n, rec in enumerate(doc, 1):
+                yield f"item {n}", rec
+
+
+def _load(f):
+    try:
+        return json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from None
+
+
+def _read_lines(f) -> Iterator[tuple[str, object]]:
+    for n, line in enumerate(f, 1):
+        line = line.strip().lstrip("\x1e")  # RS separator of GeoJSON text sequences
+        if not line:
+            continue
+        try:
+            yield f"line {n}", json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {n}: invalid JSON: {e}") from None
+
+
+def _read_csv(f) -> Iterator[tuple[str, dict]]:
+    reader = csv.DictReader(f)
+    for row in reader:
+        rec = {}
+        for k, v in row.items():
+            if k is None or v is None:
+                continue
+            k, v = k.strip(), v.strip()
+            # empty cells are left out so an upsert keeps the stored value
+            if not k or v == "":
+                continue
+            rec[k] = _number(v) if k in NUMERIC else v
+        yield f"line {reader.line_num}", rec
+
+
+def _number(v: str):
+    try:
+        return float(v)
+    except ValueError:
+        return v  # reported by validation
+
+
+def _from_feature(feat, bounds: Bounds | None, where: str):
+    if not isinstance(feat, dict) or feat.get("type") != "Feature":
+        return feat  # reported by validation
+    rec = dict(feat.get("properties") or {})
+    if "id" not in rec and feat.get("id") is not None:
+        rec["id"] = str(feat["id"])
+    geom = feat.get("geometry") or {}
+    if isinstance(geom, dict) and geom.get("type") == "Point" and not ("x" in rec and "y" in rec):
+        if not bounds:
+            raise ValueError(f"{where}: Point coordinates need the map bounds (west,south,east,north) to become x/y")
+        coords = geom.get("coordinates")
+        if (not isinstance(coords, list) or len(coords) < 2
+                or not all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in coords[:2])):
+            raise ValueError(f"{where}: Point coordinates must be [longitude, latitude], got {coords!r}")
+        lon, lat = coords[:2]
+        west, south, east, north = bounds
+        rec["x"] = round((lon - west) / (east - west) * 100, 2)
+        rec["y"] = round((north - lat) / (north - south) * 100, 2)
+    return rec
@@ -0,0 +1,284 @@
+"""Plant catalogue store: SQLite with an id index, exported to plants.json.
+
+data/plants.json stays the file people edit and commit; data/plants.db is a
+derived index next to it. Whenever plants.json changes on disk (by hand, by
+git) it is re-imported, and edits made through the store update single rows
+and are written back to plants.json by `export_json()`.
+
+`snapshot()` is the single loader: it returns the ordered records plus an
+id -> record index, and is only rebuilt when one of the two files changed.
+Reading needs no write access: if plants.db cannot be created or updated
+(a read-only deploy), it parses plants.json directly instead.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+log = logging.getLogger("ecomap.plants")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plants (id TEXT PRIMARY KEY, pos INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS plants_pos ON plants (pos);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    plants: list[dict]
+    by_id: dict[str, dict]
+
+
+def _file_sig(p: Path) -> str | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class PlantStore:
+    def __init__(self, json_path: Path, db_path: Path | None = None):
+        self.json_path = Path(json_path)
+        self.db_path = Path(db_path) if db_path else self.json_path.with_suffix(".db")
+        self._lock = threading.Lock()
+        self._snap: Snapshot | None = None
+        self._snap_sig: tuple | None = None
+        self._json_sig: str | None = None  # plants.json as last imported/exported here
+        self._db_failed = False
+
+    # -- reading ----------------------------------------------------------
+
+    def snapshot(self) -> Snapshot:
+        """Ordered records and id index; cached until either file changes."""
+        with self._lock:
+            try:
+                self._sync_from_json()
+                sig = (_file_sig(self.db_path), _file_sig(self.json_path))
+                if self._snap is None or sig != self._snap_sig:
+                    with self._connect() as db:
+                        rows = db.execute("SELECT data FROM plants ORDER BY pos").fetchall()
+                    plants = [json.loads(r[0]) for r in rows]
+                    self._snap = Snapshot(plants, {p["id"]: p for p in plants})
+                    self._snap_sig = sig
+            except (sqlite3.Error, OSError) as e:
+                return self._snapshot_from_json(e)
+            self._db_failed = False
+            return self._snap
+
+    def all(self) -> list[dict]:
+        return self.snapshot().plants
+
+    def get(self, pid: str) -> dict | None:
+        return self.snapshot().by_id.get(pid)
+
+    # -- writing ----------------------------------------------------------
+
+    def upsert(self, records: list[dict], merge: bool = False) -> int:
+        """Insert or update `records` by id; new ids go to the end. Returns rows changed.
+
+        With `merge`, fields missing from a record keep their stored values.
+        All records are written in one transaction.
+        """
+        with self._lock:
+            self._sync_from_json()
+            with self._connect() as db:
+                changed = self._upsert(db, records, merge=merge)
+            return changed
+
+    def delete(self, ids: list[str]) -> int:
+        with self._lock:
+            self._sync_from_json()
+            with self._connect() as db:
+                return db.executemany("DELETE FROM plants WHERE id = ?", [(i,) for i in ids]).rowcount
+
+    def replace_all(self, records: list[dict]) -> tuple[int, int]:
+        """Make the catalogue exactly `records`, touching only rows that differ.
+
+        Returns (rows written, rows deleted).
+        """
+        with self._lock:
+            self._sync_from_json()
+            with self._connect() as db:
+                keep = {r["id"] for r in records}
+                gone = [i for (i,) in db.execute("SELECT id FROM plants") if i not in keep]
+                db.executemany("DELETE FROM plants WHERE id = ?", [(i,) for i in gone])
+                written = self._upsert(db, records, positions=True)
+            return written, len(gone)
+
+    def export_json(self) -> Path:
+        """Write the catalogue to plants.json (atomically) and mark it as in sync."""
+        with self._lock:
+            with self._connect() as db:
+                rows = db.execute("SELECT data FROM plants ORDER BY pos").fetchall()
+                plants = [json.loads(r[0]) for r in rows]
+                self.json_path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.json_path.parent, prefix=".tmp-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(plants, ensure_ascii=False, indent=2))
+                os.replace(tmp, self.json_path)
+                self._json_sig = _file_sig(self.json_path)
+                self._set_meta(db, "json_sig", self._json_sig)
+            return self.json_path
+
+    # -- internals --------------------------------------------------------
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits (or rolls back) and closes on exit."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.executescript(SCHEMA)
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _snapshot_from_json(self, error: Exception) -> Snapshot:
+        """The snapshot straight from plants.json, for when plants.db is not usable."""
+        if not self._db_failed:
+            log.warning("%s cannot be used (%s), reading %s directly", self.db_path, error, self.json_path)
+            self._db_failed = True
+        sig = (None, _file_sig(self.json_path))
+        if self._snap is not None and sig == self._snap_sig:
+            return self._snap
+        try:
+            records = self._read_json() if sig[1] else []
+        except ValueError as e:
+            if self._snap is None:
+                raise
+            log.error("%s is not valid, keeping the previous catalogue: %s", self.json_path, e)
+            self._snap_sig = sig
+            return self._snap
+        # same result as the import: the last entry of an id wins, at its position
+        by_id: dict[str, dict] = {}
+        for rec in records:
+            by_id.pop(rec["id"], None)
+            by_id[rec["id"]] = rec
+        self._snap = Snapshot(list(by_id.values()), by_id)
+        self._snap_sig = sig
+        return self._snap
+
+    def _read_json(self) -> list[dict]:
+        """The usable records of plants.json (ValueError if it is not a JSON list)."""
+        plants = json.loads(self.json_path.read_text(encoding="utf-8"))
+        if not isinstance(plants, list):
+            raise ValueError("top level must be a list")
+        records = [p for p in plants if isinstance(p, dict) and isinstance(p.get("id"), str) and p["id"]]
+        if len(records) != len(plants):
+            log.warning("%s: %d entries without a (string) id are not shown", self.json_path, len(plants) - len(records))
+        if len({r["id"] for r in records}) != len(records):
+            seen, dups = set(), set()
+            for r in records:
+                (dups if r["id"] in seen else seen).add(r["id"])
+            log.warning("%s: duplicate ids, only the last entry of each is shown: %s",
+                        self.json_path, ", ".join(sorted(dups)))
+        return records
+
+    @staticmethod
+    def _set_meta(db: sqlite3.Connection, key: str, value) -> None:
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _upsert(self, db: sqlite3.Connection, records: list[dict], positions: bool = False, merge: bool = False) -> int:
+        if positions:
+            existing = {i: (pos, data) for i, pos, data in db.execute("SELECT id, pos, data FROM plants")}
+        else:
+            # partial update: only look at the rows being written
+            existing = {}
+            for rec in records:
+                row = db.execute("SELECT pos, data FROM plants WHERE id = ?", (rec.get("id"),)).fetchone()
+                if row:
+                    existing[rec["id"]] = tuple(row)
+        next_pos = (db.execute("SELECT MAX(pos) FROM plants").fetchone()[0] or 0) + 1
+        rows = []
+        for n, rec in enumerate(records):
+            pid = rec.get("id")
+            if not pid:
+                raise ValueError(f"plant without id: {rec!r}")
+            old = existing.get(pid)
+            if merge and old:
+                rec = {**json.loads(old[1]), **rec}
+            data = json.dumps(rec, ensure_ascii=False)
+            if positions:
+                pos = n
+            elif old:
+                pos = old[0]
+            else:
+                pos, next_pos = next_pos, next_pos + 1
+            if old != (pos, data):
+                rows.append((pid, pos, data))
+        db.executemany("INSERT OR REPLACE INTO plants (id, pos, data) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def _sync_from_json(self) -> None:
+        """Re-import plants.json if it changed since the last import/export."""
+        sig = _file_sig(self.json_path)
+        if sig is None or sig == self._json_sig:
+            return
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'json_sig'").fetchone()
+            if row and json.loads(row[0]) == sig:
+                self._json_sig = sig
+                return
+            try:
+                records = self._read_json()
+            except ValueError as e:
+                if row is None:
+                    raise
+                # keep serving the last good import; retried when the file changes again
+                self._json_sig = sig
+                log.error("%s is not valid, keeping the previous catalogue: %s", self.json_path, e)
+                return
+            keep = {r["id"] for r in records}
+            gone = [i for (i,) in db.execute("SELECT id FROM plants") if i not in keep]
+            db.executemany("DELETE FROM plants WHERE id = ?", [(i,) for i in gone])
+            self._upsert(db, records, positions=True)
+            self._set_meta(db, "json_sig", sig)
+        self._json_sig = sig
+
+
+def validate_plant(rec, root: Path | None = None, map_ids: set[str] | None = None, require_xy: bool = True) -> list[str]:
+    """Problems with one plant record (empty if it is fine).
+
+    Checks the id, x/y as percentages of the map (required unless
+    `require_xy` is False, e.g. for a merge into a stored record that has
+    them), and, when given, that a local photo exists under `root` (via
+    ecomap.photos.resolve_photo) and that the "map" field names one of `map_ids`.
+    """
+    if not isinstance(rec, dict):
+        return ["not an object"]
+    errors = []
+    pid = rec.get("id")
+    if not isinstance(pid, str) or not pid.strip():
+        errors.append("missing id")
+    for k in ("x", "y"):
+        if k not in rec:
+            if require_xy:
+                errors.append(f"missing {k}")
+            continue
+        v = rec[k]
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            errors.append(f"{k} is not a number: {v!r}")
+        elif not 0 <= v <= 100:
+            errors.append(f"{k} out of range 0-100: {v}")
+    if map_ids is not None and rec.get("map") and rec["map"] not in map_ids:
+        errors.append(f"unknown map: {rec['map']}")
+    photo = rec.get("photo") or ""
+    if not isinstance(photo, str):
+        errors.append("photo is not a string")
+    elif (photo := photo.strip()) and root is not None and not photo.startswith(("http://", "https://", "data:")):
+        from .photos import resolve_photo
+
+        if resolve_photo(root, photo) is None:
+            errors.append(f"photo not found: {photo}")
+    return errors
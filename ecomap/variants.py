@@ -0,0 +1,79 @@
+"""Responsive image variants: several widths x (AVIF, WebP, JPEG).
+
+Variants are published into an AssetStore under content-hashed names, and
+described by a manifest entry the viewer turns into <picture>/srcset:
+
+    {"source": "photo/Rose/Rose-1.JPG", "width": 4032, "height": 3024,
+     "w": [400, 800, 1600],
+     "t": {"image/avif": [name, name, name], "image/webp": [...], "image/jpeg": [...]}}
+
+The lists in "t" are parallel to "w".
+"""
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, features
+
+from .asset_server import AssetStore
+from .imaging import image_size, load_image
+
+WIDTHS = (400, 800, 1600)
+
+# (mime, Pillow format, save options); ordered from most to least preferred,
+# which is also the order of the <source> elements
+FORMATS = (
+    ("image/avif", "AVIF", {"quality": 55}),
+    ("image/webp", "WEBP", {"quality": 78, "method": 6}),
+    ("image/jpeg", "JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+)
+
+
+def available_formats() -> list[tuple[str, str, dict]]:
+    """FORMATS minus the ones this Pillow build cannot encode (AVIF is optional)."""
+    out = []
+    for mime, fmt, opts in FORMATS:
+        if fmt == "AVIF" and not features.check("avif"):
+            continue
+        if fmt == "WEBP" and not features.check("webp"):
+            continue
+        out.append((mime, fmt, opts))
+    return out
+
+
+def variant_widths(width: int, widths=WIDTHS) -> list[int]:
+    """Target widths for a source `width` px wide; never upscales."""
+    out = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    return out
+
+
+def build_variants(src: Path, store: AssetStore, root: Path, widths=WIDTHS, formats=None) -> dict:
+    """Encode every (width, format) variant of `src` and return its manifest entry."""
+    formats = formats or available_formats()
+    w, h = image_size(src)
+    targets = variant_widths(w, widths)
+    # decoded only as large as the biggest variant (see ecomap.imaging)
+    im, _ = load_image(src, max(targets))
+    with im:
+        im = im.convert("RGB")
+        entry = {
+            "source": src.relative_to(root).as_posix() if src.is_relative_to(root) else src.as_posix(),
+            "width": w,
+            "height": h,
+            "w": targets,
+            "t": {mime: [] for mime, _, _ in formats},
+        }
+        # largest first, each smaller size derived from the previous one
+        scaled = {}
+        cur = im
+        for tw in reversed(targets):
+            if tw < cur.width:
+                cur = cur.resize((tw, max(1, round(h * tw / w))), Image.LANCZOS, reducing_gap=3.0)
+            scaled[tw] = cur
+        for tw in targets:
+            for mime, fmt, opts in formats:
+                buf = BytesIO()
+                scaled[tw].save(buf, format=fmt, **opts)
+                entry["t"][mime].append(store.publish(buf.getvalue(), mime))
+    return entry
@@ -0,0 +1,643 @@
+"""The map viewer page shared by streamlit_app.py and scripts/build_site.py.
+
+`render()` fills the template with one map's plants and asset URLs. Callers
+decide where images live (data URLs, the asset server, or static files).
+Other maps are listed with the URL of their `map_payload()` JSON, which the
+viewer fetches when one is picked and swaps in without reloading the page.
+"""
+from __future__ import annotations
+
+import html as html_lib
+import json
+
+from .offline import REGISTER
+
+# the map fills the area next to the 360px sidebar, or the full width on phones
+MAP_SIZES = "(max-width: 900px) 100vw, calc(100vw - 400px)"
+
+
+def tiles_config(info: dict, base: str) -> dict:
+    """Viewer settings for a tiles.json written by scripts/make_tiles.py, served under `base`."""
+    return {
+        "base": base,
+        "width": info["width"],
+        "height": info["height"],
+        "tileSize": info["tile_size"],
+        "levels": info["levels"],
+        "format": info.get("format", "jpg"),
+    }
+
+
+def map_picture(map_variants: dict | None, variant_base: str | None) -> tuple[str, str]:
+    """<source> elements and the <img> srcset/sizes attributes for the map's variants."""
+    sources, srcset_attr = "", ""
+    if not map_variants or variant_base is None:
+        return sources, srcset_attr
+
+    def srcset(names):
+        return html_lib.escape(", ".join(f"{variant_base}{n} {w}w" for n, w in zip(names, map_variants["w"])))
+
+    for mime, names in map_variants["t"].items():
+        if mime == "image/jpeg":
+            srcset_attr = f'srcset="{srcset(names)}" sizes="{MAP_SIZES}"'
+        else:
+            sources += f'<source type="{mime}" srcset="{srcset(names)}" sizes="{MAP_SIZES}">'
+    return sources, srcset_attr
+
+
+def map_payload(
+    map_id: str,
+    plants: list[dict],
+    photo_map: dict,
+    map_url: str | None,
+    map_variants: dict | None = None,
+    map_tiles: dict | None = None,
+) -> dict:
+    """Everything the viewer needs to switch to a map in place."""
+    return {
+        "id": map_id,
+        "plants": plants,
+        "photos": photo_map,
+        "map": map_url,
+        "variants": map_variants,
+        "tiles": map_tiles,
+    }
+
+
+def render(
+    plants: list[dict],
+    photo_map: dict,
+    map_url: str | None,
+    photo_base: str | None = None,
+    map_variants: dict | None = None,
+    variant_base: str | None = None,
+    map_tiles: dict | None = None,
+    compact: bool = False,
+    maps: list[dict] | None = None,
+    map_id: str | None = None,
+    offline: bool = False,
+) -> str:
+    """The viewer page; `compact` drops whitespace from the embedded JSON.
+
+    `maps` ({id, title, url} for every map, `map_id` being the one shown) adds
+    a map picker; it is left out unless there are several maps with URLs.
+    `offline` registers the static site's service worker (see ecomap.offline).
+    """
+    def js(value) -> str:
+        if compact:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(value, ensure_ascii=False)
+
+    map_sources, map_srcset = map_picture(map_variants, variant_base)
+    return (
+        TEMPLATE.replace("{{PLANTS}}", js(plants))
+        .replace("{{PHOTOMAP}}", js(photo_map))
+        .replace("{{PHOTOBASE}}", js(photo_base))
+        .replace("{{MAPDATA}}", js(map_url))
+        .replace("{{MAPSOURCES}}", map_sources)
+        .replace("{{MAPSRCSET}}", map_srcset)
+        .replace("{{VARIANTBASE}}", js(variant_base))
+        .replace("{{MAPTILES}}", js(map_tiles))
+        .replace("{{MAPS}}", js(maps or []))
+        .replace("{{MAPID}}", js(map_id))
+        .replace("{{MAPSIZES}}", js(MAP_SIZES))
+        .replace("{{OFFLINE}}", REGISTER if offline else "")
+    )
+
+
+TEMPLATE = """<!doctype html>
+<html lang="ko">
+<head>
+<meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width,initial-scale=1"/>
+<style>
+html,body{height:100%;margin:0;font-family:system-ui,-apple-system,'Segoe UI',Roboto,'Noto Sans KR',sans-serif}
+.container{display:flex;gap:12px;height:100vh;padding:12px;box-sizing:border-box;background:#f6f7f8}
+.map-area{flex:1;position:relative;display:flex;align-items:flex-start;justify-content:center;overflow:hidden;background:#e9eef0;border-radius:6px;padding:8px 8px 20px 8px} /* 상단으로 올리도록 align-items:flex-start 및 하단 여유 */
+.viewport{position:relative;touch-action:none;cursor:grab;display:inline-block}
+.map-pic{display:block}
+.map-img{display:block;width:100%;height:auto;user-select:none;pointer-events:none}
+.tile-layer{position:absolute;left:0;top:0;width:100%;height:100%;overflow:hidden;pointer-events:none}
+.tile-layer img{position:absolute;display:block;user-select:none}
+/* 마커 크기를 원래(더 크게) 복원 */
+.marker-layer{position:absolute;left:0;top:0;width:100%;height:100%;pointer-events:none}
+/* --mz = 1/zoom keeps markers the same size on screen at every zoom */
+.marker{position:absolute;transform-origin:50% 100%;transform:translate(-50%,-100%) scale(var(--mz,1));width:28px;height:28px;border-radius:50%;background:rgba(34,139,34,0.95);border:2px solid #fff;box-shadow:0 2px 8px rgba(0,0,0,0.28);display:flex;align-items:center;justify-content:center;color:#fff;font-weight:800;font-size:13px;cursor:pointer;pointer-events:auto}
+.marker:after{content:'';position:absolute;left:50%;bottom:-8px;transform:translateX(-50%);width:3px;height:8px;background:rgba(34,139,34,0.95)}
+.marker.cluster{width:auto;min-width:28px;padding:0 6px;box-sizing:border-box;border-radius:14px;background:rgba(20,100,160,0.95)}
+.marker.cluster:after{background:rgba(20,100,160,0.95)}
+.sidebar{width:360px;min-width:260px;background:#fff;border-radius:6px;padding:12px;box-shadow:0 6px 18px rgba(0,0,0,0.08);overflow:auto}
+.sidebar h2{margin:0 0 8px 0;font-size:18px}
+.sidebar select{width:100%;padding:8px;margin-bottom:8px;border-radius:6px;border:1px solid #ddd;font-size:14px}
+.sidebar img{width:100%;height:auto;border-radius:6px;margin-top:8px}
+.sidebar input[type=search]{width:100%;box-sizing:border-box;padding:8px;margin-bottom:4px;border-radius:6px;border:1px solid #ddd;font-size:14px}
+.search-results{list-style:none;margin:0 0 8px 0;padding:0;border-radius:6px;border:1px solid #eee}
+.search-results:empty{display:none}
+.search-results button{display:block;width:100%;text-align:left;padding:6px 8px;border:0;border-bottom:1px solid #f0f0f0;background:#fff;cursor:pointer;font-size:14px}
+.search-results button:hover,.search-results button:focus{background:#eef6ee}
+.search-results small{color:#888;margin-left:6px}
+.controls{display:flex;gap:8px;margin-top:10px;align-items:center}
+.btn{padding:8px;border-radius:6px;border:1px solid #ccc;background:#f8f8f8;cursor:pointer;font-size:13px}
+.zoom-controls{display:flex;gap:6px;margin-left:auto}
+.zoom-controls button{width:36px;height:36px;border-radius:6px;border:1px solid #ccc;background:#fff;cursor:pointer}
+.hint{color:#666;font-size:13px}
+@media(max-width:900px){.container{flex-direction:column}.sidebar{width:100%;min-width:auto}}
+</style>
+</head>
+<body>
+<div class="container">
+  <div class="map-area" id="mapArea">
+    <div id="viewport" class="viewport" style="transform-origin:0 0;transform:translate(0px,0px) scale(1);">
+      <picture class="map-pic">{{MAPSOURCES}}<img id="mapImg" class="map-img" src={{MAPDATA}} {{MAPSRCSET}} alt="학교 지도"/></picture>
+    </div>
+  </div>
+  <aside class="sidebar" id="panel">
+    <select id="mapSelect" aria-label="지도 선택" hidden></select>
+    <h2>식물 정보</h2>
+    <input id="plantSearch" type="search" placeholder="이름, 초성(ㄲㄷㅈ), 설명으로 찾기" autocomplete="off"/>
+    <ul id="searchResults" class="search-results"></ul>
+    <select id="plantSelect"><option value="">-- 식물 선택 --</option></select>
+    <div id="details"><p class="hint">마커를 클릭하거나 목록에서 선택하세요.</p></div>
+    <div class="controls">
+      <div class="zoom-controls"><button id="zoomOut">-</button><button id="zoomIn">+</button><button id="zoomReset">◯</button></div>
+      <div style="flex:1"></div>
+    </div>
+    <div style="height:8px"></div>
+    <div class="controls"><button id="backBtn" class="btn" disabled>돌아가기</button><button id="clearBtn" class="btn">닫기</button></div>
+  </aside>
+</div>
+
+<script>
+let plants = {{PLANTS}};
+let photoMap = {{PHOTOMAP}};
+// id -> plant and id -> position, so lookups don't scan the whole list
+const plantsById = new Map(), plantIndex = new Map();
+function indexPlants(){
+  plantsById.clear(); plantIndex.clear();
+  plants.forEach((p,i)=>{ plantsById.set(p.id, p); plantIndex.set(p.id, i); });
+}
+indexPlants();
+const photoBase = {{PHOTOBASE}};
+let mapTiles = {{MAPTILES}};
+const variantBase = {{VARIANTBASE}};
+// every map as {id, title, url}; url serves that map's payload as JSON
+const maps = {{MAPS}};
+let mapId = {{MAPID}};
+const viewport = document.getElementById('viewport'), mapImg = document.getElementById('mapImg'), mapArea = document.getElementById('mapArea');
+const details = document.getElementById('details'), sel = document.getElementById('plantSelect'), backBtn = document.getElementById('backBtn'), clearBtn = document.getElementById('clearBtn');
+const zoomInBtn = document.getElementById('zoomIn'), zoomOutBtn = document.getElementById('zoomOut'), zoomResetBtn = document.getElementById('zoomReset');
+let zoom = 1, tx = 0, ty = 0, isDragging = false, dragStart = null, pinch = null, history = [];
+
+// layout sizes, cached so input handlers and the render loop never force a
+// synchronous layout; refreshed by ResizeObserver (and on scroll for the offset)
+let areaW = 0, areaH = 0, areaLeft = 0, areaTop = 0, imgCW = 0, imgCH = 0;
+function measure(){
+  const r = mapArea.getBoundingClientRect();
+  areaW = r.width; areaH = r.height; areaLeft = r.left; areaTop = r.top;
+  imgCW = mapImg.clientWidth; imgCH = mapImg.clientHeight;
+}
+
+function esc(s){return String(s||'').replace(/[&<>"']/g,function(m){return {'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m];});}
+
+// clamp pan so image cannot be dragged completely out of view
+function clampPan(){
+  const imgW = imgCW * zoom;
+  const imgH = imgCH * zoom;
+  if(imgW <= areaW){
+    tx = Math.round((areaW - imgW)/2);
+  } else {
+    const minTx = areaW - imgW;
+    tx = Math.min(0, Math.max(minTx, tx));
+  }
+  if(imgH <= areaH){
+    ty = Math.round((areaH - imgH)/2);
+  } else {
+    const minTy = areaH - imgH;
+    ty = Math.min(0, Math.max(minTy, ty));
+  }
+}
+
+// input handlers only update zoom/tx/ty and call setTransform(); the DOM is
+// written once per animation frame, however many events arrived in between
+let frame = 0;
+function setTransform(){ if(!frame) frame = requestAnimationFrame(render); }
+function render(){
+  frame = 0;
+  clampPan();
+  viewport.style.transform = 'translate('+tx+'px,'+ty+'px) scale('+zoom+')';
+  viewport.style.setProperty('--mz', 1/zoom);
+  updateTiles(); updateMarkers();
+}
+
+// deep-zoom tiles: requested only once the zoom exceeds the base image's
+// resolution, and only for the part of the map that is on screen
+const tileLayer = document.createElement('div');
+tileLayer.className = 'tile-layer';
+const tileEls = new Map();
+let tileLevel = -1;
+function levelSize(level){
+  const s = Math.pow(2, mapTiles.levels - 1 - level);
+  return [Math.ceil(mapTiles.width / s), Math.ceil(mapTiles.height / s)];
+}
+function clearTiles(){ tileEls.forEach(el=>el.remove()); tileEls.clear(); tileLevel = -1; }
+function updateTiles(){
+  if(!mapTiles || !imgCW) return;
+  const shownW = imgCW * zoom * (window.devicePixelRatio || 1);
+  let level = 0;
+  while(level < mapTiles.levels - 1 && levelSize(level)[0] < shownW) level++;
+  const [lw, lh] = levelSize(level);
+  if(lw <= mapImg.naturalWidth){ clearTiles(); return; }
+  if(level !== tileLevel){ clearTiles(); tileLevel = level; }
+  const imgW = imgCW * zoom, imgH = imgCH * zoom;
+  const ts = mapTiles.tileSize;
+  const cols = Math.ceil(lw / ts), rows = Math.ceil(lh / ts);
+  // visible part of the image in 0..1 coordinates, plus one tile of margin
+  const c0 = Math.max(0, Math.floor(Math.max(0, -tx / imgW) * lw / ts) - 1);
+  const c1 = Math.min(cols - 1, Math.floor(Math.min(1, (areaW - tx) / imgW) * lw / ts) + 1);
+  const r0 = Math.max(0, Math.floor(Math.max(0, -ty / imgH) * lh / ts) - 1);
+  const r1 = Math.min(rows - 1, Math.floor(Math.min(1, (areaH - ty) / imgH) * lh / ts) + 1);
+  const want = new Set();
+  for(let r = r0; r <= r1; r++){
+    for(let c = c0; c <= c1; c++){
+      const key = level + '/' + c + '_' + r;
+      want.add(key);
+      if(tileEls.has(key)) continue;
+      const t = document.createElement('img');
+      t.alt = ''; t.decoding = 'async';
+      t.style.left = (c * ts / lw * 100) + '%';
+      t.style.top = (r * ts / lh * 100) + '%';
+      t.style.width = (Math.min(ts, lw - c * ts) / lw * 100) + '%';
+      t.style.height = (Math.min(ts, lh - r * ts) / lh * 100) + '%';
+      t.src = mapTiles.base + key + '.' + mapTiles.format;
+      tileLayer.appendChild(t);
+      tileEls.set(key, t);
+    }
+  }
+  // drop off-screen tiles so the DOM stays small (they come back from the HTTP cache)
+  tileEls.forEach((el, key)=>{ if(!want.has(key)){ el.remove(); tileEls.delete(key); } });
+}
+function maxZoom(){ return mapTiles ? Math.max(4, mapTiles.width / Math.max(1, imgCW)) : 4; }
+
+function zoomTo(factor, cx=null, cy=null){
+  const old = zoom;
+  let newZoom = zoom * factor;
+  newZoom = Math.max(0.5, Math.min(maxZoom(), newZoom));
+  const f = newZoom / old;
+  zoom = newZoom;
+  if(cx===null||cy===null){cx = areaW/2; cy = areaH/2;}
+  const localX = cx - tx;
+  const localY = cy - ty;
+  tx = cx - localX * f;
+  ty = cy - localY * f;
+  clampPan(); setTransform();
+}
+
+zoomInBtn.addEventListener('click', ()=>{ zoomTo(1.25); });
+zoomOutBtn.addEventListener('click', ()=>{ zoomTo(0.8); });
+zoomResetBtn.addEventListener('click', ()=>{ zoom=1; tx=0; ty=0; setTransform(); });
+
+function populateSelect(){
+  sel.innerHTML = '<option value="">-- 식물 선택 --</option>';
+  plants.forEach(p=>{ const opt = document.createElement('option'); opt.value = p.id; opt.textContent = p.name || p.id; sel.appendChild(opt); });
+}
+
+function createMarker(p){
+  const m = document.createElement('button');
+  m.className = 'marker';
+  m.type = 'button';
+  m.title = p.name;
+  m.dataset.id = p.id;
+  m.style.left = p.x + '%';
+  m.style.top = p.y + '%';
+  m.textContent = p.label || '●';
+  m.addEventListener('click', e => { e.stopPropagation(); toggleShow(p); });
+  m.addEventListener('mouseenter', () => prefetchPhoto(p));
+  m.addEventListener('focus', () => prefetchPhoto(p));
+  return m;
+}
+
+// markers: a grid index over the plants' x/y (in %) per level, level k having
+// 2^k cells per side. Only cells on screen get DOM nodes; with many plants,
+// a cell holding several of them becomes one cluster bubble until zoomed in.
+const MAX_LEVEL = 8, CLUSTER_PX = 48, CLUSTER_MIN = 100;
+let clustering = plants.length >= CLUSTER_MIN;
+const markerLayer = document.createElement('div');
+markerLayer.className = 'marker-layer';
+const markerEls = new Map(), gridCache = [];
+function grid(level){
+  if(gridCache[level]) return gridCache[level];
+  const n = 1 << level, cells = new Map();
+  plants.forEach(p=>{
+    const x = Math.min(99.999, Math.max(0, +p.x || 0)), y = Math.min(99.999, Math.max(0, +p.y || 0));
+    const cx = Math.floor(x / 100 * n), cy = Math.floor(y / 100 * n), key = cy * n + cx;
+    let c = cells.get(key);
+    if(!c){ c = {cx:cx, cy:cy, sx:0, sy:0, items:[]}; cells.set(key, c); }
+    c.sx += x; c.sy += y; c.items.push(p);
+  });
+  return gridCache[level] = cells;
+}
+function createCluster(c){
+  const m = document.createElement('button');
+  m.className = 'marker cluster';
+  m.type = 'button';
+  const x = c.sx / c.items.length, y = c.sy / c.items.length;
+  m.style.left = x + '%';
+  m.style.top = y + '%';
+  m.textContent = c.items.length;
+  m.title = c.items.slice(0, 5).map(p=>p.name).join(', ') + (c.items.length > 5 ? ' …' : '');
+  m.addEventListener('click', e => {
+    e.stopPropagation();
+    const imgW = imgCW * zoom, imgH = imgCH * zoom;
+    zoomTo(2, tx + x / 100 * imgW, ty + y / 100 * imgH);
+  });
+  return m;
+}
+function updateMarkers(){
+  if(!imgCW) return;
+  const imgW = imgCW * zoom, imgH = imgCH * zoom;
+  // finest level whose cells are still at least CLUSTER_PX wide on screen
+  const level = clustering ? Math.max(0, Math.min(MAX_LEVEL, Math.floor(Math.log2(imgW / CLUSTER_PX)))) : MAX_LEVEL;
+  const n = 1 << level, cells = grid(level);
+  // visible cells, plus one cell of margin so markers don't pop in at the edge
+  const c0 = Math.max(0, Math.floor(-tx / imgW * n) - 1), c1 = Math.min(n - 1, Math.floor((areaW - tx) / imgW * n) + 1);
+  const r0 = Math.max(0, Math.floor(-ty / imgH * n) - 1), r1 = Math.min(n - 1, Math.floor((areaH - ty) / imgH * n) + 1);
+  const want = new Set();
+  const show = (key, make) => { want.add(key); if(!markerEls.has(key)){ const m = make(); markerLayer.appendChild(m); markerEls.set(key, m); } };
+  const visit = c => {
+    if(clustering && c.items.length > 1 && level < MAX_LEVEL) show('c' + level + ':' + c.cx + '_' + c.cy, () => createCluster(c));
+    else c.items.forEach(p => show('p:' + p.id, () => createMarker(p)));
+  };
+  if((c1 - c0 + 1) * (r1 - r0 + 1) > cells.size) cells.forEach(c => { if(c.cx >= c0 && c.cx <= c1 && c.cy >= r0 && c.cy <= r1) visit(c); });
+  else for(let r = r0; r <= r1; r++) for(let c = c0; c <= c1; c++){ const cell = cells.get(r * n + c); if(cell) visit(cell); }
+  markerEls.forEach((el, key)=>{ if(!want.has(key)){ el.remove(); markerEls.delete(key); } });
+}
+
+function toggleShow(p){
+  const cur = details.dataset.current || '';
+  if(cur === p.id){
+    // same marker clicked again -> hide
+    clearDetails();
+  } else {
+    showPlant(p, true);
+  }
+}
+
+mapImg.onload = function(){
+  populateSelect();
+  const mapEl = mapImg.parentElement.tagName === 'PICTURE' ? mapImg.parentElement : mapImg;
+  if(viewport.firstChild !== mapEl) viewport.insertBefore(mapEl, viewport.firstChild);
+  if(mapTiles) mapEl.after(tileLayer);
+  viewport.appendChild(markerLayer);
+  measure(); setTransform();
+};
+if(mapImg.complete) mapImg.onload();
+
+// photos are only requested when a plant is shown (or about to be)
+// photoMap values are a URL, or {w: widths, t: {mime: names}} for built variants
+const PHOTO_SIZES = '(max-width: 900px) 100vw, 340px';
+function photoUrl(p){
+  const v = photoMap[p.id];
+  if(typeof v === 'string') return v;
+  if(v) return variantBase + v.t['image/jpeg'][Math.min(1, v.w.length-1)];
+  if(photoBase && p.photo) return photoBase + encodeURIComponent(p.id);
+  return p.photo || '';
+}
+function photoTag(p){
+  const v = photoMap[p.id];
+  const alt = esc(p.name)+' 사진';
+  if(v && typeof v === 'object'){
+    const srcset = names => esc(names.map((n,i)=>variantBase+n+' '+v.w[i]+'w').join(', '));
+    let html = '<picture>';
+    Object.keys(v.t).forEach(t=>{ if(t !== 'image/jpeg') html += '<source type="'+t+'" srcset="'+srcset(v.t[t])+'" sizes="'+PHOTO_SIZES+'">'; });
+    return html + '<img src="'+esc(photoUrl(p))+'" srcset="'+srcset(v.t['image/jpeg'])+'" sizes="'+PHOTO_SIZES+'" decoding="async" alt="'+alt+'" onerror="this.style.display=\\'none\\'"></picture>';
+  }
+  const pm = photoUrl(p);
+  return (pm && pm.length>0) ? ('<img src="'+esc(pm)+'" decoding="async" alt="'+alt+'" onerror="this.style.display=\\'none\\'">') : '';
+}
+const prefetched = new Set();
+function prefetchPhoto(p){
+  const url = p && photoUrl(p);
+  if(!url || prefetched.has(url) || url.startsWith('data:')) return;
+  prefetched.add(url);
+  // a detached element still loads its images, and <picture> picks the same
+  // format/width the details panel will
+  const d = document.createElement('div'); d.innerHTML = photoTag(p);
+}
+function prefetchNeighbours(p){
+  const i = plantIndex.get(p.id);
+  if(i === undefined) return;
+  prefetchPhoto(plants[i+1]); prefetchPhoto(plants[i-1]);
+}
+
+// switching maps: the picked map's payload {plants, photos, map, variants,
+// tiles} is fetched once and swapped in; nothing else on the page reloads
+const MAP_SIZES = {{MAPSIZES}};
+const mapSel = document.getElementById('mapSelect');
+const mapPayloads = new Map();
+function setMapImage(url, v){
+  const pic = mapImg.parentElement;
+  pic.querySelectorAll('source').forEach(s=>s.remove());
+  mapImg.removeAttribute('srcset'); mapImg.removeAttribute('sizes');
+  if(v && variantBase !== null){
+    const srcset = names => names.map((n,i)=>variantBase+n+' '+v.w[i]+'w').join(', ');
+    Object.keys(v.t).forEach(t=>{
+      if(t === 'image/jpeg'){ mapImg.srcset = srcset(v.t[t]); mapImg.sizes = MAP_SIZES; return; }
+      const s = document.createElement('source');
+      s.type = t; s.srcset = srcset(v.t[t]); s.sizes = MAP_SIZES;
+      pic.insertBefore(s, mapImg);
+    });
+  }
+  mapImg.src = url || '';
+}
+function loadMap(d){
+  mapId = d.id; plants = d.plants; photoMap = d.photos; mapTiles = d.tiles;
+  indexPlants();
+  searchIndex = null; searchBox.value = ''; searchResults.innerHTML = '';
+  clustering = plants.length >= CLUSTER_MIN;
+  gridCache.length = 0;
+  markerEls.forEach(el=>el.remove()); markerEls.clear();
+  clearTiles(); tileLayer.remove();
+  history = []; clearDetails();
+  zoom = 1; tx = 0; ty = 0;
+  mapSel.value = d.id;
+  setMapImage(d.map, d.variants);
+  if(mapImg.complete) mapImg.onload();
+}
+function switchMap(id){
+  const m = maps.find(m=>m.id === id);
+  if(!m || id === mapId) return;
+  let req = mapPayloads.get(id);
+  if(!req){
+    req = fetch(m.url).then(r=>{ if(!r.ok) throw new Error(r.status); return r.json(); });
+    mapPayloads.set(id, req);
+  }
+  // a later pick wins over a slow earlier one
+  req.then(d=>{ if(mapSel.value === id) loadMap(d); })
+     .catch(()=>{ mapPayloads.delete(id); mapSel.value = mapId; });
+}
+if(maps.length > 1 && maps.every(m=>m.url)){
+  maps.forEach(m=>{ const o = document.createElement('option'); o.value = m.id; o.textContent = m.title; mapSel.appendChild(o); });
+  mapSel.value = mapId;
+  mapSel.hidden = false;
+  mapSel.addEventListener('change', ()=>switchMap(mapSel.value));
+}
+
+// search: an n-gram index over names (single characters and pairs), their
+// initial consonants (초성) and descriptions (pairs only; one character
+// matches half of every description). Built from the plants already on the
+// page when the browser is idle (or on first focus); a query intersects the
+// sorted posting lists of its pairs and only checks the few plants left, so
+// no keystroke scans every description.
+const CHO = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ', SEARCH_LIMIT = 20;
+const searchBox = document.getElementById('plantSearch'), searchResults = document.getElementById('searchResults');
+let searchIndex = null;
+function norm(s){ return String(s||'').normalize('NFC').toLowerCase().replace(/\\s+/g,''); }
+function chosung(s){
+  let out = '';
+  for(const ch of s){ const c = ch.charCodeAt(0); out += (c >= 0xAC00 && c <= 0xD7A3) ? CHO[Math.floor((c - 0xAC00) / 588)] : ch; }
+  return out;
+}
+function grams(s, single){ const out = new Set(); for(let i = 0; i < s.length; i++){ if(single) out.add(s[i]); if(i + 1 < s.length) out.add(s.substr(i, 2)); } return out; }
+function buildSearchIndex(){
+  const idx = {name:new Map(), cho:new Map(), desc:new Map(), names:[], chos:[], descs:[]};
+  // plants are visited in order, so every posting list comes out sorted
+  const add = (map, i) => g => { let a = map.get(g); if(!a) map.set(g, a = []); a.push(i); };
+  plants.forEach((p,i)=>{
+    const n = norm(p.name || p.id), c = chosung(n), d = norm(p.description);
+    idx.names.push(n); idx.chos.push(c); idx.descs.push(d);
+    grams(n, true).forEach(add(idx.name, i)); grams(c, true).forEach(add(idx.cho, i)); grams(d, false).forEach(add(idx.desc, i));
+  });
+  return idx;
+}
+function intersect(a, b){
+  const out = [];
+  for(let i = 0, j = 0; i < a.length && j < b.length;){
+    if(a[i] === b[j]){ out.push(a[i]); i++; j++; } else if(a[i] < b[j]) i++; else j++;
+  }
+  return out;
+}
+// plants whose text has every character pair of q (may include false positives)
+function candidates(map, q){
+  const keys = q.length === 1 ? [q] : Array.from(grams(q, false));
+  const lists = keys.map(g => map.get(g) || []).sort((a,b) => a.length - b.length);
+  let out = lists[0];
+  for(let k = 1; k < lists.length && out.length; k++) out = intersect(out, lists[k]);
+  return out;
+}
+function search(query){
+  const q = norm(query);
+  if(!q) return [];
+  if(!searchIndex) searchIndex = buildSearchIndex();
+  const idx = searchIndex, score = new Map();
+  const hit = (i, s) => { if((score.get(i) || 0) < s) score.set(i, s); };
+  // exact name > name prefix > name substring > 초성 > description
+  candidates(idx.name, q).forEach(i=>{ const at = idx.names[i].indexOf(q); if(at >= 0) hit(i, idx.names[i] === q ? 100 : at === 0 ? 80 : 60); });
+  if(/^[ㄱ-ㅎ]+$/.test(q)) candidates(idx.cho, q).forEach(i=>{ const at = idx.chos[i].indexOf(q); if(at >= 0) hit(i, at === 0 ? 50 : 40); });
+  if(q.length > 1){
+    // lowest score and candidates come in plant order: stop once the list is full
+    let more = SEARCH_LIMIT;
+    for(const i of candidates(idx.desc, q)){
+      if(more <= 0) break;
+      if(!score.has(i) && idx.descs[i].includes(q)){ hit(i, 20); more--; }
+    }
+  }
+  return Array.from(score).sort((a,b) => b[1] - a[1] || a[0] - b[0]).slice(0, SEARCH_LIMIT).map(e => plants[e[0]]);
+}
+function showResults(){
+  const found = search(searchBox.value);
+  searchResults.innerHTML = found.map(p => '<li><button type="button" data-id="'+esc(p.id)+'">'+esc(p.name || p.id)+(p.label ? '<small>'+esc(p.label)+'</small>' : '')+'</button></li>').join('');
+}
+function prepareSearch(){ if(!searchIndex) searchIndex = buildSearchIndex(); }
+searchBox.addEventListener('focus', prepareSearch);
+if(window.requestIdleCallback) requestIdleCallback(prepareSearch);
+searchBox.addEventListener('input', showResults);
+searchBox.addEventListener('keydown', e=>{
+  if(e.key === 'Enter'){ const b = searchResults.querySelector('button'); if(b) b.click(); }
+  else if(e.key === 'Escape'){ searchBox.value = ''; showResults(); }
+});
+searchResults.addEventListener('click', e=>{
+  const b = e.target.closest('button');
+  const p = b && plantsById.get(b.dataset.id);
+  if(p){ showPlant(p, true); searchBox.value = ''; showResults(); }
+});
+
+function renderDetails(p){
+  return '<strong>'+esc(p.name)+'</strong><p>'+esc(p.description||'')+'</p>' + photoTag(p);
+}
+function updateBackState(){ backBtn.disabled = history.length === 0; }
+
+function showPlant(p, pushHistory){
+  const cur = details.dataset.current || '';
+  if(cur && cur !== p.id && pushHistory) history.push(cur);
+  details.innerHTML = renderDetails(p);
+  details.dataset.current = p.id;
+  sel.value = p.id;
+  updateBackState();
+  prefetchNeighbours(p);
+  // centre on the plant's position; its marker may be off screen (not rendered) or clustered
+  if(imgCW && p.x !== undefined && p.y !== undefined){
+    tx = areaW/2 - p.x / 100 * imgCW * zoom;
+    ty = areaH/2 - p.y / 100 * imgCH * zoom;
+    clampPan(); setTransform();
+  }
+}
+
+function clearDetails(){ details.innerHTML = '<p class=\\'hint\\'>마커를 클릭하거나 목록에서 선택하세요.</p>'; delete details.dataset.current; sel.value = ''; updateBackState(); }
+function goBack(){ if(history.length === 0) return; const id = history.pop(); const p = plantsById.get(id); if(p) showPlant(p,false); updateBackState(); }
+
+sel.addEventListener('change', function(){ const id = this.value; if(!id){ clearDetails(); return; } const p = plantsById.get(id); if(p) showPlant(p,true); });
+backBtn.addEventListener('click', function(e){ e.stopPropagation(); goBack(); });
+clearBtn.addEventListener('click', function(e){ e.stopPropagation(); clearDetails(); });
+
+// dragging (pan)
+viewport.addEventListener('mousedown', function(e){ if(e.button!==0) return; isDragging=true; viewport.style.cursor='grabbing'; dragStart = {x:e.clientX, y:e.clientY, tx:tx, ty:ty}; e.preventDefault(); });
+window.addEventListener('mousemove', function(e){ if(!isDragging || !dragStart) return; const dx = e.clientX - dragStart.x; const dy = e.clientY - dragStart.y; tx = dragStart.tx + dx; ty = dragStart.ty + dy; setTransform(); });
+window.addEventListener('mouseup', function(e){ if(isDragging){ isDragging=false; viewport.style.cursor='grab'; dragStart=null; setTransform(); } });
+
+// touch: one finger pans, two fingers pinch-zoom (and pan) around their midpoint
+function touchStart(touches){
+  isDragging = false; dragStart = null; pinch = null;
+  if(touches.length === 1){
+    const t = touches[0]; isDragging = true; dragStart = {x:t.clientX, y:t.clientY, tx:tx, ty:ty};
+  } else if(touches.length >= 2){
+    const a = touches[0], b = touches[1];
+    const mx = (a.clientX + b.clientX)/2 - areaLeft, my = (a.clientY + b.clientY)/2 - areaTop;
+    // the map point under the fingers, in unzoomed image pixels
+    pinch = {dist: Math.hypot(a.clientX - b.clientX, a.clientY - b.clientY) || 1, zoom: zoom, px: (mx - tx)/zoom, py: (my - ty)/zoom};
+  }
+}
+viewport.addEventListener('touchstart', function(e){ touchStart(e.touches); if(e.touches.length >= 2) e.preventDefault(); }, {passive:false});
+viewport.addEventListener('touchmove', function(e){
+  if(pinch && e.touches.length >= 2){
+    const a = e.touches[0], b = e.touches[1];
+    const mx = (a.clientX + b.clientX)/2 - areaLeft, my = (a.clientY + b.clientY)/2 - areaTop;
+    zoom = Math.max(0.5, Math.min(maxZoom(), pinch.zoom * Math.hypot(a.clientX - b.clientX, a.clientY - b.clientY) / pinch.dist));
+    tx = mx - pinch.px * zoom; ty = my - pinch.py * zoom;
+  } else if(isDragging && dragStart){
+    const t = e.touches[0]; tx = dragStart.tx + t.clientX - dragStart.x; ty = dragStart.ty + t.clientY - dragStart.y;
+  } else return;
+  setTransform(); e.preventDefault();
+}, {passive:false});
+// lifting one finger of a pinch continues as a pan with the other
+viewport.addEventListener('touchend', function(e){ touchStart(e.touches); setTransform(); });
+viewport.addEventListener('touchcancel', function(e){ touchStart(e.touches); setTransform(); });
+
+// wheel zoom with modifier
+mapArea.addEventListener('wheel', function(e){ if(e.ctrlKey || e.metaKey || e.shiftKey){ e.preventDefault(); zoomTo(e.deltaY<0?1.15:0.85, e.clientX-areaLeft, e.clientY-areaTop); } }, {passive:false});
+
+if(window.ResizeObserver){
+  const ro = new ResizeObserver(()=>{ measure(); setTransform(); });
+  ro.observe(mapArea); ro.observe(mapImg);
+} else {
+  window.addEventListener('resize', ()=>{ measure(); setTransform(); });
+}
+// only the offset changes on scroll; read it lazily in the next frame
+window.addEventListener('scroll', ()=>{ requestAnimationFrame(()=>{ const r = mapArea.getBoundingClientRect(); areaLeft = r.left; areaTop = r.top; }); }, {passive:true});
+
+// clicking empty map clears details
+mapArea.addEventListener('click', function(){ clearDetails(); });
+</script>
+{{OFFLINE}}
+</body>
+</html>
+"""
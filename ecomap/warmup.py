@@ -0,0 +1,146 @@
+"""Processing the map images and plant photos before visitors ask for them.
+
+Without a warm-up, every image is encoded inside the script run of the
+first session that needs it; when a whole class opens the app at once,
+each session would start on the same photos. `Warmup` instead runs the
+jobs from `image_jobs()` on a small background thread pool as soon as the
+app starts, map images first. Together with the single-flight
+`AssetCache.get_or_create`, a session that needs an image the warm-up is
+still working on waits for that one result.
+
+`Warmup.status()` is the readiness signal (served as /ready by the asset
+server and included in the metrics); scripts/warm_cache.py fills the disk
+cache the same way with a process pool before the app is started.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from .maps import MapDef, split_plants
+from .photos import AssetIndex, ResolvedFile
+
+# sizes the app encodes at (streamlit_app.py uses these too, so warm-up keys match)
+MAP_WIDTH = 1600
+PHOTO_WIDTH = 800
+QUALITY = 80
+
+WORKERS = int(os.environ.get("ECOMAP_WARM_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+
+log = logging.getLogger("ecomap.warmup")
+
+
+def image_jobs(index: AssetIndex, maps: list[MapDef], plants: list[dict]) -> list[tuple[ResolvedFile, int]]:
+    """(file, max width) for every map image, then every map's plant photos."""
+    jobs = [(f, MAP_WIDTH) for f in (index.map_file(m.id) for m in maps) if f]
+    seen = set()
+    for plants_here in split_plants(plants, maps).values():
+        for f in index.photos(plants_here).values():
+            if f.path not in seen:
+                seen.add(f.path)
+                jobs.append((f, PHOTO_WIDTH))
+    return jobs
+
+
+class Warmup:
+    """Runs jobs on a background thread pool and reports how far it got.
+
+    `start()` ignores a call while a run is in progress, and a call with
+    the same `tag` as the last run (e.g. the same plant snapshot), so it can
+    be called on every script run. A run that had failures is retried, with
+    the same tag, once `retry_after` seconds have passed (e.g. after a
+    broken photo was replaced).
+
+    Ready means a run has finished and could list its jobs. Jobs that fail
+    (a broken photo) do not clear it: the app still serves the page, only
+    without that image, so they are reported in `failed` and `error`
+    instead. It stays set while a later run is in progress, so a catalogue
+    edit does not make a health check fail. Only a run whose `make_jobs()`
+    raised clears it ("failed").
+    """
+
+    def __init__(self, workers: int = WORKERS, retry_after: float = 60.0):
+        self.workers = workers
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._tag: object = object()
+        self._running = self._ready = False
+        self._done = self._failed = self._total = 0
+        self._error: str | None = None  # make_jobs() raised
+        self._job_error: str | None = None  # the last failed job
+        self._started = self._finished = 0.0
+
+    def start(self, make_jobs: Callable[[], list[Callable[[], object]]], tag: object = None) -> bool:
+        """Run the jobs returned by `make_jobs()` (called on the background thread).
+
+        Returns False if the call was ignored (see the class docstring).
+        """
+        with self._lock:
+            if self._running:
+                return False
+            failed = self._finished and (self._failed or self._error)
+            if tag is not None and tag == self._tag and not (failed and time.monotonic() - self._finished >= self.retry_after):
+                return False
+            self._tag = tag
+            self._running = True
+            self._done = self._failed = self._total = 0
+            self._error = self._job_error = None
+            self._started = time.monotonic()
+        threading.Thread(target=self._run, args=(make_jobs,), name="ecomap-warmup", daemon=True).start()
+        return True
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._ready
+
+    def status(self) -> dict:
+        """{"state": "idle" | "warming" | "ready" | "failed", "running", "done", "failed", "total",
+        "seconds", "error"}"""
+        with self._lock:
+            end = time.monotonic() if self._running else self._finished
+            if self._ready:
+                state = "ready"
+            elif self._running:
+                state = "warming"
+            else:
+                state = "failed" if self._finished else "idle"
+            return {
+                "state": state,
+                "running": self._running,
+                "done": self._done,
+                "failed": self._failed,
+                "total": self._total,
+                "seconds": round(end - self._started, 3),
+                "error": self._error or self._job_error,
+            }
+
+    def _run(self, make_jobs: Callable[[], list[Callable[[], object]]]) -> None:
+        error = None
+        try:
+            jobs = make_jobs()
+            with self._lock:
+                self._total = len(jobs)
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="ecomap-warmup") as pool:
+                for fut in as_completed([pool.submit(job) for job in jobs]):
+                    exc = fut.exception()
+                    if exc is not None:
+                        log.warning("warm-up job failed: %s", exc)
+                    with self._lock:
+                        self._done += 1
+                        if exc is not None:
+                            self._failed += 1
+                            self._job_error = str(exc) or type(exc).__name__
+        except Exception as e:
+            log.exception("warm-up could not run")
+            error = str(e) or type(e).__name__
+        with self._lock:
+            self._running = False
+            self._error = error
+            self._ready = error is None
+            self._finished = time.monotonic()
+        log.info("warm-up done: %d jobs (%d failed) in %.1fs", self._total, self._failed, self._finished - self._started)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# 앱 시작 시간, 이미지 처리 시간, 페이지 크기를 재는 벤치마크입니다.
+# 브라우저나 네트워크 없이 돌아갑니다: 식물 N개짜리 가상 카탈로그(사진 포함)를
+# 만들고, streamlit 의 AppTest 로 streamlit_app.py 를 직접 실행합니다.
+#
+# 재는 것 (카탈로그 크기 × 자산 모드마다):
+#   cold_s     빈 캐시에서 첫 실행
+#   warm_s     같은 프로세스에서 다시 실행 (메모리 캐시)
+#   restart_s  새 프로세스, 디스크 캐시만 있는 상태
+#   html_bytes components.v1.html 에 넘기는 HTML 크기
+#   peak_rss_mb 최대 메모리 사용량
+# 그리고 사진/지도 한 장당 인코딩 시간과 결과 크기.
+#
+# 결과는 build/bench/<시각>.json 에 저장되고, --baseline 으로 이전 결과와 비교합니다.
+#
+# 사용법: benchmark.py [--sizes 10,100,1000] [--modes inline,server]
+#                      [--photo-size 1600x1200] [--baseline 이전결과.json]
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+OUT_DIR = ROOT / "build" / "bench"
+WORK_DIR = OUT_DIR / "catalogues"
+MODES = ("inline", "server")
+
+# 결과 비교 시 이 비율 이상 나빠지면 표시
+REGRESSION = 0.10
+# 시간 값은 이보다 작은 차이를 잡음으로 봅니다
+NOISE = {"cold_s": 0.05, "warm_s": 0.05, "restart_s": 0.05, "mean_ms": 2, "p95_ms": 2}
+
+
+# -- 가상 카탈로그 ------------------------------------------------------------
+
+def make_photo(path: Path, size: tuple[int, int], rng: random.Random):
+    from PIL import Image, ImageDraw
+
+    # 노이즈가 있어야 JPEG 크기가 실제 사진과 비슷해집니다.
+    noise = Image.effect_noise(size, rng.uniform(20, 60))
+    tint = Image.new("RGB", size, (rng.randrange(40, 200), rng.randrange(80, 220), rng.randrange(40, 160)))
+    im = Image.merge("RGB", (noise, noise, noise))
+    im = Image.blend(im, tint, 0.6)
+    draw = ImageDraw.Draw(im)
+    for _ in range(8):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randrange(size[0] // 20, size[0] // 5)
+        draw.ellipse([(x - r, y - r), (x + r, y + r)], fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    im.save(path, "JPEG", quality=90)
+
+
+def make_catalogue(n: int, photo_size: tuple[int, int], seed: int = 0) -> Path:
+    """Synthetic app tree with `n` plants; reused while its photos exist."""
+    ws = WORK_DIR / f"{n}-{photo_size[0]}x{photo_size[1]}-{seed}"
+    rng = random.Random(seed)
+    plants = []
+    for i in range(n):
+        pid = f"plant-{i:04d}"
+        plants.append({
+            "id": pid,
+            "name": f"식물 {i + 1}",
+            "label": str(i + 1),
+            "photo": f"photo/{pid}/{pid}-1.jpg",
+            "description": "봄에 피는 작은 꽃이에요. " * rng.randrange(1, 6),
+            "x": round(rng.uniform(2, 98), 2),
+            "y": round(rng.uniform(2, 98), 2),
+        })
+    for p in plants:
+        dst = ws / p["photo"]
+        if not dst.exists():
+            make_photo(dst, photo_size, rng)
+    map_file = ws / "map" / "school-map.jpg"
+    if not map_file.exists():
+        make_photo(map_file, (2800, 1800), rng)
+    (ws / "data").mkdir(parents=True, exist_ok=True)
+    (ws / "data" / "plants.json").write_text(json.dumps(plants, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # 측정 대상 코드는 매번 현재 트리에서 복사
+    shutil.copy2(ROOT / "streamlit_app.py", ws / "streamlit_app.py")
+    shutil.rmtree(ws / "ecomap", ignore_errors=True)
+    shutil.copytree(ROOT / "ecomap", ws / "ecomap", ignore=shutil.ignore_patterns("__pycache__"))
+    # AppTest runs its script as __main__, where streamlit_app.py exits early
+    (ws / "bench_entry.py").write_text(
+        "import runpy, sys\nfrom pathlib import Path\nhere = Path(__file__).parent\nsys.path.insert(0, str(here))\n"
+        "runpy.run_path(str(here / 'streamlit_app.py'), run_name='streamlit_app')\n",
+        encoding="utf-8",
+    )
+    return ws
+
+
+# -- 앱 실행 (자식 프로세스) --------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_app(ws: Path, reruns: int) -> dict:
+    """Run streamlit_app.py in `ws` 1 + `reruns` times; called in a fresh process."""
+    import streamlit.components.v1 as components
+    from streamlit.testing.v1 import AppTest
+
+    payloads = []
+    real_html = components.html
+
+    def recording_html(html, *args, **kwargs):
+        payloads.append(len(html.encode("utf-8")))
+        return real_html(html, *args, **kwargs)
+
+    components.html = recording_html
+    at = AppTest.from_file(str(ws / "bench_entry.py"), default_timeout=3600)
+    times = []
+    for _ in range(1 + reruns):
+        t = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t)
+        if at.exception:
+            raise SystemExit(f"app raised: {at.exception[0].message}")
+    return {"times": times, "html_bytes": payloads[-1] if payloads else None, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_child(ws: Path, mode: str, reruns: int) -> dict:
+    env = dict(os.environ, ECOMAP_ASSET_MODE=mode, ECOMAP_ASSET_PORT=str(free_port()))
+    out = subprocess.run(
+        [sys.executable, __file__, "_run", str(ws), str(reruns)],
+        env=env, cwd=ws, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip() or out.stdout.strip())
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_app(ws: Path, n: int, mode: str) -> dict:
+    shutil.rmtree(ws / ".cache", ignore_errors=True)
+    first = run_child(ws, mode, reruns=1)
+    restart = run_child(ws, mode, reruns=0)
+    return {
+        "plants": n,
+        "mode": mode,
+        "cold_s": round(first["times"][0], 4),
+        "warm_s": round(first["times"][1], 4),
+        "restart_s": round(restart["times"][0], 4),
+        "html_bytes": first["html_bytes"],
+        "peak_rss_mb": first["peak_rss_mb"],
+    }
+
+
+# -- 이미지 한 장당 인코딩 ----------------------------------------------------
+
+def bench_encode(ws: Path, n: int, samples: int) -> list[dict]:
+    from ecomap.imaging import encode_image
+
+    photos = sorted((ws / "photo").rglob("*.jpg"))[:samples]
+    out = []
+    for kind, files, max_width in (("photo", photos, 800), ("map", [ws / "map" / "school-map.jpg"], 1600)):
+        times, sizes = [], []
+        for f in files:
+            t = time.perf_counter()
+            b, _ = encode_image(f, max_width=max_width, quality=80)
+            times.append(time.perf_counter() - t)
+            sizes.append(len(b))
+        times.sort()
+        out.append({
+            "plants": n,
+            "asset": kind,
+            "count": len(times),
+            "mean_ms": round(statistics.mean(times) * 1000, 2),
+            "p50_ms": round(times[len(times) // 2] * 1000, 2),
+            "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 2),
+            "max_ms": round(times[-1] * 1000, 2),
+            "mean_bytes": int(statistics.mean(sizes)),
+            "input_bytes": int(statistics.mean(f.stat().st_size for f in files)),
+        })
+    return out
+
+
+# -- 결과 ----------------------------------------------------------------------
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def meta(args) -> dict:
+    import PIL
+    try:
+        import streamlit
+        st_version = streamlit.__version__
+    except ImportError:
+        st_version = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_rev(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "streamlit": st_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "photo_size": args.photo_size,
+    }
+
+
+def compare(results: dict, baseline: dict):
+    """Print metrics that got worse by more than REGRESSION against `baseline`."""
+    def index(rows, keys):
+        return {tuple(r[k] for k in keys): r for r in rows}
+
+    worse = []
+    for section, keys, metrics in (
+        ("app", ("plants", "mode"), ("cold_s", "warm_s", "restart_s", "html_bytes", "peak_rss_mb")),
+        ("encode", ("plants", "asset"), ("mean_ms", "p95_ms", "mean_bytes")),
+    ):
+        old = index(baseline.get(section, []), keys)
+        for k, row in index(results[section], keys).items():
+            if k not in old:
+                continue
+            for m in metrics:
+                a, b = old[k].get(m), row.get(m)
+                if a and b is not None and (b - a) / a > REGRESSION and b - a > NOISE.get(m, 0):
+                    worse.append(f"  {section} {k} {m}: {a} -> {b} (+{(b - a) / a:.0%})")
+    print(f"기준({baseline.get('meta', {}).get('git')}) 대비:")
+    print("\n".join(worse) if worse else "  나빠진 항목 없음")
+    return worse
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_run":
+        print(json.dumps(run_app(Path(sys.argv[2]), int(sys.argv[3]))))
+        return
+
+    ap = argparse.ArgumentParser(description="생태지도 벤치마크")
+    ap.add_argument("--sizes", default="10,100,1000", help="식물 수 (쉼표로 구분)")
+    ap.add_argument("--modes", default=",".join(MODES), help="자산 모드: inline, server")
+    ap.add_argument("--photo-size", default="1600x1200", help="가상 사진 크기 WxH")
+    ap.add_argument("--encode-samples", type=int, default=50, help="인코딩 시간을 잴 사진 수")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    ap.add_argument("--baseline", type=Path, default=None, help="비교할 이전 결과 JSON")
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    photo_size = tuple(int(v) for v in args.photo_size.lower().split("x"))
+
+    results = {"meta": meta(args), "app": [], "encode": []}
+    for n in sizes:
+        print(f"카탈로그 준비: 식물 {n}개")
+        ws = make_catalogue(n, photo_size, args.seed)
+        for row in bench_encode(ws, n, args.encode_samples):
+            results["encode"].append(row)
+            print(f"  인코딩 {row['asset']}: 평균 {row['mean_ms']}ms, p95 {row['p95_ms']}ms, {row['mean_bytes'] // 1024}KB")
+        for mode in modes:
+            row = bench_app(ws, n, mode)
+            results["app"].append(row)
+            print(f"  {mode}: cold {row['cold_s']}s, warm {row['warm_s']}s, restart {row['restart_s']}s, "
+                  f"html {row['html_bytes'] // 1024 if row['html_bytes'] else '-'}KB, rss {row['peak_rss_mb']}MB")
+
+    out = args.out or OUT_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print("결과 저장:", out)
+
+    if args.baseline:
+        if compare(results, json.loads(args.baseline.read_text(encoding="utf-8"))):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# plants.json 의 모든 사진과 map/ 의 지도 이미지에 대해 반응형 변형 이미지
+# (여러 너비 × AVIF/WebP/JPEG)를 만들고 build/assets/manifest.json 을 씁니다.
+# 파일 이름은 내용 해시라서 오래 캐시해도 안전합니다.
+# 뷰어(server 모드)는 manifest 를 읽어 <picture>/srcset 을 만들고, 브라우저는
+# 화면 크기에 맞는 파일 하나만 내려받습니다.
+#
+# 사용법: build_assets.py [--widths 400,800,1600]
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ecomap.asset_server import AssetStore  # noqa: E402
+from ecomap.photos import resolve_photo  # noqa: E402
+from ecomap.plants import PlantStore  # noqa: E402
+from ecomap.variants import WIDTHS, available_formats, build_variants  # noqa: E402
+
+DATA_FILE = ROOT / "data" / "plants.json"
+MAP_DIR = ROOT / "map"
+OUT_DIR = ROOT / "build" / "assets"
+MANIFEST = OUT_DIR / "manifest.json"
+MAP_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def write_manifest(manifest: dict):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST.with_name(MANIFEST.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="반응형 이미지 변형 생성")
+    ap.add_argument("--widths", default=",".join(map(str, WIDTHS)))
+    args = ap.parse_args()
+    widths = tuple(int(w) for w in args.widths.split(",") if w.strip())
+
+    store = AssetStore(OUT_DIR)
+    formats = available_formats()
+    print("형식:", ", ".join(fmt for _, fmt, _ in formats), "/ 너비:", widths)
+    manifest = {"widths": list(widths), "maps": {}, "photos": {}}
+
+    if MAP_DIR.exists():
+        for p in sorted(MAP_DIR.iterdir()):
+            if p.suffix.lower() not in MAP_EXTS or not p.is_file():
+                continue
+            try:
+                manifest["maps"][p.name] = build_variants(p, store, ROOT, widths, formats)
+                print("지도:", p.name)
+            except Exception as e:
+                print("실패:", p, e)
+
+    plants = PlantStore(DATA_FILE).all() if DATA_FILE.exists() else []
+    for plant in plants:
+        pid = plant.get("id")
+        photo = (plant.get("photo") or "").strip()
+        if not pid or not photo or photo.startswith(("http://", "https://", "data:")):
+            continue
+        src = resolve_photo(ROOT, photo)
+        if not src:
+            print("파일 없음:", photo)
+            continue
+        try:
+            manifest["photos"][pid] = build_variants(src, store, ROOT, widths, formats)
+            print("사진:", pid)
+        except Exception as e:
+            print("실패:", src, e)
+
+    write_manifest(manifest)
+    print("manifest 저장:", MANIFEST)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# streamlit_app.py 와 같은 지도 뷰어를 정적 사이트(dist/)로 만듭니다.
+# 결과물은 아무 정적 파일 서버(nginx, GitHub Pages 등)로 배포할 수 있고,
+# 방문자마다 Python 프로세스가 필요하지 않습니다.
+#
+#   dist/index.html                 뷰어 (식물 목록은 공백 없이 내장)
+#   dist/assets/<해시>.<확장자>     지도/사진 (반응형 변형 포함, 내용 해시 이름)
+#   dist/assets/<해시>.json         지도별 식물/이미지 정보 (지도를 바꿀 때 뷰어가 불러옴)
+#   dist/t/<지도>/<버전>/...        타일 (scripts/make_tiles.py 로 만든 경우)
+#   *.gz, *.br                      미리 압축한 사본 (원본보다 작을 때만)
+#   dist/sw.js                      오프라인용 서비스 워커 (지도, 식물 정보, 사진을 미리 저장)
+#   dist/_headers                   캐시 헤더 예시 (Netlify/Cloudflare Pages 형식)
+#
+# 한 번 연 뒤에는 인터넷 없이도 열리고, 다시 빌드하면 바뀐 파일(새 해시)만
+# 내려받습니다. 서비스 워커는 https 나 localhost 에서만 동작합니다.
+#
+# .br 파일은 brotli 패키지가 있을 때만 만듭니다: pip install brotli
+#
+# 사용법: build_site.py [--out dist] [--no-variants] [--no-offline] [--workers N]
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ecomap.asset_server import AssetStore  # noqa: E402
+from ecomap.imaging import encode_image  # noqa: E402
+from ecomap.maps import load_maps, split_plants  # noqa: E402
+from ecomap.offline import image_group, service_worker  # noqa: E402
+from ecomap.photos import resolve_photo  # noqa: E402
+from ecomap.plants import PlantStore  # noqa: E402
+from ecomap.variants import build_variants  # noqa: E402
+from ecomap.viewer import map_payload, render, tiles_config  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DATA_FILE = ROOT / "data" / "plants.json"
+MAP_DIR = ROOT / "map"
+TILES_DIR = ROOT / "tiles"
+OUT_DIR = ROOT / "dist"
+
+# 이미 압축된 형식도 일단 시도하되, 5% 이상 줄지 않으면 사본을 남기지 않습니다.
+MIN_SAVING = 0.05
+
+HEADERS = """/assets/*
+  Cache-Control: public, max-age=31536000, immutable
+/t/*
+  Cache-Control: public, max-age=31536000, immutable
+/index.html
+  Cache-Control: no-cache
+/sw.js
+  Cache-Control: no-cache
+"""
+
+
+def publish_image(src: Path, assets: Path, max_width: int, variants: bool):
+    """Returns (url or None, variants entry or None) for one image; runs in a worker."""
+    store = AssetStore(assets)
+    if variants:
+        entry = build_variants(src, store, ROOT)
+        return None, {"w": entry["w"], "t": entry["t"]}
+    b, mime = encode_image(src, max_width=max_width, quality=80)
+    return "assets/" + store.publish(b, mime), None
+
+
+def precompress(root: Path) -> tuple[int, int]:
+    """Write .gz (and .br) next to every file they make smaller. Returns counts."""
+    gz = br = 0
+    for p in sorted(root.rglob("*")):
+        if not p.is_file() or p.suffix in (".gz", ".br") or p.name == "_headers":
+            continue
+        data = p.read_bytes()
+        limit = len(data) * (1 - MIN_SAVING)
+        packed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(packed) < limit:
+            p.with_name(p.name + ".gz").write_bytes(packed)
+            gz += 1
+        if brotli is not None:
+            packed = brotli.compress(data, quality=11)
+            if len(packed) < limit:
+                p.with_name(p.name + ".br").write_bytes(packed)
+                br += 1
+    return gz, br
+
+
+def main():
+    ap = argparse.ArgumentParser(description="정적 사이트 빌드")
+    ap.add_argument("--out", type=Path, default=OUT_DIR)
+    ap.add_argument("--no-variants", action="store_true", help="반응형 변형 대신 이미지 한 장씩만")
+    ap.add_argument("--no-offline", action="store_true", help="서비스 워커(오프라인 캐시)를 만들지 않음")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    args = ap.parse_args()
+    variants = not args.no_variants
+
+    # 새 폴더에 만든 뒤 바꿔치기 — 빌드 중에도 기존 dist/ 는 온전합니다.
+    out = args.out
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    assets = tmp / "assets"
+    assets.mkdir(parents=True)
+
+    plants = PlantStore(DATA_FILE).all() if DATA_FILE.exists() else []
+    maps = load_maps(MAP_DIR)
+
+    photo_map = {}
+    map_images = {}  # map id -> (url, variants entry)
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for m in maps:
+            if m.image.exists():
+                jobs[("map", m.id)] = pool.submit(publish_image, m.image, assets, 1600, variants)
+        for p in plants:
+            pid = p.get("id")
+            photo = (p.get("photo") or "").strip()
+            if not pid or not photo:
+                continue
+            if photo.startswith(("http://", "https://", "data:")):
+                photo_map[pid] = photo
+                continue
+            src = resolve_photo(ROOT, photo)
+            if not src:
+                print("파일 없음:", photo)
+                continue
+            jobs[("photo", pid)] = pool.submit(publish_image, src, assets, 800, variants)
+
+        for key, fut in jobs.items():
+            try:
+                url, entry = fut.result()
+            except Exception as e:
+                print("실패:", key, e)
+                continue
+            if key[0] == "map":
+                # srcset 을 모르는 브라우저용: 가운데 너비의 JPEG
+                map_images[key[1]] = (url or "assets/" + entry["t"]["image/jpeg"][len(entry["w"]) // 2], entry)
+            else:
+                photo_map[key[1]] = url or entry
+
+    # 지도마다 식물/사진/타일 정보를 따로 만들고, 첫 지도는 index.html 에 넣습니다.
+    # 나머지는 내용 해시 이름의 JSON 으로 두어 고를 때만 내려받게 합니다.
+    store = AssetStore(assets)
+    payloads, map_list = [], []
+    by_map = split_plants(plants, maps)
+    for m in maps:
+        map_tiles = None
+        info_file = TILES_DIR / m.image.stem / "tiles.json"
+        if info_file.exists():
+            info = json.loads(info_file.read_text(encoding="utf-8"))
+            rel = f"t/{m.image.stem}/{info['version']}/"
+            if not (tmp / rel).exists():
+                shutil.copytree(TILES_DIR / m.image.stem / info["version"], tmp / rel)
+            map_tiles = tiles_config(info, rel)
+        map_plants = by_map[m.id]
+        map_url, map_variants = map_images.get(m.id, (None, None))
+        payload = map_payload(m.id, map_plants, {pid: photo_map[pid] for p in map_plants if (pid := p.get("id")) in photo_map},
+                              map_url, map_variants, map_tiles)
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payloads.append(payload)
+        map_list.append({"id": m.id, "title": m.title, "url": "assets/" + store.publish(data, "application/json")})
+
+    first = payloads[0]
+    html = render(first["plants"], first["photos"], first["map"], map_variants=first["variants"],
+                  variant_base="assets/" if variants else None, map_tiles=first["tiles"], compact=True,
+                  maps=map_list, map_id=first["id"], offline=not args.no_offline)
+    (tmp / "index.html").write_text(html, encoding="utf-8")
+    if not args.no_offline:
+        # 처음 열 때 미리 저장: 지도별 JSON, 지도 이미지, 사진 (이미지마다 한 크기)
+        precache = ["index.html"] + [m["url"] for m in map_list]
+        groups = []
+        for value in [entry or url for url, entry in map_images.values()] + list(photo_map.values()):
+            paths, first_choice = image_group(value)
+            if first_choice:
+                precache.append(first_choice)
+            if len(paths) > 1:
+                groups.append(paths)
+        (tmp / "sw.js").write_text(service_worker(html, precache, groups), encoding="utf-8")
+    (tmp / "_headers").write_text(HEADERS, encoding="utf-8")
+
+    gz, br = precompress(tmp)
+    if brotli is None:
+        print("brotli 패키지가 없어 .br 파일은 만들지 않았습니다.")
+
+    old = out.with_name(out.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if out.exists():
+        os.replace(out, old)
+    os.replace(tmp, out)
+    shutil.rmtree(old, ignore_errors=True)
+
+    total = sum(f.stat().st_size for f in out.rglob("*") if f.is_file() and f.suffix not in (".gz", ".br"))
+    print(f"지도 {len(maps)}개, 식물 {len(plants)}개, 사진 {len(photo_map)}개, 압축본 gz {gz}개 / br {br}개")
+    print(f"완료: {out} ({total // 1024}KB)")
+
+
+if __name__ == "__main__":
+    main()
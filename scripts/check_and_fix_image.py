@@ -1,43 +1,120 @@
 #!/usr/bin/env python3
-# 이미지 열기/검사하고 재저장(재인코딩)으로 복구 시도
+# 이미지가 손상되지 않았는지 검사하고, 손상된 이미지만 재저장(재인코딩)으로 복구합니다.
+#
+# 경로를 주지 않으면 map/, photo/ 의 모든 이미지와 plants.json 이 가리키는 사진을
+# CPU 코어 수만큼 병렬로 검사합니다. 먼저 헤더/verify 만 보는 가벼운 검사를 하고,
+# 의심스러운 파일(끝 부분이 잘림, verify 실패 등)만 끝까지 디코딩해 봅니다.
+#
+# 결과는 JSON 보고서(기본 build/image_report.json)로 씁니다. 손상된 이미지가
+# 남아 있으면 종료 코드 1 이므로, 사진을 올린 뒤 배포 전에 실행해 막을 수 있고,
+# save_plants.py --image-report 로 보고서를 넘기면 손상된 사진을 가리키는 항목은
+# 저장하지 않습니다.
+#
+# 사용법: check_and_fix_image.py [경로 ...] [--repair [--in-place]] [--report 파일] [--workers N]
+#   --repair      손상된 이미지를 <파일명>.fixed 로 복구 (원본은 그대로)
+#   --in-place    복구본으로 원본을 바꾸고 원본은 <파일명>.broken 으로 남김
+import argparse
+import os
 import sys
-import pathlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
 
 try:
-    from PIL import Image, UnidentifiedImageError
-except Exception:
+    from ecomap import integrity  # noqa: E402
+except ImportError:
     print("Pillow가 설치되어 있지 않습니다. 설치: pip3 install --user pillow")
     sys.exit(2)
+from ecomap.photos import resolve_photo  # noqa: E402
+from ecomap.plants import PlantStore  # noqa: E402
+
+DATA_FILE = ROOT / "data" / "plants.json"
+SCAN_DIRS = [ROOT / "map", ROOT / "photo"]
+REPORT = ROOT / "build" / "image_report.json"
+
+
+def images_under(d):
+    return [f.resolve() for f in sorted(d.rglob("*")) if f.suffix.lower() in integrity.IMAGE_EXTS and f.is_file()]
+
+
+def collect(paths):
+    """검사할 파일 -> 그 파일을 쓰는 식물 id 목록, 그리고 없는 사진 결과들."""
+    files, missing = {}, []
+    if paths:
+        for p in paths:
+            for f in images_under(p) if p.is_dir() else [p.resolve()]:
+                files.setdefault(f, [])
+        return files, missing
+    for d in SCAN_DIRS:
+        for f in images_under(d) if d.exists() else []:
+            files.setdefault(f, [])
+    plants = PlantStore(DATA_FILE).all() if DATA_FILE.exists() else []
+    for p in plants:
+        photo = (p.get("photo") or "").strip()
+        if not photo or photo.startswith(("http://", "https://", "data:")):
+            continue
+        src = resolve_photo(ROOT, photo)
+        if src:
+            files.setdefault(src.resolve(), []).append(p.get("id"))
+        else:
+            missing.append({"path": str(ROOT / photo), "status": "missing", "error": "file not found",
+                            "plants": [p.get("id")]})
+    return files, missing
+
+
+def replace_original(p, fix):
+    broken = p.with_name(p.name + ".broken")
+    os.replace(p, broken)
+    os.replace(fix, p)
+    return broken
 
-def usage():
-    print("사용법: check_and_fix_image.py <map/파일명>")
-    sys.exit(2)
 
 def main():
-    if len(sys.argv) != 2:
-        usage()
-    p = pathlib.Path(sys.argv[1])
-    if not p.exists():
-        print("파일이 없습니다:", p)
-        sys.exit(1)
-    try:
-        # 간단 검사
-        with Image.open(p) as im:
-            im.verify()
-        # 재열기 후 재저장 (원본 포맷 유지 시도)
-        with Image.open(p) as im:
-            fmt = im.format or "JPEG"
-            out = p.with_name(p.name + ".fixed")
-            im = im.convert("RGB") if fmt.upper() in ("JPEG", "JPG") else im.convert("RGBA" if fmt.upper()=="PNG" else "RGB")
-            im.save(out, format=fmt)
-        print("이미지 열림 및 재저장 완료:", out)
-        sys.exit(0)
-    except UnidentifiedImageError:
-        print("이미지로 인식되지 않습니다(손상 가능):", p)
-        sys.exit(1)
-    except Exception as e:
-        print("오류 발생:", e)
+    ap = argparse.ArgumentParser(description="이미지 손상 검사/복구")
+    ap.add_argument("paths", nargs="*", type=Path, help="검사할 파일이나 폴더 (기본: map/, photo/, plants.json 의 사진)")
+    ap.add_argument("--repair", action="store_true", help="손상된 이미지를 <파일명>.fixed 로 복구")
+    ap.add_argument("--in-place", action="store_true", help="--repair 와 함께: 원본을 복구본으로 바꾸고 <파일명>.broken 으로 보관")
+    ap.add_argument("--report", type=Path, default=REPORT, help=f"JSON 보고서 경로 (기본 {REPORT.relative_to(ROOT)})")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    args = ap.parse_args()
+    if args.in_place and not args.repair:
+        ap.error("--in-place 는 --repair 와 함께 써야 합니다")
+    for p in args.paths:
+        if not p.exists():
+            print("파일이 없습니다:", p)
+            sys.exit(1)
+
+    files, results = collect(args.paths)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(integrity.check_and_repair, p, p.with_name(p.name + ".fixed") if args.repair else None): p
+            for p in files
+        }
+        for fut in as_completed(futures):
+            p = futures[fut]
+            r = {**fut.result(), "plants": files[p]}
+            if "repaired" in r:
+                print("복구:", p, "->", r["repaired"], f"({r['error']})")
+                if args.in_place:
+                    broken = replace_original(p, Path(r["repaired"]))
+                    r = {**integrity.check_file(p), "plants": files[p], "repaired": str(p), "original": str(broken)}
+            elif r["status"] != "ok":
+                print(f"{r['status']}:", p, r["error"], f"(복구 실패: {r['repair_error']})" if "repair_error" in r else "")
+            results.append(r)
+    for r in results:
+        if r["status"] == "missing":
+            print("missing:", r["path"], r["plants"])
+
+    report = integrity.write_report(args.report, results, ROOT)
+    counts = report["counts"]
+    print(f"검사 {len(results)}개: 정상 {counts.get('ok', 0)}개, 손상 {counts.get('broken', 0)}개, "
+          f"너무 큼 {counts.get('too_large', 0)}개, 없음 {counts.get('missing', 0)}개, 복구 {counts['repaired']}개 -> {args.report}")
+    # 앱이 쓰는 파일(원본)이 아직 손상되어 있으면 실패
+    if any(r["status"] in integrity.BAD for r in results):
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
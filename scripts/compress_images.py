@@ -1,44 +1,60 @@
 #!/usr/bin/env python3
-from pathlib import Path
-from PIL import Image
+# map/ 과 photo/ 의 이미지를 줄여 build/compressed/ 아래 같은 경로로 저장합니다.
+# 원본은 읽기만 하므로 여러 번 실행해도 화질이 떨어지지 않고, 지난 실행 이후
+# 바뀌지 않은 이미지는 건너뜁니다(build/compressed/.pipeline.json).
+# 새 이미지는 CPU 코어 수만큼 병렬로 처리합니다.
+#
+# 사용법: compress_images.py [--workers N] [--force]
+import argparse
 import sys
+from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ecomap import pipeline  # noqa: E402
+
 TARGET_DIRS = [ROOT / "map", ROOT / "photo"]
+OUT_DIR = ROOT / "build" / "compressed"
 
 # 최대 너비/높이와 JPEG 품질 설정
 MAX_DIM = 1600
 JPEG_QUALITY = 80
 
-def compress_image(p: Path):
-    try:
-        with Image.open(p) as im:
-            orig_size = p.stat().st_size
-            w,h = im.size
-            scale = min(1.0, MAX_DIM / max(w,h))
-            if scale < 1:
-                new_size = (int(w*scale), int(h*scale))
-                im = im.resize(new_size, Image.LANCZOS)
-            # PNG은 RGBA 처리, JPG로 변환 가능하지만 확장자 유지
-            if p.suffix.lower() in [".jpg", ".jpeg"]:
-                im = im.convert("RGB")
-                im.save(p, "JPEG", quality=JPEG_QUALITY, optimize=True)
-            elif p.suffix.lower() == ".png":
-                im = im.convert("RGBA")
-                im.save(p, "PNG", optimize=True)
-            else:
-                return
-            new_size = p.stat().st_size
-            print(f"{p}: {orig_size//1024}KB -> {new_size//1024}KB")
-    except Exception as e:
-        print("실패:", p, e)
+FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
 
-def main():
+
+def collect_jobs() -> list[pipeline.Job]:
+    jobs = []
     for d in TARGET_DIRS:
         if not d.exists(): continue
-        for p in d.rglob("*"):
-            if p.suffix.lower() in [".jpg",".jpeg",".png"]:
-                compress_image(p)
+        for p in sorted(d.rglob("*")):
+            fmt = FORMATS.get(p.suffix.lower())
+            if fmt and p.is_file():
+                # PNG은 RGBA 유지, 확장자도 그대로
+                jobs.append(pipeline.Job(p, OUT_DIR / p.relative_to(ROOT),
+                                         {"max_dim": MAX_DIM, "fmt": fmt, "quality": JPEG_QUALITY}))
+    return jobs
+
+
+def report(r: pipeline.Result):
+    if r.status == "done":
+        print(f"{r.job.src}: {r.job.src.stat().st_size//1024}KB -> {r.job.dst.stat().st_size//1024}KB")
+    elif r.status == "failed":
+        print("실패:", r.job.src, r.error)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="이미지 압축")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    ap.add_argument("--force", action="store_true", help="바뀌지 않은 이미지도 다시 처리")
+    args = ap.parse_args()
+
+    results = pipeline.run(collect_jobs(), pipeline.resize_image, OUT_DIR,
+                           workers=args.workers, force=args.force, on_result=report)
+    counts = {s: sum(r.status == s for r in results) for s in ("done", "skipped", "failed")}
+    print(f"처리 {counts['done']}개, 건너뜀 {counts['skipped']}개, 실패 {counts['failed']}개 -> {OUT_DIR}")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,66 +1,80 @@
 #!/usr/bin/env python3
-from pathlib import Path
-from PIL import Image, UnidentifiedImageError
-import json
+# plants.json 의 사진을 1600px JPEG 로 다시 저장해 static_photos/<id>.jpg 에 두고
+# 사진 경로를 갱신합니다. 원본이 바뀌지 않은 사진은 건너뛰고(static_photos/.pipeline.json),
+# 나머지는 CPU 코어 수만큼 병렬로 처리합니다.
+#
+# 사용법: fix_photos.py [--workers N] [--force]
+import argparse
 import shutil
+import sys
+from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ecomap import pipeline  # noqa: E402
+from ecomap.photos import resolve_photo  # noqa: E402
+from ecomap.plants import PlantStore  # noqa: E402
+
 DATA_FILE = ROOT / "data" / "plants.json"
 OUT_DIR = ROOT / "static_photos"
-OUT_DIR.mkdir(exist_ok=True)
+MAX_DIM = 1600
+JPEG_QUALITY = 85
 
-def safe_open_and_save(src: Path, dst: Path):
-    try:
-        with Image.open(src) as im:
-            # convert to RGB and resize large images
-            max_dim = 1600
-            w,h = im.size
-            if max(w,h) > max_dim:
-                ratio = max_dim / max(w,h)
-                im = im.resize((int(w*ratio), int(h*ratio)), Image.LANCZOS)
-            im = im.convert("RGB")
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            im.save(dst, "JPEG", quality=85, optimize=True)
-            return True
-    except UnidentifiedImageError:
-        return False
-    except Exception:
-        return False
 
 def main():
+    ap = argparse.ArgumentParser(description="식물 사진 재저장")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    ap.add_argument("--force", action="store_true", help="바뀌지 않은 사진도 다시 처리")
+    args = ap.parse_args()
+
     if not DATA_FILE.exists():
         print("plants.json 없음:", DATA_FILE)
         return
-    data = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-    changed = False
+    store = PlantStore(DATA_FILE)
+    data = store.all()
+    jobs = {}
+    for p in data:
+        photo = (p.get("photo") or "").strip()
+        if not photo or photo.startswith(("http://", "https://", "data:")):
+            continue
+        dst = OUT_DIR / f"{p.get('id','plant')}.jpg"
+        src = resolve_photo(ROOT, photo)
+        if not src:
+            print("파일 없음:", photo)
+            continue
+        if src.resolve() == dst.resolve():
+            # 이미 static_photos/ 에 있는 결과물 — 다시 압축하지 않음
+            continue
+        jobs[id(p)] = pipeline.Job(src, dst, {"max_dim": MAX_DIM, "fmt": "JPEG", "quality": JPEG_QUALITY})
+
+    results = pipeline.run(list(jobs.values()), pipeline.resize_image, OUT_DIR,
+                           workers=args.workers, force=args.force)
+    ok = {r.job.dst for r in results if r.status != "failed"}
+    for r in results:
+        if r.status == "failed":
+            print("이미지 열기 실패(손상 가능):", r.job.src, r.error)
+    if any(r.status == "failed" for r in results):
+        print("손상된 사진은 한 번에 검사/복구할 수 있습니다: python scripts/check_and_fix_image.py --repair")
+
+    changed = []
     for p in data:
-        photo = p.get("photo") or ""
-        if not photo:
+        job = jobs.get(id(p))
+        if not job or job.dst not in ok:
             continue
-        src = ROOT / photo
-        if not src.exists():
-            # try relative from repo root (in case photo paths are without folder)
-            src = ROOT / "photo" / Path(photo).name
-        if src.exists():
-            dst = OUT_DIR / f"{p.get('id','plant')}.jpg"
-            ok = safe_open_and_save(src, dst)
-            if ok:
-                new_path = str(Path("static_photos") / dst.name)
-                if p.get("photo") != new_path:
-                    p["photo"] = new_path
-                    changed = True
-                    print("재저장 및 경로 갱신:", src, "->", new_path)
-            else:
-                print("이미지 열기 실패(손상 가능):", src)
-        else:
-            print("파일 없음:", src)
+        new_path = str(Path("static_photos") / job.dst.name)
+        if p.get("photo") != new_path:
+            changed.append({**p, "photo": new_path})
+            print("재저장 및 경로 갱신:", job.src, "->", new_path)
+    print(f"처리 {sum(r.status == 'done' for r in results)}개, 건너뜀 {sum(r.status == 'skipped' for r in results)}개")
     if changed:
         bak = DATA_FILE.with_suffix(".bak")
         shutil.copy2(DATA_FILE, bak)
-        DATA_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        store.upsert(changed)
+        store.export_json()
         print("plants.json 업데이트 및 백업 생성:", bak)
     else:
         print("변경 없음.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# 지도 이미지를 딥줌(deep-zoom) 타일 피라미드로 잘라 tiles/<지도이름>/ 에 저장합니다.
+# 뷰어(streamlit_app.py, server 모드)는 현재 화면에 보이는 타일만 불러오므로
+# 고해상도 항공/현장 사진을 써도 처음 내려받는 양은 늘지 않습니다.
+#
+# 사용법: make_tiles.py [지도 이미지 ...] [--tile-size 256] [--quality 80]
+#   (이미지를 지정하지 않으면 map/ 폴더의 모든 이미지를 처리)
+#
+# 출력 구조:
+#   tiles/<stem>/tiles.json                     크기/레벨/버전 정보
+#   tiles/<stem>/<version>/<level>/<col>_<row>.jpg
+# level 0 은 한 타일에 들어가는 가장 작은 이미지, 마지막 레벨이 원본 해상도입니다.
+# <version> 은 원본 파일 해시(+ TILER_VERSION)라서 타일 URL을 오래 캐시해도 안전합니다.
+# 타일은 EXIF 방향대로 세운 이미지에서 자르므로 앱의 지도 이미지와 겹쳐집니다.
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from compress_images import JPEG_QUALITY
+
+ROOT = Path(__file__).resolve().parents[1]
+MAP_DIR = ROOT / "map"
+TILES_DIR = ROOT / "tiles"
+TILE_SIZE = 256
+MAP_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+# 자르는 방식이 바뀌면 올립니다 (새 버전 폴더로 다시 만들어짐)
+#   2: EXIF 방향 적용
+TILER_VERSION = 2
+
+
+def file_hash(p: Path) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def level_count(w: int, h: int, tile_size: int) -> int:
+    longest = max(w, h)
+    return (math.ceil(math.log2(longest / tile_size)) if longest > tile_size else 0) + 1
+
+
+def build_pyramid(src: Path, out_root: Path = TILES_DIR, tile_size: int = TILE_SIZE, quality: int = JPEG_QUALITY) -> dict:
+    out = out_root / src.stem
+    info_file = out / "tiles.json"
+    version = hashlib.sha256(f"{file_hash(src)}:{TILER_VERSION}".encode()).hexdigest()[:12]
+    if info_file.exists():
+        try:
+            info = json.loads(info_file.read_text(encoding="utf-8"))
+            if info.get("version") == version and info.get("tile_size") == tile_size:
+                print("변경 없음(건너뜀):", src)
+                return info
+        except Exception:
+            pass
+
+    with Image.open(src) as im:
+        # 휴대폰 사진은 EXIF 방향(5~8이면 가로세로가 바뀜)대로 세워야 지도 이미지와 맞습니다
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        w, h = im.size
+        levels = level_count(w, h, tile_size)
+        level_img = im
+        # 원본 해상도(마지막 레벨)부터 절반씩 줄여 가며 자릅니다.
+        for level in range(levels - 1, -1, -1):
+            lw, lh = level_img.size
+            d = out / version / str(level)
+            d.mkdir(parents=True, exist_ok=True)
+            for row in range(math.ceil(lh / tile_size)):
+                for col in range(math.ceil(lw / tile_size)):
+                    box = (col * tile_size, row * tile_size,
+                           min(lw, (col + 1) * tile_size), min(lh, (row + 1) * tile_size))
+                    level_img.crop(box).save(d / f"{col}_{row}.jpg", "JPEG", quality=quality, optimize=True)
+            if level:
+                level_img = level_img.resize((math.ceil(lw / 2), math.ceil(lh / 2)), Image.LANCZOS)
+
+    info = {
+        "source": src.name,
+        "version": version,
+        "width": w,
+        "height": h,
+        "tile_size": tile_size,
+        "levels": levels,
+        "format": "jpg",
+    }
+    tmp = info_file.with_name(info_file.name + ".tmp")
+    tmp.write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, info_file)
+    # 이전 버전 타일 정리 (tiles.json 교체 후에 지워야 중간 상태가 보이지 않음)
+    for old in out.iterdir():
+        if old.is_dir() and old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    print(f"{src}: {w}x{h}, 레벨 {levels}개 -> {out / version}")
+    return info
+
+
+def main():
+    ap = argparse.ArgumentParser(description="지도 이미지 타일 피라미드 생성")
+    ap.add_argument("images", nargs="*", type=Path)
+    ap.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    ap.add_argument("--quality", type=int, default=JPEG_QUALITY)
+    ap.add_argument("--out", type=Path, default=TILES_DIR)
+    args = ap.parse_args()
+
+    images = args.images
+    if not images and MAP_DIR.exists():
+        images = sorted(p for p in MAP_DIR.iterdir() if p.suffix.lower() in MAP_EXTS and p.is_file())
+    if not images:
+        print("처리할 지도 이미지가 없습니다.")
+        sys.exit(1)
+    for p in images:
+        try:
+            build_pyramid(p, args.out, args.tile_size, args.quality)
+        except Exception as e:
+            print("실패:", p, e)
+
+
+if __name__ == "__main__":
+    main()
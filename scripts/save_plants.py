@@ -1,20 +1,48 @@
 #!/usr/bin/env python3
-import sys
+# plants.json 을 저장합니다. 데이터는 data/plants.db(SQLite)에 id 별로 저장되고
+# 바뀐 항목만 기록한 뒤 plants.json 으로 내보냅니다.
+#
+# 사용법: save_plants.py <input.json>            전체 목록으로 교체
+#         save_plants.py --upsert <input.json>   id 가 같은 항목만 갱신/추가
+#         save_plants.py --delete <id> [<id> ...]
+#         save_plants.py --import <survey.csv|.jsonl|.geojson> [--bounds W,S,E,N]
+#                                                조사 결과를 한 줄씩 읽어 id 기준으로 병합
+#         [--image-report build/image_report.json]  손상된 사진을 가리키는 항목 거부
+#         (input.json 대신 stdin 으로 JSON 전달 가능)
+#
+# 저장 전에 모든 항목을 검사합니다: id 가 있고 겹치지 않는지, x/y 가 있고 0~100 인지
+# (--import 로 이미 있는 id 에 병합할 때는 빠진 x/y 를 저장된 값으로 채움),
+# 사진 파일이 있는지, "map" 이 map/maps.json 에 있는 지도인지. --image-report 를 주면
+# check_and_fix_image.py 보고서로 사진이 손상되지 않았는지도 봅니다 (보고서 이후
+# 바뀐 사진은 그 자리에서 검사). 하나라도 틀리면 아무것도 쓰지 않습니다 (--skip-invalid 로
+# 틀린 항목만 건너뛰기). 기록은 한 트랜잭션으로, plants.json 은 임시 파일을
+# 바꿔치기하는 방식으로 씁니다.
+#
+# 백업(plants.json.bak.<시각>)은 실제로 바뀐 것이 있을 때만 만들고,
+# 최근 --keep-backups 개(기본 10)만 남깁니다.
+import argparse
 import json
 import shutil
-from pathlib import Path
+import sys
 from datetime import datetime
+from pathlib import Path
 
 WORK = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(WORK))
+
+from ecomap.maps import load_maps  # noqa: E402
+from ecomap.photos import resolve_photo  # noqa: E402
+from ecomap.plant_import import FORMATS, read_records  # noqa: E402
+from ecomap.plants import PlantStore, validate_plant  # noqa: E402
+
 DATA_FILE = WORK / "data" / "plants.json"
+MAP_DIR = WORK / "map"
+KEEP_BACKUPS = 10
+MAX_REPORT = 20  # 오류는 이만큼만 출력
 
-def usage():
-    print("사용법: save_plants.py <input.json>    또는 stdin으로 JSON 전달")
-    sys.exit(2)
 
-def main():
-    if len(sys.argv) == 2:
-        src = Path(sys.argv[1])
+def read_input(src):
+    if src is not None:
         if not src.exists():
             print("입력 파일이 없습니다:", src)
             sys.exit(1)
@@ -22,30 +50,169 @@ def main():
     else:
         text = sys.stdin.read()
         if not text.strip():
-            usage()
+            print("입력이 비어 있습니다. 파일을 주거나 stdin 으로 JSON 을 전달하세요.")
+            sys.exit(2)
 
     try:
-        obj = json.loads(text)
+        return json.loads(text)
     except Exception as e:
         print("JSON 파싱 실패:", e)
         sys.exit(1)
 
-    # 간단 검증: 최상위가 리스트인지 확인
-    if not isinstance(obj, list):
-        print("경고: 최상위 JSON 타입이 리스트가 아닙니다. 계속 저장하려면 확인하세요.")
 
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    # 백업
-    if DATA_FILE.exists():
-        bak = DATA_FILE.with_name(DATA_FILE.name + ".bak." + datetime.utcnow().strftime("%Y%m%dT%H%M%SZ"))
-        shutil.copy2(DATA_FILE, bak)
-        print("백업 생성:", bak)
+def photo_problem(rec, image_report):
+    photo = rec.get("photo")
+    if not isinstance(photo, str) or not photo.strip() or photo.startswith(("http://", "https://", "data:")):
+        return None
+    src = resolve_photo(WORK, photo.strip())
+    if src is None:
+        return None  # validate_plant 가 이미 알림
+    from ecomap import integrity
+
+    why = integrity.problem(image_report, src)
+    return f"photo {why}: {photo}" if why else None
+
+
+def check(items, allow_missing_photos=False, image_report=None, stored_ids=()):
+    """(위치, 항목) 들을 하나씩 검사해 (통과한 항목, 오류, 경고, 읽은 수) 를 돌려줍니다.
+
+    image_report 는 integrity.load_report() 결과 (주면 사진 손상도 검사).
+    stored_ids 의 항목은 병합(--import)되므로 x/y 가 없어도 저장된 값을 씁니다."""
+    good, errors, warnings = [], [], []
+    seen = set()
+    total = 0
+    map_ids = {m.id for m in load_maps(MAP_DIR)}
+    for where, rec in items:
+        total += 1
+        pid = rec.get("id") if isinstance(rec, dict) else None
+        problems = validate_plant(rec, WORK, map_ids, require_xy=not (isinstance(pid, str) and pid in stored_ids))
+        if allow_missing_photos:
+            warnings += [f"{where}: {p}" for p in problems if p.startswith("photo not found")]
+            problems = [p for p in problems if not p.startswith("photo not found")]
+        if image_report is not None and isinstance(rec, dict) and not problems:
+            problems += filter(None, [photo_problem(rec, image_report)])
+        if isinstance(pid, str) and pid in seen:
+            problems.append(f"duplicate id: {pid}")
+        if problems:
+            errors += [f"{where}: {p}" for p in problems]
+            continue
+        seen.add(pid)
+        good.append(rec)
+    return good, errors, warnings, total
+
+
+def report(title, lines):
+    if not lines:
+        return
+    print(f"{title} {len(lines)}건:")
+    for line in lines[:MAX_REPORT]:
+        print("  ", line)
+    if len(lines) > MAX_REPORT:
+        print(f"   ... 외 {len(lines) - MAX_REPORT}건")
+
+
+def parse_bounds(s):
     try:
-        DATA_FILE.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+        west, south, east, north = (float(v) for v in s.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("W,S,E,N 형식의 숫자 4개가 필요합니다") from None
+    if west >= east or south >= north:
+        raise argparse.ArgumentTypeError("W < E, S < N 이어야 합니다")
+    return west, south, east, north
+
+
+def backup(keep):
+    if not DATA_FILE.exists():
+        return
+    bak = DATA_FILE.with_name(DATA_FILE.name + ".bak." + datetime.utcnow().strftime("%Y%m%dT%H%M%SZ"))
+    shutil.copy2(DATA_FILE, bak)
+    print("백업 생성:", bak)
+    # 이름에 시각이 들어 있어 이름순 = 시간순
+    old = sorted(DATA_FILE.parent.glob(DATA_FILE.name + ".bak.*"))[:-keep]
+    for p in old:
+        p.unlink()
+    if old:
+        print(f"오래된 백업 {len(old)}개 삭제")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="식물 목록 저장")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--upsert", action="store_true", help="id 가 같은 항목만 갱신/추가")
+    mode.add_argument("--delete", action="store_true", help="인자로 준 id 들을 삭제")
+    mode.add_argument("--import", dest="import_", action="store_true",
+                      help="CSV / JSON Lines / GeoJSON 조사 결과를 id 기준으로 병합")
+    ap.add_argument("args", nargs="*", help="입력 파일 (없으면 stdin), --delete 이면 id 들")
+    ap.add_argument("--format", choices=FORMATS, help="--import 입력 형식 (기본: 확장자로 판단)")
+    ap.add_argument("--bounds", type=parse_bounds, help="GeoJSON 좌표를 x/y 로 바꿀 지도 범위 W,S,E,N (경도/위도)")
+    ap.add_argument("--skip-invalid", action="store_true", help="틀린 항목만 건너뛰고 나머지는 저장")
+    ap.add_argument("--allow-missing-photos", action="store_true", help="사진 파일이 없어도 경고만 출력")
+    ap.add_argument("--image-report", type=Path,
+                    help="check_and_fix_image.py 가 쓴 보고서; 손상된 사진을 가리키는 항목은 오류")
+    ap.add_argument("--keep-backups", type=int, default=KEEP_BACKUPS, help=f"남길 백업 수 (기본 {KEEP_BACKUPS}, 0 이면 백업 안 함)")
+    args = ap.parse_args()
+    store = PlantStore(DATA_FILE)
+
+    if args.delete:
+        if not args.args:
+            ap.error("삭제할 id 를 주세요")
+        changed = store.delete(args.args)
+        print(f"삭제: {changed}개")
+    else:
+        if len(args.args) > 1:
+            ap.error("입력 파일은 하나만 줄 수 있습니다")
+        src = Path(args.args[0]) if args.args else None
+        if args.import_:
+            items = read_records(src or "-", args.format, args.bounds)
+        else:
+            obj = read_input(src)
+            if args.upsert and isinstance(obj, dict):
+                obj = [obj]
+            if not isinstance(obj, list):
+                print("최상위 JSON 타입이 리스트가 아닙니다.")
+                sys.exit(1)
+            items = [(f"item {n}", p) for n, p in enumerate(obj, 1)]
+
+        image_report = None
+        if args.image_report:
+            from ecomap import integrity
+
+            try:
+                image_report = integrity.load_report(args.image_report, WORK)
+            except (OSError, ValueError, KeyError) as e:
+                print("이미지 보고서를 읽을 수 없습니다:", args.image_report, e)
+                sys.exit(1)
+        try:
+            stored_ids = set(store.snapshot().by_id) if args.import_ else ()
+            good, errors, warnings, total = check(items, args.allow_missing_photos, image_report, stored_ids)
+        except (OSError, ValueError) as e:
+            print("입력을 읽을 수 없습니다:", e)
+            sys.exit(1)
+        report("경고", warnings)
+        report("오류", errors)
+        if errors and not args.skip_invalid:
+            print("저장하지 않았습니다. 틀린 항목을 고치거나 --skip-invalid 를 쓰세요.")
+            sys.exit(1)
+        if args.import_ or args.upsert:
+            changed = store.upsert(good, merge=args.import_)
+            print(f"읽음: {total}개, 건너뜀: {total - len(good)}개, 갱신/추가: {changed}개")
+        else:
+            written, deleted = store.replace_all(good)
+            changed = written + deleted
+            print(f"변경: {written}개, 삭제: {deleted}개")
+
+    if not changed and DATA_FILE.exists():
+        print("바뀐 것이 없습니다.")
+        return
+    if args.keep_backups > 0:
+        backup(args.keep_backups)
+    try:
+        store.export_json()
         print("저장 완료:", DATA_FILE)
     except Exception as e:
         print("파일 쓰기 실패:", e)
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# 앱을 시작하기 전에 지도 이미지와 식물 사진을 미리 처리해 .cache/assets/ 에
+# 넣어 둡니다. streamlit_app.py 와 같은 캐시 키를 쓰므로, 첫 방문자부터
+# 이미지를 새로 만들지 않고 디스크 캐시에서 바로 읽습니다.
+# 이미 캐시에 있는 이미지는 건너뛰고, 나머지는 CPU 코어 수만큼 병렬로 처리합니다.
+#
+# (앱도 시작하면 같은 작업을 백그라운드에서 하지만, 이 스크립트는 방문자가
+#  오기 전에, 여러 프로세스로 끝낼 수 있습니다.)
+#
+# 사용법: warm_cache.py [--workers N]
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ecomap.asset_cache import AssetCache, asset_key  # noqa: E402
+from ecomap.imaging import encode_image  # noqa: E402
+from ecomap.photos import AssetIndex, ResolvedFile  # noqa: E402
+from ecomap.plants import PlantStore  # noqa: E402
+from ecomap.warmup import QUALITY, image_jobs  # noqa: E402
+
+DATA_FILE = ROOT / "data" / "plants.json"
+MAP_DIR = ROOT / "map"
+CACHE_DIR = ROOT / ".cache" / "assets"  # streamlit_app.py 와 같은 위치
+
+_cache = None
+
+
+def warm(src: ResolvedFile, max_width: int) -> bool:
+    """이미지 하나를 캐시에 넣습니다. 새로 만들었으면 True."""
+    global _cache
+    if _cache is None:
+        _cache = AssetCache(CACHE_DIR, memory_items=0)
+    key = asset_key(src.path, src.stat, max_width=max_width, quality=QUALITY, fmt=None)
+    if _cache.get(key) is not None:
+        return False
+    _cache.put(key, *encode_image(src.path, max_width, QUALITY))
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="이미지 캐시 미리 채우기")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    args = ap.parse_args()
+
+    plants = PlantStore(DATA_FILE).all() if DATA_FILE.exists() else []
+    index = AssetIndex(ROOT, MAP_DIR, watch=False)
+    jobs = image_jobs(index, index.maps(), plants)
+
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(warm, src, w): src for src, w in jobs}
+        for fut in as_completed(futures):
+            try:
+                counts["done" if fut.result() else "skipped"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                print("실패:", futures[fut].path, e)
+    print(f"처리 {counts['done']}개, 건너뜀 {counts['skipped']}개, 실패 {counts['failed']}개 -> {CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,302 +1,362 @@
 import streamlit as st
 from pathlib import Path
+import os
 import json
 import base64
-import mimetypes
-from io import BytesIO
-from PIL import Image
+import logging
+import time
+from functools import partial
+from urllib.parse import quote
+
+from ecomap.asset_cache import AssetCache, SingleFlight, asset_key
+from ecomap.asset_server import AssetStore, start_asset_server
+from ecomap.imaging import encode_image
+from ecomap.metrics import RenderMetrics
+from ecomap.maps import MapDef, split_plants
+from ecomap.photos import AssetIndex, ResolvedFile
+from ecomap.plants import PlantStore
+from ecomap.viewer import map_payload, render as render_viewer, tiles_config
+from ecomap.warmup import MAP_WIDTH, PHOTO_WIDTH, QUALITY, Warmup, image_jobs
 
 st.set_page_config(page_title="운광초등학교 생태지도", layout="wide")
 
 ROOT = Path(__file__).resolve().parents[0]
 DATA_FILE = ROOT / "data" / "plants.json"
 MAP_DIR = ROOT / "map"
+CACHE_DIR = ROOT / ".cache" / "assets"
+PUBLISH_DIR = ROOT / ".cache" / "published"
+TILES_DIR = ROOT / "tiles"  # written by scripts/make_tiles.py
+BUILD_DIR = ROOT / "build" / "assets"  # written by scripts/build_assets.py
+
+# "inline": images are base64-embedded in the component HTML (works everywhere)
+# "server": images are served with long-lived cache headers by a small asset
+#           server on ECOMAP_ASSET_PORT; the component only carries their URLs.
+#           Set ECOMAP_ASSET_BASE_URL when it sits behind a proxy / https.
+ASSET_MODE = os.environ.get("ECOMAP_ASSET_MODE", "inline")
+ASSET_PORT = int(os.environ.get("ECOMAP_ASSET_PORT", "8502"))
+ASSET_BASE_URL = os.environ.get("ECOMAP_ASSET_BASE_URL", "")
+# size cap of the published files (.cache/published), oldest unused first
+PUBLISH_BYTES = int(os.environ.get("ECOMAP_PUBLISH_MB", 512)) * 2**20
+# instrumentation: every run logs a JSON summary to the "ecomap.render" logger;
+# ECOMAP_METRICS_FILE also writes it as Prometheus-style text, and
+# ECOMAP_DEBUG=1 (or ?debug=1 in the URL) shows it in a debug panel
+METRICS_FILE = os.environ.get("ECOMAP_METRICS_FILE", "")
+DEBUG = os.environ.get("ECOMAP_DEBUG", "") not in ("", "0")
+
+log = logging.getLogger("ecomap.render")
+if DEBUG and not log.handlers:
+    log.addHandler(logging.StreamHandler())
+    log.setLevel(logging.INFO)
+metrics = RenderMetrics()
 
-def choose_map_file():
-    exts = {".jpg", ".jpeg", ".png", ".webp", ".svg"}
-    if MAP_DIR.exists():
-        imgs = [p for p in MAP_DIR.iterdir() if p.suffix.lower() in exts and p.is_file()]
-        if imgs:
-            return sorted(imgs, key=lambda p: p.stat().st_size, reverse=True)[0]
-    return MAP_DIR / "school-map.jpg"
+@st.cache_resource
+def get_asset_index() -> AssetIndex:
+    # photo paths and the map registry, resolved once per process and refreshed on
+    # file changes, so a rerun makes no existence checks or directory listings
+    return AssetIndex(ROOT, MAP_DIR)
 
-MAP_FILE = choose_map_file()
+asset_index = get_asset_index()
+
+@st.cache_resource
+def get_asset_cache() -> AssetCache:
+    # one cache per server process, shared by every session and rerun
+    return AssetCache(CACHE_DIR)
+
+# processed bytes are cached by (path, mtime, size, max_width, quality, fmt);
+# `stat` (from the asset index) saves the stat call for the key
+def encode_image_cached(path: Path, max_width: int = 1600, quality: int = 80, fmt: str | None = None, stat=None) -> tuple[str, bytes, str]:
+    t = time.perf_counter()
+    encoded = []
+    def create():
+        encoded.append(True)
+        return encode_image(path, max_width, quality, fmt)
+    key = asset_key(path, stat, max_width=max_width, quality=quality, fmt=fmt)
+    b, mime = get_asset_cache().get_or_create(key, create)
+    metrics.asset(path, time.perf_counter() - t, len(b), cached=not encoded)
+    return key, b, mime
 
 # utility: load image file and produce a data:...;base64,... URL (with resize/compression)
-def make_data_url(path: Path, max_width: int = 1600, quality: int = 80) -> str | None:
+def make_data_url(path: Path, max_width: int = 1600, quality: int = 80, fmt: str | None = None, stat=None) -> str | None:
     try:
-        with Image.open(path) as img:
-            # convert animated/webp with frames -> use first frame
-            if getattr(img, "is_animated", False):
-                img = img.convert("RGBA")
-            orig_w, orig_h = img.size
-            if orig_w > max_width:
-                new_h = int(orig_h * (max_width / orig_w))
-                img = img.resize((max_width, new_h), Image.LANCZOS)
-            fmt = img.format if img.format else "PNG"
-            buf = BytesIO()
-            save_kwargs = {}
-            if fmt.upper() in ("JPEG", "JPG"):
-                save_kwargs["quality"] = quality
-                save_fmt = "JPEG"
-            elif fmt.upper() == "WEBP":
-                save_kwargs["quality"] = quality
-                save_fmt = "WEBP"
-            else:
-                # keep PNG for transparency
-                save_fmt = "PNG"
-            img.save(buf, format=save_fmt, **save_kwargs)
-            b = buf.getvalue()
-        mime, _ = mimetypes.guess_type(path.as_posix())
-        if not mime:
-            mime = "image/png" if save_fmt == "PNG" else f"image/{save_fmt.lower()}"
+        _, b, mime = encode_image_cached(path, max_width, quality, fmt, stat)
         return "data:" + mime + ";base64," + base64.b64encode(b).decode("ascii")
+    except Exception as e:
+        log.exception("could not encode %s", path)
+        metrics.error(f"{path}: {e}")
+        return None
+
+@st.cache_resource
+def get_asset_store() -> AssetStore:
+    store = AssetStore(PUBLISH_DIR, max_bytes=PUBLISH_BYTES)
+    store.mounts["t"] = TILES_DIR
+    store.mounts["v"] = BUILD_DIR
+    if ASSET_MODE == "server":
+        start_asset_server(store, port=ASSET_PORT)
+    return store
+
+def asset_base_url() -> str:
+    if ASSET_BASE_URL:
+        return ASSET_BASE_URL.rstrip("/") + "/"
+    # same host the visitor used for the app, asset server port
+    try:
+        host = st.context.headers.get("Host") or "localhost"
     except Exception:
+        host = "localhost"
+    return f"http://{host.rsplit(':', 1)[0]}:{ASSET_PORT}/"
+
+# utility: image -> URL for the viewer (data URL or hashed, cacheable asset URL)
+# (`base` is the asset server URL; pass it when not running in a script run)
+def make_asset_url(path: Path, max_width: int = 1600, quality: int = 80, fmt: str | None = None, stat=None, base: str | None = None) -> str | None:
+    if ASSET_MODE != "server":
+        return make_data_url(path, max_width, quality, fmt, stat)
+    try:
+        key, b, mime = encode_image_cached(path, max_width, quality, fmt, stat)
+        return (base or asset_base_url()) + "a/" + get_asset_store().publish(b, mime, key=key)
+    except Exception as e:
+        log.exception("could not publish %s", path)
+        metrics.error(f"{path}: {e}")
         return None
 
+@st.cache_resource
+def get_plant_store() -> PlantStore:
+    # keeps the parsed catalogue between reruns; reloads only when plants.json/plants.db change
+    return PlantStore(DATA_FILE)
+
 # load plants
-try:
-    plants = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-except Exception:
-    plants = []
-
-# build photo map
-photo_map = {}
-for p in plants:
-    pid = p.get("id")
-    photo = (p.get("photo") or "").strip()
-    if not pid or not photo:
-        continue
-    # Keep external/data URIs as-is
-    if photo.startswith(("http://", "https://", "data:")):
-        photo_map[pid] = photo
-        continue
-    src = ROOT / photo
-    if not src.exists():
-        alt = ROOT / "photo" / Path(photo).name
-        if alt.exists():
-            src = alt
-    if not src.exists():
-        alt2 = ROOT / "static_photos" / Path(photo).name
-        if alt2.exists():
-            src = alt2
-    if src.exists():
-        # create reasonable-sized data URL (sidebar images)
-        data_url = make_data_url(src, max_width=800, quality=80)
-        if data_url:
-            photo_map[pid] = data_url
-        else:
-            # fallback to relative path (best-effort)
+with metrics.span("plants"):
+    try:
+        plant_snapshot = get_plant_store().snapshot()
+        plants, plants_by_id = plant_snapshot.plants, plant_snapshot.by_id
+    except Exception as e:
+        log.exception("could not load %s", DATA_FILE)
+        metrics.error(f"{DATA_FILE}: {e}")
+        plant_snapshot, plants, plants_by_id = None, [], {}
+
+# responsive variants from scripts/build_assets.py (server mode only); the
+# viewer turns {"w": widths, "t": {mime: names}} entries into <picture>/srcset
+with metrics.span("variants"):
+    variants = {}
+    variant_base = None
+    if ASSET_MODE == "server":
+        try:
+            variants = json.loads((BUILD_DIR / "manifest.json").read_text(encoding="utf-8"))
+            variant_base = asset_base_url() + "v/"
+        except Exception:
+            variants = {}
+
+# which map to show: ?map=<id>, else the first one in map/maps.json. With
+# inline images another map is picked here (a rerun that ships only that map);
+# with the asset server the viewer fetches other maps itself (see serve_map)
+with metrics.span("maps"):
+    maps = asset_index.maps()
+    try:
+        map_id = st.query_params.get("map")
+    except Exception:
+        map_id = None
+    if ASSET_MODE != "server" and len(maps) > 1:
+        titles = {m.id: m.title for m in maps}
+        ids = list(titles)
+        map_id = st.selectbox("지도", ids, index=ids.index(map_id) if map_id in ids else 0, format_func=titles.get)
+    current_map = next((m for m in maps if m.id == map_id), maps[0])
+    base = asset_base_url() if ASSET_MODE == "server" else None
+
+@st.cache_resource
+def get_warmup() -> Warmup:
+    # one per server process; with the asset server, GET /ready reports its status
+    # (inline mode has no route of its own: see the warm_* metrics instead)
+    warmup = Warmup()
+    if ASSET_MODE == "server":
+        get_asset_store().health = warmup.status
+    return warmup
+
+# runs on the warm-up's threads: the same cache keys as make_asset_url and
+# serve_plant_photo, so a session needing the image finds it (or waits for it)
+def warm_image(cache: AssetCache, store: AssetStore | None, src: ResolvedFile, max_width: int) -> None:
+    key = asset_key(src.path, src.stat, max_width=max_width, quality=QUALITY, fmt=None)
+    b, mime = cache.get_or_create(key, lambda: encode_image(src.path, max_width, QUALITY))
+    if store is not None:
+        store.publish(b, mime, key=key)
+
+# every map image and plant photo is processed in the background from the
+# first run on (and again, mostly as cache hits, when the catalogue changes),
+# so the sessions of a class opening the app together don't all encode them
+with metrics.span("warmup"):
+    warmup = get_warmup()
+    if plant_snapshot is not None:
+        warm = partial(warm_image, get_asset_cache(), get_asset_store() if ASSET_MODE == "server" else None)
+        warmup.start(lambda: [partial(warm, f, w) for f, w in image_jobs(asset_index, maps, plants)],
+                     tag=(plant_snapshot, maps))
+
+# photo map for one map's plants
+# inline mode embeds every photo up front; server mode only passes a URL
+# prefix and the asset server resolves/encodes a photo when it is first
+# requested (see serve_plant_photo), so startup cost doesn't grow with the catalogue
+def build_photo_map(plants: list[dict], base: str | None) -> dict:
+    photo_map = {}
+    built_photos = variants.get("photos", {})
+    photo_files = asset_index.photos(plants)
+    for p in plants:
+        pid = p.get("id")
+        photo = (p.get("photo") or "").strip()
+        if not pid or not photo:
+            continue
+        # Keep external/data URIs as-is
+        if photo.startswith(("http://", "https://", "data:")):
+            photo_map[pid] = photo
+            continue
+        if pid in built_photos:
+            photo_map[pid] = {"w": built_photos[pid]["w"], "t": built_photos[pid]["t"]}
+            continue
+        if base:
+            continue
+        src = photo_files.get(pid)
+        if src:
+            # create reasonable-sized image URL (sidebar images)
+            data_url = make_asset_url(src.path, max_width=PHOTO_WIDTH, quality=QUALITY, stat=src.stat)
+            if data_url:
+                photo_map[pid] = data_url
+            else:
+                # fallback to relative path (best-effort)
+                try:
+                    photo_map[pid] = str(src.path.relative_to(ROOT).as_posix())
+                except Exception:
+                    photo_map[pid] = photo
+    return photo_map
+
+def build_map_payload(m: MapDef, plants: list[dict], base: str | None) -> dict:
+    entry = asset_index.map_file(m.id)
+    with metrics.span("photos"):
+        photo_map = build_photo_map(plants, base)
+    # map image (resized/compressed)
+    with metrics.span("map"):
+        map_url = None
+        if entry:
             try:
-                photo_map[pid] = str(src.relative_to(ROOT).as_posix())
+                # create a URL for the map image (limit width to keep payload reasonable)
+                map_url = make_asset_url(entry.path, max_width=MAP_WIDTH, quality=QUALITY, stat=entry.stat, base=base)
+                if map_url is None:
+                    map_url = str(entry.path.relative_to(ROOT).as_posix())
             except Exception:
-                photo_map[pid] = photo
+                map_url = None
+    # deep-zoom tile pyramid for the map, if one was built (needs the asset server)
+    with metrics.span("tiles"):
+        map_tiles = None
+        if base:
+            try:
+                info = json.loads((TILES_DIR / m.image.stem / "tiles.json").read_text(encoding="utf-8"))
+                map_tiles = tiles_config(info, base + f"t/{m.image.stem}/{info['version']}/")
+            except Exception:
+                map_tiles = None
+    map_variants = variants.get("maps", {}).get(m.image.name)
+    return map_payload(m.id, plants, photo_map, map_url, map_variants, map_tiles)
+
+@st.cache_resource
+def get_payload_builds() -> SingleFlight:
+    # sessions asking for the same map while it is being built wait for that build
+    return SingleFlight()
 
-# prepare map data URI (resized/compressed)
-map_data_url = None
-if MAP_FILE.exists():
+@st.cache_resource
+def get_map_payloads() -> dict:
+    # map id -> (inputs, payload), plus "" -> the plant split for the current
+    # snapshot; each map is rebuilt only when its own plants, photos, image,
+    # built variants or tiles change, so editing one floor's plants leaves the others cached
+    return {}
+
+def tiles_sig(m: MapDef, base: str | None) -> int | None:
+    # make_tiles.py replaces tiles.json (and deletes the old tile version)
+    # on every run, so its mtime tells when the payload's tile URLs are stale
+    if not base:
+        return None
     try:
-        # create a data URL for the map image (limit width to keep payload reasonable)
-        map_data_url = make_data_url(MAP_FILE, max_width=1600, quality=80)
-        if map_data_url is None:
-            map_data_url = str(MAP_FILE.relative_to(ROOT).as_posix())
-    except Exception:
-        map_data_url = None
-
-plants_json_js = json.dumps(plants, ensure_ascii=False)
-photo_map_js = json.dumps(photo_map, ensure_ascii=False)
-map_data_url_js = json.dumps(map_data_url)
-
-# HTML template
-html_template = """<!doctype html>
-<html lang="ko">
-<head>
-<meta charset="utf-8"/>
-<meta name="viewport" content="width=device-width,initial-scale=1"/>
-<style>
-html,body{height:100%;margin:0;font-family:system-ui,-apple-system,'Segoe UI',Roboto,'Noto Sans KR',sans-serif}
-.container{display:flex;gap:12px;height:100vh;padding:12px;box-sizing:border-box;background:#f6f7f8}
-.map-area{flex:1;position:relative;display:flex;align-items:flex-start;justify-content:center;overflow:hidden;background:#e9eef0;border-radius:6px;padding:8px 8px 20px 8px} /* 상단으로 올리도록 align-items:flex-start 및 하단 여유 */
-.viewport{position:relative;touch-action:none;cursor:grab;display:inline-block}
-.map-img{display:block;width:100%;height:auto;user-select:none;pointer-events:none}
-/* 마커 크기를 원래(더 크게) 복원 */
-.marker{position:absolute;transform:translate(-50%,-100%);width:28px;height:28px;border-radius:50%;background:rgba(34,139,34,0.95);border:2px solid #fff;box-shadow:0 2px 8px rgba(0,0,0,0.28);display:flex;align-items:center;justify-content:center;color:#fff;font-weight:800;font-size:13px;cursor:pointer;pointer-events:auto}
-.marker:after{content:'';position:absolute;left:50%;bottom:-8px;transform:translateX(-50%);width:3px;height:8px;background:rgba(34,139,34,0.95)}
-.sidebar{width:360px;min-width:260px;background:#fff;border-radius:6px;padding:12px;box-shadow:0 6px 18px rgba(0,0,0,0.08);overflow:auto}
-.sidebar h2{margin:0 0 8px 0;font-size:18px}
-.sidebar select{width:100%;padding:8px;margin-bottom:8px;border-radius:6px;border:1px solid #ddd;font-size:14px}
-.sidebar img{width:100%;height:auto;border-radius:6px;margin-top:8px}
-.controls{display:flex;gap:8px;margin-top:10px;align-items:center}
-.btn{padding:8px;border-radius:6px;border:1px solid #ccc;background:#f8f8f8;cursor:pointer;font-size:13px}
-.zoom-controls{display:flex;gap:6px;margin-left:auto}
-.zoom-controls button{width:36px;height:36px;border-radius:6px;border:1px solid #ccc;background:#fff;cursor:pointer}
-.hint{color:#666;font-size:13px}
-@media(max-width:900px){.container{flex-direction:column}.sidebar{width:100%;min-width:auto}}
-</style>
-</head>
-<body>
-<div class="container">
-  <div class="map-area" id="mapArea">
-    <div id="viewport" class="viewport" style="transform-origin:0 0;transform:translate(0px,0px) scale(1);">
-      <img id="mapImg" class="map-img" src={{MAPDATA}} alt="학교 지도"/>
-    </div>
-  </div>
-  <aside class="sidebar" id="panel">
-    <h2>식물 정보</h2>
-    <select id="plantSelect"><option value="">-- 식물 선택 --</option></select>
-    <div id="details"><p class="hint">마커를 클릭하거나 목록에서 선택하세요.</p></div>
-    <div class="controls">
-      <div class="zoom-controls"><button id="zoomOut">-</button><button id="zoomIn">+</button><button id="zoomReset">◯</button></div>
-      <div style="flex:1"></div>
-    </div>
-    <div style="height:8px"></div>
-    <div class="controls"><button id="backBtn" class="btn" disabled>돌아가기</button><button id="clearBtn" class="btn">닫기</button></div>
-  </aside>
-</div>
-
-<script>
-const plants = {{PLANTS}};
-const photoMap = {{PHOTOMAP}};
-const viewport = document.getElementById('viewport'), mapImg = document.getElementById('mapImg'), mapArea = document.getElementById('mapArea');
-const details = document.getElementById('details'), sel = document.getElementById('plantSelect'), backBtn = document.getElementById('backBtn'), clearBtn = document.getElementById('clearBtn');
-const zoomInBtn = document.getElementById('zoomIn'), zoomOutBtn = document.getElementById('zoomOut'), zoomResetBtn = document.getElementById('zoomReset');
-let zoom = 1, tx = 0, ty = 0, isDragging = false, dragStart = null, history = [];
-
-function esc(s){return String(s||'').replace(/[&<>"']/g,function(m){return {'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m];});}
-
-// clamp pan so image cannot be dragged completely out of view
-function clampPan(){
-  const area = mapArea.getBoundingClientRect();
-  const imgW = mapImg.clientWidth * zoom;
-  const imgH = mapImg.clientHeight * zoom;
-  if(imgW <= area.width){
-    tx = Math.round((area.width - imgW)/2);
-  } else {
-    const minTx = area.width - imgW;
-    tx = Math.min(0, Math.max(minTx, tx));
-  }
-  if(imgH <= area.height){
-    ty = Math.round((area.height - imgH)/2);
-  } else {
-    const minTy = area.height - imgH;
-    ty = Math.min(0, Math.max(minTy, ty));
-  }
-}
-
-function setTransform(){ clampPan(); viewport.style.transform = 'translate('+tx+'px,'+ty+'px) scale('+zoom+')'; }
-
-function zoomTo(factor, cx=null, cy=null){
-  const old = zoom;
-  let newZoom = zoom * factor;
-  newZoom = Math.max(0.5, Math.min(4, newZoom));
-  const f = newZoom / old;
-  zoom = newZoom;
-  const area = mapArea.getBoundingClientRect();
-  if(cx===null||cy===null){cx = area.width/2; cy = area.height/2;}
-  const localX = cx - tx;
-  const localY = cy - ty;
-  tx = cx - localX * f;
-  ty = cy - localY * f;
-  clampPan(); setTransform();
-}
-
-zoomInBtn.addEventListener('click', ()=>{ const a = mapArea.getBoundingClientRect(); zoomTo(1.25,a.width/2,a.height/2); });
-zoomOutBtn.addEventListener('click', ()=>{ const a = mapArea.getBoundingClientRect(); zoomTo(0.8,a.width/2,a.height/2); });
-zoomResetBtn.addEventListener('click', ()=>{ zoom=1; tx=0; ty=0; setTransform(); });
-
-function populateSelect(){
-  sel.innerHTML = '<option value="">-- 식물 선택 --</option>';
-  plants.forEach(p=>{ const opt = document.createElement('option'); opt.value = p.id; opt.textContent = p.name || p.id; sel.appendChild(opt); });
-}
-
-function createMarker(p){
-  const m = document.createElement('button');
-  m.className = 'marker';
-  m.type = 'button';
-  m.title = p.name;
-  m.dataset.id = p.id;
-  m.style.left = p.x + '%';
-  m.style.top = p.y + '%';
-  m.textContent = p.label || '●';
-  m.addEventListener('click', e => { e.stopPropagation(); toggleShow(p); });
-  viewport.appendChild(m);
-}
-
-function toggleShow(p){
-  const cur = details.dataset.current || '';
-  if(cur === p.id){
-    // same marker clicked again -> hide
-    clearDetails();
-  } else {
-    showPlant(p, true);
-  }
-}
-
-mapImg.onload = function(){
-  populateSelect();
-  Array.from(viewport.querySelectorAll('.marker')).forEach(n=>n.remove());
-  plants.forEach(p=>createMarker(p));
-  if(viewport.firstChild !== mapImg) viewport.insertBefore(mapImg, viewport.firstChild);
-  clampPan(); setTransform();
-};
-if(mapImg.complete) mapImg.onload();
-
-function renderDetails(p){
-  const pm = photoMap[p.id] || p.photo || '';
-  const photoTag = (pm && pm.length>0) ? ('<img src="'+esc(pm)+'" alt="'+esc(p.name)+' 사진" onerror="this.style.display=\\'none\\'">') : '';
-  return '<strong>'+esc(p.name)+'</strong><p>'+esc(p.description||'')+'</p>' + photoTag;
-}
-function updateBackState(){ backBtn.disabled = history.length === 0; }
-
-function showPlant(p, pushHistory){
-  const cur = details.dataset.current || '';
-  if(cur && cur !== p.id && pushHistory) history.push(cur);
-  details.innerHTML = renderDetails(p);
-  details.dataset.current = p.id;
-  sel.value = p.id;
-  updateBackState();
-  const marker = viewport.querySelector(".marker[data-id='"+p.id+"']");
-  if(marker){
-    const mr = marker.getBoundingClientRect();
-    const area = mapArea.getBoundingClientRect();
-    const centerX = mr.left + mr.width/2 - area.left;
-    const centerY = mr.top + mr.height/2 - area.top;
-    tx += area.width/2 - centerX;
-    ty += area.height/2 - centerY;
-    clampPan(); setTransform();
-  }
-}
-
-function clearDetails(){ details.innerHTML = '<p class=\\'hint\\'>마커를 클릭하거나 목록에서 선택하세요.</p>'; delete details.dataset.current; sel.value = ''; updateBackState(); }
-function goBack(){ if(history.length === 0) return; const id = history.pop(); const p = plants.find(x=>x.id===id); if(p) showPlant(p,false); updateBackState(); }
-
-sel.addEventListener('change', function(){ const id = this.value; if(!id){ clearDetails(); return; } const p = plants.find(x=>x.id===id); if(p) showPlant(p,true); });
-backBtn.addEventListener('click', function(e){ e.stopPropagation(); goBack(); });
-clearBtn.addEventListener('click', function(e){ e.stopPropagation(); clearDetails(); });
-
-// dragging (pan)
-viewport.addEventListener('mousedown', function(e){ if(e.button!==0) return; isDragging=true; viewport.style.cursor='grabbing'; dragStart = {x:e.clientX, y:e.clientY, tx:tx, ty:ty}; e.preventDefault(); });
-window.addEventListener('mousemove', function(e){ if(!isDragging || !dragStart) return; const dx = e.clientX - dragStart.x; const dy = e.clientY - dragStart.y; tx = dragStart.tx + dx; ty = dragStart.ty + dy; setTransform(); });
-window.addEventListener('mouseup', function(e){ if(isDragging){ isDragging=false; viewport.style.cursor='grab'; dragStart=null; clampPan(); setTransform(); } });
-
-// touch pan
-viewport.addEventListener('touchstart', function(e){ if(e.touches.length===1){ const t=e.touches[0]; isDragging=true; dragStart={x:t.clientX,y:t.clientY,tx:tx,ty:ty}; } }, {passive:false});
-viewport.addEventListener('touchmove', function(e){ if(!isDragging||!dragStart) return; const t=e.touches[0]; const dx=t.clientX-dragStart.x; const dy=t.clientY-dragStart.y; tx=dragStart.tx+dx; ty=dragStart.ty+dy; setTransform(); e.preventDefault(); }, {passive:false});
-viewport.addEventListener('touchend', function(e){ isDragging=false; dragStart=null; clampPan(); setTransform(); });
-
-// wheel zoom with modifier
-mapArea.addEventListener('wheel', function(e){ if(e.ctrlKey || e.metaKey || e.shiftKey){ e.preventDefault(); const rect = mapArea.getBoundingClientRect(); zoomTo(e.deltaY<0?1.15:0.85, e.clientX-rect.left, e.clientY-rect.top); } }, {passive:false});
-
-// clicking empty map clears details
-mapArea.addEventListener('click', function(){ clearDetails(); });
-</script>
-</body>
-</html>
-"""
-
-html = html_template.replace("{{PLANTS}}", plants_json_js).replace("{{PHOTOMAP}}", photo_map_js).replace("{{MAPDATA}}", map_data_url_js)
-
-st.components.v1.html(html, height=820, scrolling=True)
+        return (TILES_DIR / m.image.stem / "tiles.json").stat().st_mtime_ns
+    except OSError:
+        return None
+
+def map_payload_cached(m: MapDef, base: str | None) -> dict:
+    payloads = get_map_payloads()
+    split = payloads.get("")
+    if split is None or split[0] is not plant_snapshot or split[1] != maps:
+        split = (plant_snapshot, maps, split_plants(plants, maps))
+        payloads[""] = split
+    plants_here = split[2][m.id]
+    inputs = (plants_here, asset_index.photos(plants_here), asset_index.map_file(m.id), variants, base, tiles_sig(m, base))
+    def build():
+        cached = payloads.get(m.id)
+        if cached is None or cached[0] != inputs:
+            cached = (inputs, build_map_payload(m, plants_here, base))
+            payloads[m.id] = cached
+        return cached
+    cached = payloads.get(m.id)
+    if cached is None or cached[0] != inputs:
+        cached = get_payload_builds().do(f"{m.id}\n{base}", build)
+        if cached[0] != inputs:  # shared a build made from other inputs
+            cached = build()
+    return cached[1]
+
+payload = map_payload_cached(current_map, base)
+photo_base = base + "p/" if base else None
+
+if ASSET_MODE == "server":
+    cache, store = get_asset_cache(), get_asset_store()
+
+    # called from the asset server thread for GET /p/<id>
+    def serve_plant_photo(pid: str) -> str | None:
+        p = plants_by_id.get(pid)
+        src = asset_index.photos([p]).get(pid) if p else None
+        if not src:
+            return None
+        key = asset_key(src.path, src.stat, max_width=PHOTO_WIDTH, quality=QUALITY, fmt=None)
+        b, mime = cache.get_or_create(key, lambda: encode_image(src.path, PHOTO_WIDTH, QUALITY))
+        return store.publish(b, mime, key=key)
+
+    # called from the asset server thread for GET /m/<map id>: the map's
+    # payload as a content-addressed JSON file, built the first time it is asked for
+    def serve_map(mid: str) -> str | None:
+        m = next((m for m in maps if m.id == mid), None)
+        if m is None:
+            return None
+        data = json.dumps(map_payload_cached(m, base), ensure_ascii=False, separators=(",", ":"))
+        return store.publish(data.encode("utf-8"), "application/json")
+
+    # re-registered on every run so the server always sees the current plants
+    store.lazy["p"] = serve_plant_photo
+    store.lazy["m"] = serve_map
+
+with metrics.span("render"):
+    map_list = [{"id": m.id, "title": m.title, "url": base + "m/" + quote(m.id, safe="")} for m in maps] if base else None
+    html = render_viewer(payload["plants"], payload["photos"], payload["map"], photo_base, payload["variants"],
+                         variant_base, payload["tiles"], maps=map_list, map_id=current_map.id)
+
+with metrics.span("ship"):
+    st.components.v1.html(html, height=820, scrolling=True)
+
+metrics.values["html_bytes"] = len(html.encode("utf-8"))
+metrics.values["plants"] = len(payload["plants"])
+warm_status = warmup.status()
+metrics.values["warm_ready"] = int(warm_status["state"] == "ready")
+metrics.values["warm_done"] = warm_status["done"]
+metrics.values["warm_total"] = warm_status["total"]
+metrics.values["warm_failed"] = warm_status["failed"]
+cache_stats = get_asset_cache().stats()
+summary = metrics.log(cache_stats)
+if METRICS_FILE:
+    try:
+        metrics.write_text(Path(METRICS_FILE), cache_stats)
+    except OSError:
+        log.exception("could not write %s", METRICS_FILE)
+
+try:
+    debug = DEBUG or st.query_params.get("debug") == "1"
+except Exception:
+    debug = DEBUG
+if debug:
+    with st.expander("성능 정보 (debug)", expanded=True):
+        st.json(summary, expanded=False)
+        st.write("가장 오래 걸린 이미지")
+        st.dataframe(metrics.slowest())
+        if metrics.errors:
+            st.write("오류")
+            st.code("\n".join(metrics.errors))
 
 # Run the app
 if __name__ == "__main__":
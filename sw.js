@@ -0,0 +1,91 @@
+// index.html(저장소 루트의 뷰어)용 오프라인 캐시.
+// dist/sw.js(scripts/build_site.py)와 달리 여기 파일들은 고쳐도 이름이 그대로라서
+// 저장해 둔 사본을 바로 보여 주고, 뒤에서 새로 받아 캐시를 갱신합니다:
+//   사진, 지도 이미지  캐시에 있으면 바로 (stale-while-revalidate)
+//   페이지, *.json     TIMEOUT 안에 네트워크가 답하면 그것을, 아니면 캐시 사본을
+//                      (느리거나 멈춘 와이파이에서도 기다리지 않음. 늦게 온 응답은 캐시에 들어가
+//                       다음 번에 보임)
+// 캐시 이름은 이 파일 내용의 해시입니다. sw.js 를 고치면 새 이름의 캐시로 옮겨 가고
+// (받아 둔 사본은 복사) 예전 캐시는 지웁니다.
+const PREFIX = 'ecomap/root-', META = PREFIX + 'meta';
+const TIMEOUT = 2500;  // ms
+const scope = self.registration.scope;
+const abs = p => new URL(p, scope).href;
+const PRECACHE = ['./', 'index.html', 'data/plants.json', 'map/', 'map/school-map.jpg'];
+
+async function scriptVersion(){
+  const res = await fetch(self.location.href, {cache: 'no-cache'});
+  const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', await res.arrayBuffer()));
+  return PREFIX + Array.from(digest.slice(0, 6), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// 지금 쓰는 캐시 이름 (activate 때 META 에 적어 두므로 워커가 다시 떠도 같음)
+let current = null;
+function cacheName(){
+  if(!current) current = caches.open(META).then(m => m.match('current')).then(r => r ? r.text() : PREFIX + 'v1');
+  return current;
+}
+
+self.addEventListener('install', e => e.waitUntil((async () => {
+  const name = await scriptVersion();
+  const cache = await caches.open(name);
+  const old = await caches.open(await cacheName());
+  for(const req of await old.keys()) await cache.put(req, await old.match(req));
+  // map/ 목록은 서버에 따라 없을 수 있으므로 실패해도 설치는 계속
+  await Promise.all(PRECACHE.map(p => cache.add(abs(p)).catch(() => {})));
+  await (await caches.open(META)).put('next', new Response(name));
+  await self.skipWaiting();
+})()));
+
+self.addEventListener('activate', e => e.waitUntil((async () => {
+  const meta = await caches.open(META);
+  const next = await meta.match('next');
+  if(next){
+    const name = await next.text();
+    await meta.put('current', new Response(name));
+    current = Promise.resolve(name);
+  }
+  const keep = await cacheName();
+  for(const name of await caches.keys()) if(name.startsWith(PREFIX) && name !== META && name !== keep) await caches.delete(name);
+  await self.clients.claim();
+})()));
+
+async function respond(e){
+  const req = e.request, url = req.url.split('#')[0];
+  const cache = await caches.open(await cacheName());
+  const hit = await cache.match(url) || (req.mode === 'navigate' && await cache.match(abs('index.html')));
+  let saving = null;
+  const net = fetch(req).then(res => {
+    if(res.ok) saving = cache.put(url, res.clone());
+    return res;
+  });
+  e.waitUntil(net.then(() => saving).catch(() => {}));
+  if(!hit) return net;
+  if(req.mode !== 'navigate' && !new URL(url).pathname.endsWith('.json')) return hit;
+  return Promise.race([
+    net.then(res => res.ok ? res : hit, () => hit),
+    new Promise(resolve => setTimeout(() => resolve(hit), TIMEOUT)),
+  ]);
+}
+
+self.addEventListener('fetch', e => {
+  if(e.request.method !== 'GET' || !e.request.url.startsWith(scope)) return;
+  e.respondWith(respond(e));
+});
+
+// 페이지가 plants.json 을 읽은 뒤 사진 주소들을 보내 줍니다. 아직 열어 보지 않은
+// 식물의 사진도 오프라인에서 보이도록, 캐시에 없는 것만 몇 개씩 받아 둡니다.
+self.addEventListener('message', e => {
+  const urls = e.data && Array.isArray(e.data.precache) ? e.data.precache.filter(u => u.startsWith(scope)) : [];
+  e.waitUntil((async () => {
+    const cache = await caches.open(await cacheName());
+    const todo = urls.slice();
+    async function worker(){
+      for(let url; (url = todo.pop());){
+        if(await cache.match(url)) continue;
+        try { const res = await fetch(url); if(res.ok) await cache.put(url, res); } catch(err) {}
+      }
+    }
+    await Promise.all(Array.from({length: 4}, worker));
+  })());
+});
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ecomap.asset_cache import AssetCache, SingleFlight, asset_key
+from ecomap.imaging import ENCODER_VERSION
+
+
+def until(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_single_flight_shares_one_call():
+    flight, calls, gate = SingleFlight(), [], threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(8) as pool:
+        futs = [pool.submit(flight.do, "k", work) for _ in range(8)]
+        until(lambda: flight.shared == 7)
+        gate.set()
+        assert [f.result() for f in futs] == ["result"] * 8
+    assert len(calls) == 1
+    # nothing is remembered once the call finished
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_single_flight_error_reaches_every_waiter():
+    flight, gate = SingleFlight(), threading.Event()
+
+    def fail():
+        gate.wait(5)
+        raise OSError("broken photo")
+
+    with ThreadPoolExecutor(4) as pool:
+        futs = [pool.submit(flight.do, "k", fail) for _ in range(4)]
+        until(lambda: flight.shared == 3)
+        gate.set()
+        for f in futs:
+            with pytest.raises(OSError, match="broken photo"):
+                f.result()
+
+
+def test_get_or_create_encodes_once_for_concurrent_sessions(tmp_path):
+    cache, calls, gate = AssetCache(tmp_path), [], threading.Event()
+
+    def encode():
+        calls.append(1)
+        gate.wait(5)
+        return b"jpeg", "image/jpeg"
+
+    with ThreadPoolExecutor(6) as pool:
+        futs = [pool.submit(cache.get_or_create, "key", encode) for _ in range(6)]
+        until(lambda: cache.stats()["shared_creates"] == 5)
+        gate.set()
+        assert {f.result() for f in futs} == {(b"jpeg", "image/jpeg")}
+    assert len(calls) == 1
+    assert cache.get_or_create("key", encode) == (b"jpeg", "image/jpeg") and len(calls) == 1
+
+
+def test_asset_key_changes_with_file_params_and_encoder(tmp_path):
+    f = tmp_path / "a.jpg"
+    f.write_bytes(b"one")
+    key = asset_key(f, max_width=800, quality=80)
+    assert asset_key(f, max_width=800, quality=80) == key
+    assert asset_key(f, max_width=1600, quality=80) != key
+    assert asset_key(f, encoder=ENCODER_VERSION + 1, max_width=800, quality=80) != key
+    f.write_bytes(b"two!")  # a replaced photo (new size and mtime)
+    assert asset_key(f, max_width=800, quality=80) != key
+
+
+def test_memory_tier_is_lru_and_bounded(tmp_path):
+    cache = AssetCache(None, memory_items=2, memory_bytes=10)
+    cache.put("a", b"1111", "x")
+    cache.put("b", b"2222", "x")
+    cache.get("a")  # a is now the most recent
+    cache.put("c", b"3333", "x")
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    cache.put("d", b"44444444", "x")  # over memory_bytes: a and c go, only d is left
+    assert cache.stats()["memory_bytes"] <= 10
+    cache.put("huge", b"x" * 11, "x")  # larger than the whole tier: not kept
+    assert cache.get("huge") is None
+    assert cache.stats()["memory_evictions"] == 3
+
+
+def test_disk_tier_survives_restarts_and_evicts_oldest(tmp_path):
+    cache = AssetCache(tmp_path, disk_bytes=3000)
+    for i, key in enumerate(["k1", "k2", "k3"]):
+        cache.put(key, bytes([i]) * 900, "image/webp")
+        p = tmp_path / key[:2] / key
+        os.utime(p, (1000 + i, 1000 + i))
+    assert AssetCache(tmp_path).get("k1") == (bytes([0]) * 900, "image/webp")  # a new process reads disk
+    cache.put("k4", b"\xff" * 900, "image/webp")  # 4 x 911 bytes > 3000, down to 2700
+    # k1 was read since, so k2 and k3 are the oldest
+    assert [(tmp_path / k[:2] / k).exists() for k in ["k1", "k2", "k3", "k4"]] == [True, False, False, True]
+    assert cache.stats()["disk_evictions"] == 2
@@ -0,0 +1,47 @@
+import os
+
+from ecomap.photos import AssetIndex
+
+PLANTS = [{"id": "oak", "photo": "oak.jpg"}, {"id": "elm", "photo": "elm.jpg"},
+          {"id": "web", "photo": "https://example.com/a.jpg"}]
+
+
+def touch(p, t):
+    os.utime(p, ns=(t, t))
+
+
+def setup(tmp_path):
+    (tmp_path / "photo").mkdir()
+    (tmp_path / "map").mkdir()
+    (tmp_path / "photo" / "oak.jpg").write_bytes(b"oak")
+    touch(tmp_path / "photo" / "oak.jpg", 10**18)
+    touch(tmp_path / "photo", 10**18)
+
+
+def test_photos_are_resolved_once_until_something_changes(tmp_path):
+    setup(tmp_path)
+    index = AssetIndex(tmp_path, tmp_path / "map", check_interval=0, watch=False)
+    first = index.photos(PLANTS)
+    assert list(first) == ["oak"] and first["oak"].path == (tmp_path / "photo" / "oak.jpg").resolve()
+    assert index.photos(PLANTS)["oak"] is first["oak"]
+
+    # a photo that was missing appears (its directory changes)
+    (tmp_path / "photo" / "elm.jpg").write_bytes(b"elm")
+    touch(tmp_path / "photo", 10**18 + 1)
+    assert sorted(index.photos(PLANTS)) == ["elm", "oak"]
+
+    # a replaced photo gets a fresh stat, so its asset keys change
+    (tmp_path / "photo" / "oak.jpg").write_bytes(b"new oak")
+    touch(tmp_path / "photo" / "oak.jpg", 10**18 + 2)
+    assert index.photos(PLANTS)["oak"].stat.st_size == len(b"new oak")
+
+
+def test_changes_wait_for_the_check_interval_or_invalidate(tmp_path):
+    setup(tmp_path)
+    index = AssetIndex(tmp_path, tmp_path / "map", check_interval=3600, watch=False)
+    assert list(index.photos(PLANTS)) == ["oak"]
+    (tmp_path / "photo" / "elm.jpg").write_bytes(b"elm")
+    touch(tmp_path / "photo", 10**18 + 1)
+    assert list(index.photos(PLANTS)) == ["oak"]  # not re-stat'ed yet
+    index.invalidate()  # what a watchdog event does
+    assert sorted(index.photos(PLANTS)) == ["elm", "oak"]
@@ -0,0 +1,47 @@
+import os
+import time
+
+from ecomap.asset_server import AssetStore
+
+
+def age(store, name, seconds):
+    t = time.time() - seconds
+    os.utime(store.root / name, (t, t))
+
+
+def test_publish_is_content_addressed(tmp_path):
+    store = AssetStore(tmp_path)
+    a = store.publish(b"abc", "image/jpeg", key="k1")
+    assert a.endswith(".jpg") and store.publish(b"abc", "image/jpeg") == a
+    assert store.publish(b"other", "image/jpeg", key="k1") == a  # the key skips hashing
+    assert store.path_for(a) == tmp_path / a
+    assert store.path_for("../x") is None and store.path_for(".tmp-1") is None
+
+
+def test_without_a_cap_nothing_is_evicted(tmp_path):
+    store = AssetStore(tmp_path)
+    names = [store.publish(bytes([i]) * 1000, "application/json") for i in range(20)]
+    assert all((tmp_path / n).exists() for n in names)
+
+
+def test_cap_evicts_least_recently_used_but_not_recent_files(tmp_path):
+    store = AssetStore(tmp_path, max_bytes=3500, min_age=600)
+    old = [store.publish(bytes([i]) * 1000, "image/webp", key=f"k{i}") for i in range(3)]
+    for n, name in enumerate(old):
+        age(store, name, 3600 - n)
+    store._used.clear()
+    store.path_for(old[0])  # served again: now the most recently used
+    store.publish(b"\xff" * 1000, "image/webp")
+    # 4000 bytes > 3500: the oldest unused file goes, down to 90% of the cap
+    assert [(tmp_path / n).exists() for n in old] == [True, False, True]
+    assert store.evictions == 1
+    # an evicted name is written again when its key is published
+    assert store.publish(bytes([1]) * 1000, "image/webp", key="k1") == old[1]
+    assert (tmp_path / old[1]).exists()
+
+
+def test_recently_used_files_survive_going_over_the_cap(tmp_path):
+    store = AssetStore(tmp_path, max_bytes=1500, min_age=600)
+    names = [store.publish(bytes([i]) * 1000, "image/webp") for i in range(3)]
+    assert all((tmp_path / n).exists() for n in names)
+    assert store.evictions == 0
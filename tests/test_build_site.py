@@ -0,0 +1,33 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+def test_build_site_publishes_each_maps_photos(tmp_path, load_script, monkeypatch):
+    mod = load_script("build_site")
+    (tmp_path / "map").mkdir()
+    (tmp_path / "photo").mkdir()
+    (tmp_path / "data").mkdir()
+    Image.new("RGB", (320, 200), "green").save(tmp_path / "map" / "school-map.jpg")
+    Image.new("RGB", (120, 90), "red").save(tmp_path / "photo" / "oak.jpg")
+    (tmp_path / "data" / "plants.json").write_text(json.dumps([
+        {"id": "oak", "name": "참나무", "x": 10, "y": 20, "photo": "oak.jpg"},
+        {"id": "elm", "name": "느릅나무", "x": 30, "y": 40, "photo": "https://example.com/elm.jpg"},
+        {"id": "ash", "name": "물푸레나무", "x": 50, "y": 60},
+    ], ensure_ascii=False), encoding="utf-8")
+    for name, value in [("ROOT", tmp_path), ("DATA_FILE", tmp_path / "data" / "plants.json"),
+                        ("MAP_DIR", tmp_path / "map"), ("TILES_DIR", tmp_path / "tiles"),
+                        ("ProcessPoolExecutor", ThreadPoolExecutor)]:
+        monkeypatch.setattr(mod, name, value)
+    out = tmp_path / "dist"
+    monkeypatch.setattr(sys, "argv", ["build_site.py", "--out", str(out), "--no-variants"])
+    mod.main()
+
+    html = (out / "index.html").read_text(encoding="utf-8")
+    assert "https://example.com/elm.jpg" in html
+    published = [f for f in (out / "assets").iterdir() if f.suffix == ".webp" or f.suffix == ".jpg"]
+    assert len(published) == 2  # map + oak photo
+    assert all(f.name in html for f in published)
+    assert (out / "sw.js").exists()
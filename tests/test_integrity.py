@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from PIL import Image
+
+from ecomap import integrity
+
+
+@pytest.fixture
+def photos(tmp_path):
+    good = tmp_path / "good.jpg"
+    Image.effect_noise((400, 300), 60).convert("RGB").save(good, quality=90)
+    cut = tmp_path / "cut.jpg"
+    cut.write_bytes(good.read_bytes()[: good.stat().st_size // 2])
+    junk = tmp_path / "junk.jpg"
+    junk.write_bytes(b"not an image")
+    return good, cut, junk
+
+
+def test_check_file(photos, tmp_path):
+    good, cut, junk = photos
+    assert integrity.check_file(good)["status"] == "ok"
+    assert integrity.check_file(good)["check"] == "header"  # no decode needed
+    r = integrity.check_file(cut)
+    assert (r["status"], r["check"]) == ("broken", "decode")
+    assert integrity.check_file(junk)["status"] == "broken"
+    assert integrity.check_file(tmp_path / "none.jpg")["status"] == "missing"
+
+
+def test_repair_truncated_jpeg(photos, tmp_path):
+    _, cut, junk = photos
+    r = integrity.check_and_repair(cut, tmp_path / "cut.jpg.fixed")
+    assert r["status"] == "broken" and r["repaired"].endswith("cut.jpg.fixed")
+    assert integrity.check_file(tmp_path / "cut.jpg.fixed")["status"] == "ok"
+    assert "repair_error" in integrity.check_and_repair(junk, tmp_path / "junk.jpg.fixed")
+
+
+def test_report_round_trip_and_problem(photos, tmp_path):
+    good, cut, _ = photos
+    results = [integrity.check_file(good), integrity.check_file(cut)]
+    report = integrity.write_report(tmp_path / "report.json", results, tmp_path)
+    assert report["counts"]["ok"] == 1 and report["counts"]["broken"] == 1
+    loaded = integrity.load_report(tmp_path / "report.json", tmp_path)
+    assert integrity.problem(loaded, good) is None
+    assert integrity.problem(loaded, cut).startswith("broken")
+
+
+def test_problem_rechecks_files_changed_since_the_report(photos, tmp_path):
+    good, cut, _ = photos
+    integrity.write_report(tmp_path / "report.json", [integrity.check_file(good), integrity.check_file(cut)], tmp_path)
+    loaded = integrity.load_report(tmp_path / "report.json", tmp_path)
+    # good.jpg gets truncated after the report: its size no longer matches
+    good.write_bytes(good.read_bytes()[:2000])
+    assert integrity.problem(loaded, good).startswith("broken")
+    # touching cut.jpg without changing it still matches size and mtime: the report is trusted
+    st = cut.stat()
+    os.utime(cut, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert integrity.problem(loaded, cut).startswith("broken")
+    # a file not in the report is checked on the spot
+    new = tmp_path / "new.png"
+    Image.new("RGB", (8, 8)).save(new)
+    assert integrity.problem(loaded, new) is None
@@ -0,0 +1,38 @@
+import json
+
+from PIL import Image
+
+from ecomap import pipeline
+
+
+def test_tiles_follow_exif_orientation(tmp_path, load_script, monkeypatch):
+    monkeypatch.syspath_prepend(str(load_script.root / "scripts"))
+    make_tiles = load_script("make_tiles")
+    src = tmp_path / "phone.jpg"
+    im = Image.new("RGB", (600, 300), "white")
+    im.paste((255, 0, 0), (0, 0, 100, 100))  # red in the raw top-left corner
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise to view
+    im.save(src, exif=exif)
+
+    info = make_tiles.build_pyramid(src, tmp_path / "tiles", tile_size=256)
+    assert (info["width"], info["height"]) == (300, 600)
+    top_right = tmp_path / "tiles" / "phone" / info["version"] / str(info["levels"] - 1) / "1_0.jpg"
+    with Image.open(top_right) as tile:
+        r, g, b = tile.getpixel((tile.width - 10, 10))
+    assert r > 200 and g < 60 and b < 60  # after rotating, the red corner is top right
+    assert json.loads((tmp_path / "tiles" / "phone" / "tiles.json").read_text())["version"] == info["version"]
+
+
+def test_pipeline_redoes_outputs_after_an_encoder_change(tmp_path, monkeypatch):
+    src = tmp_path / "a.jpg"
+    Image.new("RGB", (8, 8)).save(src)
+    job = pipeline.Job(src, tmp_path / "out" / "a.jpg", {"quality": 80})
+    manifest = pipeline.Manifest(tmp_path / "out")
+    key, content, st = manifest.input_hash(job, "compress")
+    job.dst.parent.mkdir()
+    job.dst.write_bytes(b"x")
+    manifest.record(job, key, content, st)
+    assert manifest.is_current(job, manifest.input_hash(job, "compress")[0])
+    monkeypatch.setattr(pipeline, "ENCODER_VERSION", pipeline.ENCODER_VERSION + 1)
+    assert not manifest.is_current(job, manifest.input_hash(job, "compress")[0])
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from ecomap.plant_import import read_records
+
+BOUNDS = (126.0, 37.0, 127.0, 38.0)
+
+
+def point(coords, **props):
+    return {"type": "Feature", "properties": props, "geometry": {"type": "Point", "coordinates": coords}}
+
+
+def test_csv_numbers_and_empty_cells(tmp_path):
+    f = tmp_path / "s.csv"
+    f.write_text("id,name,x,y,desc\noak,참나무,10.5,20,\nelm,,x1,3,tall\n", encoding="utf-8")
+    rows = list(read_records(f))
+    assert rows[0] == ("line 2", {"id": "oak", "name": "참나무", "x": 10.5, "y": 20.0})
+    # empty cells are left out; bad numbers stay strings for validation to report
+    assert rows[1][1] == {"id": "elm", "x": "x1", "y": 3.0, "desc": "tall"}
+
+
+def test_jsonl_reports_broken_line(tmp_path):
+    f = tmp_path / "s.jsonl"
+    f.write_text('{"id": "a"}\n\n{broken\n', encoding="utf-8")
+    it = read_records(f)
+    assert next(it) == ("line 1", {"id": "a"})
+    with pytest.raises(ValueError, match="line 3"):
+        next(it)
+
+
+def test_geojson_points_are_converted_with_bounds(tmp_path):
+    f = tmp_path / "p.geojson"
+    doc = {"type": "FeatureCollection", "features": [
+        dict(point([126.25, 37.75], name="oak"), id=7),
+        point([126.5, 37.5], id="elm", x=1, y=2),  # x/y properties win
+    ]}
+    f.write_text(json.dumps(doc), encoding="utf-8")
+    assert list(read_records(f, bounds=BOUNDS)) == [
+        ("feature 1", {"name": "oak", "id": "7", "x": 25.0, "y": 25.0}),
+        ("feature 2", {"id": "elm", "x": 1, "y": 2}),
+    ]
+
+
+def test_geojson_point_without_bounds_is_refused(tmp_path):
+    f = tmp_path / "p.geojson"
+    f.write_text(json.dumps({"type": "FeatureCollection", "features": [point([126.5, 37.5], id="oak")]}),
+                 encoding="utf-8")
+    with pytest.raises(ValueError, match="feature 1: .*bounds"):
+        list(read_records(f))
+
+
+@pytest.mark.parametrize("geometry", [{"type": "Point"}, {"type": "Point", "coordinates": None},
+                                      {"type": "Point", "coordinates": [126.5]},
+                                      {"type": "Point", "coordinates": ["a", "b"]}])
+def test_geojsonseq_bad_coordinates_name_the_line(tmp_path, geometry):
+    f = tmp_path / "p.geojsons"
+    f.write_text(json.dumps({"type": "Feature", "properties": {"id": "oak"}, "geometry": geometry}) + "\n",
+                 encoding="utf-8")
+    with pytest.raises(ValueError, match="line 1: Point coordinates"):
+        list(read_records(f, bounds=BOUNDS))
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="unknown input format"):
+        list(read_records(tmp_path / "s.txt"))
@@ -0,0 +1,112 @@
+import json
+import logging
+
+import pytest
+
+from ecomap.plants import PlantStore, validate_plant
+
+
+def write(path, plants):
+    path.write_text(json.dumps(plants, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture
+def store(tmp_path):
+    write(tmp_path / "plants.json", [
+        {"id": "a", "name": "A", "x": 10, "y": 20},
+        {"id": "b", "name": "B", "x": 30, "y": 40},
+    ])
+    return PlantStore(tmp_path / "plants.json")
+
+
+def test_snapshot_reads_json_in_order(store):
+    snap = store.snapshot()
+    assert [p["id"] for p in snap.plants] == ["a", "b"]
+    assert snap.by_id["b"]["name"] == "B"
+    assert store.snapshot() is snap  # cached while nothing changed
+
+
+def test_hand_edit_is_reimported(store):
+    store.all()
+    write(store.json_path, [{"id": "c", "x": 1, "y": 2}])
+    assert [p["id"] for p in store.all()] == ["c"]
+
+
+def test_upsert_replaces_or_merges(store):
+    assert store.upsert([{"id": "a", "name": "A2"}]) == 1
+    assert store.get("a") == {"id": "a", "name": "A2"}
+    assert store.upsert([{"id": "b", "name": "B2"}], merge=True) == 1
+    assert store.get("b") == {"id": "b", "name": "B2", "x": 30, "y": 40}
+    assert store.upsert([{"id": "new", "x": 1, "y": 1}]) == 1
+    assert [p["id"] for p in store.all()] == ["a", "b", "new"]
+    # unchanged records write nothing
+    assert store.upsert([{"id": "new", "x": 1, "y": 1}]) == 0
+
+
+def test_replace_all_and_export(store):
+    written, deleted = store.replace_all([{"id": "b", "name": "B", "x": 30, "y": 40}, {"id": "z", "x": 5, "y": 5}])
+    assert (written, deleted) == (2, 1)  # b moved to position 0, z added, a deleted
+    store.export_json()
+    assert [p["id"] for p in json.loads(store.json_path.read_text(encoding="utf-8"))] == ["b", "z"]
+    # a fresh store sees the export as in sync
+    assert [p["id"] for p in PlantStore(store.json_path).all()] == ["b", "z"]
+
+
+def test_invalid_json_keeps_last_good_import(store, caplog):
+    store.all()
+    store.json_path.write_text("[{broken", encoding="utf-8")
+    with caplog.at_level(logging.ERROR, "ecomap.plants"):
+        assert [p["id"] for p in store.all()] == ["a", "b"]
+    assert "not valid" in caplog.text
+
+
+def test_invalid_json_without_prior_import_raises(tmp_path):
+    (tmp_path / "plants.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        PlantStore(tmp_path / "plants.json").all()
+
+
+def test_duplicate_and_missing_ids_are_logged(tmp_path, caplog):
+    write(tmp_path / "plants.json", [{"id": "a", "x": 1}, {"id": "a", "x": 2}, {"name": "no id"}])
+    with caplog.at_level(logging.WARNING, "ecomap.plants"):
+        plants = PlantStore(tmp_path / "plants.json").all()
+    assert plants == [{"id": "a", "x": 2}]
+    assert "duplicate ids" in caplog.text and ": a" in caplog.text
+    assert "1 entries without" in caplog.text
+
+
+@pytest.mark.parametrize("rec, problem", [
+    ("x", "not an object"),
+    ({"x": 1, "y": 1}, "missing id"),
+    ({"id": "a", "y": 1}, "missing x"),
+    ({"id": "a", "x": "5", "y": 1}, "x is not a number"),
+    ({"id": "a", "x": True, "y": 1}, "x is not a number"),
+    ({"id": "a", "x": 1, "y": 101}, "y out of range"),
+    ({"id": "a", "x": 1, "y": 1, "map": "nope"}, "unknown map"),
+    ({"id": "a", "x": 1, "y": 1, "photo": "photo/none.jpg"}, "photo not found"),
+])
+def test_validate_plant_problems(tmp_path, rec, problem):
+    problems = validate_plant(rec, tmp_path, {"main"})
+    assert any(p.startswith(problem) for p in problems), problems
+
+
+def test_validate_plant_accepts_good_records(tmp_path):
+    (tmp_path / "photo").mkdir()
+    (tmp_path / "photo" / "a.jpg").write_bytes(b"")
+    assert validate_plant({"id": "a", "x": 0, "y": 100, "photo": "a.jpg", "map": "main"}, tmp_path, {"main"}) == []
+    assert validate_plant({"id": "a", "photo": "https://example.com/a.jpg"}, tmp_path, require_xy=False) == []
+
+
+def test_unusable_db_falls_back_to_json(tmp_path, caplog):
+    write(tmp_path / "plants.json", [{"id": "a", "x": 1}, {"id": "b", "x": 2}, {"id": "a", "x": 3}])
+    (tmp_path / "ro.db").mkdir()  # sqlite cannot open a directory, like a read-only data/ folder
+    store = PlantStore(tmp_path / "plants.json", tmp_path / "ro.db")
+    with caplog.at_level(logging.WARNING, "ecomap.plants"):
+        snap = store.snapshot()
+    assert snap.plants == [{"id": "b", "x": 2}, {"id": "a", "x": 3}]
+    assert "reading" in caplog.text and "duplicate ids" in caplog.text
+    assert store.snapshot() is snap
+    write(tmp_path / "plants.json", [{"id": "c", "x": 1}])
+    assert store.get("c") == {"id": "c", "x": 1}
+    store.json_path.write_text("[{broken", encoding="utf-8")
+    assert store.get("c") == {"id": "c", "x": 1}  # last good parse is kept
@@ -0,0 +1,89 @@
+import json
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from ecomap.plants import PlantStore
+
+
+@pytest.fixture
+def save_plants(tmp_path, load_script, monkeypatch):
+    mod = load_script("save_plants")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "map").mkdir()
+    (tmp_path / "data" / "plants.json").write_text(
+        json.dumps([{"id": "oak", "name": "참나무", "x": 10, "y": 20}], ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(mod, "WORK", tmp_path)
+    monkeypatch.setattr(mod, "DATA_FILE", tmp_path / "data" / "plants.json")
+    monkeypatch.setattr(mod, "MAP_DIR", tmp_path / "map")
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["save_plants.py", *map(str, args)])
+        try:
+            mod.main()
+        except SystemExit as e:
+            return e.code or 0
+        return 0
+
+    run.mod = mod
+    run.plants = lambda: json.loads((tmp_path / "data" / "plants.json").read_text(encoding="utf-8"))
+    return run
+
+
+def test_import_merges_into_stored_plants(save_plants, tmp_path):
+    f = tmp_path / "s.csv"
+    f.write_text("id,name\noak,떡갈나무\n", encoding="utf-8")
+    assert save_plants("--import", f) == 0
+    assert save_plants.plants() == [{"id": "oak", "name": "떡갈나무", "x": 10, "y": 20}]
+
+
+def test_import_refuses_new_plant_without_position(save_plants, tmp_path):
+    f = tmp_path / "s.csv"
+    f.write_text("id,name\nelm,느릅나무\n", encoding="utf-8")
+    assert save_plants("--import", f) == 1
+    assert [p["id"] for p in save_plants.plants()] == ["oak"]
+
+
+def test_geojson_without_bounds_fails_cleanly(save_plants, tmp_path, capsys):
+    f = tmp_path / "p.geojson"
+    f.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"id": "oak1"}, "geometry": {"type": "Point", "coordinates": [126.9, 37.5]}},
+    ]}), encoding="utf-8")
+    assert save_plants("--import", f) == 1
+    assert "bounds" in capsys.readouterr().out
+    f.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"id": "oak1"}, "geometry": {"type": "Point"}},
+    ]}), encoding="utf-8")
+    assert save_plants("--import", f, "--bounds", "126,37,127,38") == 1
+    assert [p["id"] for p in save_plants.plants()] == ["oak"]
+
+
+def test_invalid_records_abort_unless_skipped(save_plants, tmp_path):
+    f = tmp_path / "new.json"
+    f.write_text(json.dumps([{"id": "a", "x": 1, "y": 1}, {"id": "a", "x": 2, "y": 2}, {"id": "b", "x": 500, "y": 1}]),
+                 encoding="utf-8")
+    assert save_plants(f) == 1
+    assert [p["id"] for p in save_plants.plants()] == ["oak"]
+    assert save_plants(f, "--skip-invalid") == 0
+    assert save_plants.plants() == [{"id": "a", "x": 1, "y": 1}]
+
+
+def test_backups_only_on_change_and_rotated(save_plants, tmp_path, monkeypatch):
+    clock = [datetime(2026, 1, 1)]
+
+    class FakeDatetime:
+        @staticmethod
+        def utcnow():
+            clock[0] += timedelta(seconds=1)
+            return clock[0]
+
+    monkeypatch.setattr(save_plants.mod, "datetime", FakeDatetime)
+    f = tmp_path / "one.json"
+    for n in range(4):
+        f.write_text(json.dumps({"id": "oak", "x": n, "y": 1}), encoding="utf-8")
+        assert save_plants("--upsert", f, "--keep-backups", 2) == 0
+    assert save_plants("--upsert", f, "--keep-backups", 2) == 0  # unchanged: no backup
+    backups = sorted(p.name for p in (tmp_path / "data").glob("plants.json.bak.*"))
+    assert backups == ["plants.json.bak.20260101T000003Z", "plants.json.bak.20260101T000004Z"]
+    assert PlantStore(tmp_path / "data" / "plants.json").get("oak")["x"] == 3
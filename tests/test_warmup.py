@@ -0,0 +1,57 @@
+import threading
+import time
+
+from ecomap.warmup import Warmup
+
+
+def wait(warmup, timeout=5.0):
+    end = time.monotonic() + timeout
+    while warmup.status()["running"]:
+        assert time.monotonic() < end, "warm-up did not finish"
+        time.sleep(0.01)
+    return warmup.status()
+
+
+def boom():
+    raise OSError("broken photo")
+
+
+def test_warming_until_the_first_run_finishes():
+    gate = threading.Event()
+    w = Warmup(workers=2)
+    assert w.status()["state"] == "idle"
+    assert w.start(lambda: [gate.wait, lambda: None], tag=1)
+    assert w.status()["state"] == "warming"
+    assert not w.start(lambda: [], tag=2)  # ignored while running
+    gate.set()
+    s = wait(w)
+    assert (s["state"], s["done"], s["total"], s["failed"]) == ("ready", 2, 2, 0)
+    assert not w.start(lambda: [], tag=1)  # same tag, nothing to redo
+
+
+def test_failed_jobs_are_reported_but_still_ready():
+    w = Warmup(workers=2)
+    w.start(lambda: [boom, lambda: None], tag=1)
+    s = wait(w)
+    assert (s["state"], s["failed"], s["error"]) == ("ready", 1, "broken photo")
+    assert w.ready
+
+
+def test_ready_stays_set_during_a_later_run():
+    w = Warmup(workers=1)
+    w.start(lambda: [], tag=1)
+    wait(w)
+    gate = threading.Event()
+    w.start(lambda: [gate.wait], tag=2)
+    assert w.status()["state"] == "ready" and w.status()["running"]
+    gate.set()
+    wait(w)
+
+
+def test_make_jobs_error_is_not_ready_and_retried():
+    w = Warmup(workers=1, retry_after=0)
+    w.start(lambda: 1 / 0, tag=1)
+    s = wait(w)
+    assert s["state"] == "failed" and not w.ready and s["error"] == "division by zero"
+    assert w.start(lambda: [], tag=1)  # retried with the same tag
+    assert wait(w)["state"] == "ready"